@@ -6,35 +6,23 @@ from wagtail.documents.models import Document
 # Если аудио-файлы будем хранить в Wagtail Documents
 from wagtailmetadata.models import MetadataPageMixin
 
+from blog.listing import KeysetListingMixin
 from blog.models import Category  # общие категории (в твоём файле blog_models.py)
 
-class AudioIndexPage(MetadataPageMixin, Page):
+class AudioIndexPage(KeysetListingMixin, MetadataPageMixin, Page):
     intro = RichTextField(blank=True, verbose_name="Введение")
 
     content_panels = Page.content_panels + [
         FieldPanel('intro'),
+        FieldPanel('listing_page_size'),
     ]
 
-    def get_context(self, request):
-        context = super().get_context(request)
-
-        # Категории только для аудио + счётчик
-        categories = Category.objects.filter(section=3).annotate(
-            audio_count=models.Count('audio_pages')
-        ).order_by('title')
-        context['categories'] = categories
-
-        audios = AudioPage.objects.child_of(self).live().order_by('-date')
-
-        category_id = request.GET.get('category')
-        if category_id:
-            try:
-                audios = audios.filter(category__id=int(category_id), category__section=3)
-            except ValueError:
-                pass
-
-        context['audios'] = audios
-        return context
+    listing_model = 'audio.AudioPage'
+    listing_section = 3
+    listing_context_name = 'audios'
+    listing_items_template = 'audio/audio_index_items.html'
+    # Рендишены, которые выводит audio_index_items.html (подгружаются пачкой вместе с карточками)
+    listing_image_filters = ('fill-600x600',)
 
     class Meta:
         verbose_name = "Индекс аудио уроков"
@@ -72,6 +60,9 @@ class AudioPage(MetadataPageMixin, Page):
         default=7
     )
 
+    # Рендишены main_image вне карточек индекса: audio_page.html и поиск по сайту (base/renditions.py)
+    rendition_filters = {'main_image': ('fill-800x800', 'fill-300x200')}
+
     content_panels = Page.content_panels + [
         FieldPanel('date'),
         FieldPanel('duration'),
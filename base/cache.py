@@ -0,0 +1,22 @@
+"""
+Проверка кеша для management-команд, которые готовят данные веб-процессам.
+
+Команда пишет в кеш по умолчанию; если он живёт в памяти процесса
+(LocMem, Dummy), записанное исчезнет вместе с командой и веб-сервер его
+не увидит. Общий кеш — Redis из settings/base.py.
+"""
+from django.core.cache import DEFAULT_CACHE_ALIAS, caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.management.base import CommandError
+
+
+def check_shared_cache(command, consequence, required=False):
+    """Предупреждает (required — останавливает команду), если кеш не общий для процессов."""
+    backend = caches[DEFAULT_CACHE_ALIAS]
+    if not isinstance(backend, (LocMemCache, DummyCache)):
+        return
+    message = f"Кеш {type(backend).__name__} не общий для процессов: {consequence}"
+    if required:
+        raise CommandError(message)
+    command.stderr.write(command.style.WARNING(message))
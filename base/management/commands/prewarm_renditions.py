@@ -0,0 +1,101 @@
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime, timedelta
+
+import django
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.utils import timezone
+
+from base.renditions import collect_rendition_targets, find_missing_renditions, warm_image
+
+SINCE_UNITS = {'m': 'minutes', 'h': 'hours', 'd': 'days', 'w': 'weeks'}
+
+
+def parse_since(value):
+    """'2d', '12h', '30m', '1w' — столько назад; иначе дата или дата-время ISO."""
+    match = re.fullmatch(r'(\d+)([mhdw])', value.strip())
+    if match:
+        return timezone.now() - timedelta(**{SINCE_UNITS[match.group(2)]: int(match.group(1))})
+    try:
+        since = datetime.fromisoformat(value)
+    except ValueError:
+        raise CommandError(f'Не понял --since «{value}»: нужен интервал (2d, 12h) или дата ISO')
+    return timezone.make_aware(since) if timezone.is_naive(since) else since
+
+
+def _init_worker():
+    # Дочерний процесс: Django уже настроен при fork, но не при spawn/forkserver
+    django.setup()
+
+
+class Command(BaseCommand):
+    help = (
+        'Заранее генерирует недостающие рендишены всех картинок, которые выводит сайт: '
+        'страниц, блоков StreamField, сниппетов, настроек и превью для соцсетей (см. base/renditions.py)'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--since',
+            type=parse_since,
+            help='Только картинки, загруженные с этого момента: 2d, 12h, 2026-01-31 …'
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=4,
+            help='Сколько процессов генерируют рендишены (1 — без пула, в текущем процессе)'
+        )
+        parser.add_argument(
+            '--progress-every',
+            type=int,
+            default=50,
+            help='Печатать прогресс через столько картинок'
+        )
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        targets = collect_rendition_targets()
+        jobs = find_missing_renditions(targets, since=options['since'])
+        total = sum(len(specs) for image_id, specs in jobs)
+        self.stdout.write(
+            f'Картинок в шаблонах: {len(targets)}, с недостающими рендишенами: {len(jobs)}, рендишенов: {total}'
+        )
+        if not jobs:
+            self.stdout.write(self.style.SUCCESS('Все рендишены уже на месте'))
+            return
+
+        created, failures, done = 0, [], 0
+        for image_id, count, error in self.run_jobs(jobs, options['workers']):
+            done += 1
+            created += count
+            if error:
+                failures.append((image_id, error))
+            if done % options['progress_every'] == 0 or done == len(jobs):
+                elapsed = time.perf_counter() - started
+                self.stdout.write(f'  {done}/{len(jobs)} картинок, {created} рендишенов, {created / elapsed:.1f} в секунду')
+
+        for image_id, error in failures:
+            self.stderr.write(self.style.WARNING(f'  Картинка {image_id}: {error}'))
+
+        elapsed = time.perf_counter() - started
+        style = self.style.WARNING if failures else self.style.SUCCESS
+        self.stdout.write(style(
+            f'Создано рендишенов: {created}, ошибок: {len(failures)}. '
+            f'Время: {elapsed:.1f} с ({created / elapsed:.1f} рендишенов/с)'
+        ))
+
+    def run_jobs(self, jobs, workers):
+        if workers <= 1:
+            for job in jobs:
+                yield warm_image(job)
+            return
+
+        # Соединения с БД не должны переходить в дочерние процессы
+        connections.close_all()
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as executor:
+            futures = [executor.submit(warm_image, job) for job in jobs]
+            for future in as_completed(futures):
+                yield future.result()
@@ -43,6 +43,13 @@ class NavigationSettings(BaseGenericSetting):
         verbose_name="Иконка Instagram (PNG)"
     )
 
+    # Иконки в подвале base.html (base/renditions.py)
+    rendition_filters = {
+        'vk_icon': ('width-48',),
+        'facebook_icon': ('width-48',),
+        'instagram_icon': ('width-48',),
+    }
+
     # Остальные поля (телефон, email)
     phone = models.CharField(max_length=30, blank=True, verbose_name="Телефон")
     email = models.EmailField(blank=True, verbose_name="Email")
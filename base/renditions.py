@@ -0,0 +1,126 @@
+"""
+Какие рендишены выводит сайт — для их заблаговременной генерации.
+
+Фильтры объявляются рядом с данными:
+  * у моделей (страниц, сниппетов, настроек) — атрибут rendition_filters
+    {'поле-картинка': ('fill-600x400', ...)};
+  * у блоков StreamField — такой же атрибут rendition_filters {'дочерний блок': (...)};
+  * карточки индексов — listing_image_filters у KeysetListingMixin (blog/listing.py);
+  * превью для соцсетей — search_image страниц с MetadataPageMixin и
+    WAGTAILMETADATA_IMAGE_FILTER.
+
+Страницы учитываются только опубликованные. Генерация — в
+python manage.py prewarm_renditions.
+"""
+from collections import defaultdict
+
+from django.apps import apps
+from django.conf import settings
+from wagtail.blocks import ListBlock, StreamBlock, StructBlock
+from wagtail.fields import StreamField
+from wagtail.images import get_image_model
+from wagtail.models import Page
+from wagtailmetadata.models import MetadataPageMixin
+
+from blog.listing import KeysetListingMixin
+
+
+def _add(targets, image_ids, specs):
+    for image_id in image_ids:
+        if image_id:
+            targets[image_id].update(specs)
+
+
+def _walk_block(block, value, targets):
+    """Собирает картинки из «сырого» JSON значения блока, спускаясь по вложенным блокам."""
+    if value is None:
+        return
+    if isinstance(block, StreamBlock):
+        for item in value:
+            child = block.child_blocks.get(item.get('type'))
+            if child is not None:
+                _walk_block(child, item.get('value'), targets)
+    elif isinstance(block, ListBlock):
+        for item in value:
+            # Новый формат ListBlock: {'type': 'item', 'value': ..., 'id': ...}
+            if isinstance(item, dict) and item.get('type') == 'item' and 'value' in item:
+                item = item['value']
+            _walk_block(block.child_block, item, targets)
+    elif isinstance(block, StructBlock):
+        filters = getattr(block, 'rendition_filters', {})
+        for name, child in block.child_blocks.items():
+            if name in filters:
+                _add(targets, [value.get(name)], filters[name])
+            _walk_block(child, value.get(name), targets)
+
+
+def _published(model):
+    objects = model._default_manager.all()
+    if issubclass(model, Page):
+        objects = objects.filter(live=True)
+    return objects
+
+
+def collect_rendition_targets():
+    """{id картинки: {фильтр, ...}} — всё, что выводят шаблоны сайта."""
+    targets = defaultdict(set)
+
+    for model in apps.get_models():
+        objects = _published(model)
+
+        for field_name, specs in getattr(model, 'rendition_filters', {}).items():
+            _add(targets, objects.values_list(field_name, flat=True), specs)
+
+        if issubclass(model, MetadataPageMixin):
+            meta_filter = getattr(settings, 'WAGTAILMETADATA_IMAGE_FILTER', 'original')
+            _add(targets, objects.values_list('search_image', flat=True), [meta_filter])
+
+        if issubclass(model, KeysetListingMixin):
+            listing_items = _published(apps.get_model(model.listing_model))
+            _add(targets, listing_items.values_list('main_image', flat=True), model.listing_image_filters)
+
+        for field in model._meta.local_fields:
+            if isinstance(field, StreamField):
+                for stream_value in objects.values_list(field.name, flat=True).iterator():
+                    _walk_block(field.stream_block, list(stream_value.raw_data), targets)
+
+    return targets
+
+
+def find_missing_renditions(targets, since=None, batch_size=500):
+    """
+    Оставляет только недостающие рендишены: [(id картинки, [фильтр, ...]), ...].
+    since — только картинки, загруженные после этого момента.
+    """
+    Image = get_image_model()
+    Rendition = Image.get_rendition_model()
+
+    image_ids = sorted(targets)
+    if since is not None:
+        image_ids = sorted(set(image_ids) & set(
+            Image.objects.filter(created_at__gte=since).values_list('pk', flat=True)
+        ))
+
+    jobs = []
+    for start in range(0, len(image_ids), batch_size):
+        batch = image_ids[start:start + batch_size]
+        existing = defaultdict(set)
+        for image_id, spec in Rendition.objects.filter(image_id__in=batch).values_list('image_id', 'filter_spec'):
+            existing[image_id].add(spec)
+        # Удалённые картинки (ссылки на них ещё могут оставаться в StreamField) пропускаем
+        for image_id in Image.objects.filter(pk__in=batch).values_list('pk', flat=True):
+            missing = sorted(targets[image_id] - existing[image_id])
+            if missing:
+                jobs.append((image_id, missing))
+    return jobs
+
+
+def warm_image(job):
+    """Генерирует рендишены одной картинки; возвращает (id, создано, ошибка или None)."""
+    image_id, specs = job
+    try:
+        image = get_image_model().objects.get(pk=image_id)
+        image.get_renditions(*specs)
+    except Exception as e:  # битый файл, нет файла в хранилище, ошибка Pillow — в отчёт, не падаем
+        return image_id, 0, f'{type(e).__name__}: {e}'
+    return image_id, len(specs), None
@@ -1,3 +1,75 @@
-from django.test import TestCase
+import datetime
+import tempfile
+from io import StringIO
 
-# Create your tests here.
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from wagtail.images import get_image_model
+from wagtail.images.tests.utils import get_test_image_file
+from wagtail.models import Site
+
+from base.renditions import collect_rendition_targets, find_missing_renditions
+from blog.models import BlogIndexPage, BlogPage
+from channels.models import ChannelGroup
+from home.models import ChannelSectionPage
+
+Image = get_image_model()
+
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp(), WAGTAILMETADATA_IMAGE_FILTER='fill-1200x630')
+class PrewarmRenditionsTests(TestCase):
+    """
+    Tests for discovering used (image, filter) pairs and the prewarm_renditions command.
+    """
+
+    def setUp(self):
+        cache.clear()  # кеш рендишенов переживает откат транзакции теста
+        self.card, self.meta, self.icon, self.block, self.draft_only = [
+            Image.objects.create(title=title, file=get_test_image_file())
+            for title in ("Карточка", "Соцсети", "Значок", "Блок", "Черновик")
+        ]
+        root = Site.objects.get(is_default_site=True).root_page
+        index = root.add_child(instance=BlogIndexPage(title="Блог", slug="blog"))
+        index.add_child(instance=BlogPage(
+            title="Статья", slug="article", date=datetime.date(2025, 1, 1),
+            main_image=self.card, search_image=self.meta,
+        ))
+        index.add_child(instance=BlogPage(
+            title="Черновик", slug="draft", date=datetime.date(2025, 1, 2), main_image=self.draft_only, live=False,
+        ))
+        root.add_child(instance=ChannelSectionPage(
+            title="Частоты", slug="chastoty", section_type=1,
+            body=[('section', {'title': "Раздел", 'text': "<p>текст</p>", 'image': self.block})],
+        ))
+        ChannelGroup.objects.create(title="Матрица", section=1, image=self.icon)
+
+    def test_targets_cover_pages_blocks_snippets_and_metadata(self):
+        targets = collect_rendition_targets()
+        self.assertEqual(targets[self.card.pk], {'fill-600x400', 'width-200', 'fill-300x200'})
+        self.assertEqual(targets[self.meta.pk], {'fill-1200x630'})
+        self.assertEqual(targets[self.icon.pk], {'fill-120x120'})
+        self.assertEqual(targets[self.block.pk], {'max-600x400'})
+        self.assertNotIn(self.draft_only.pk, targets)
+
+    def test_command_generates_only_missing(self):
+        self.icon.get_rendition('fill-120x120')
+        out = StringIO()
+        call_command('prewarm_renditions', '--workers', '1', stdout=out, stderr=StringIO())
+        self.assertIn("Создано рендишенов: 5, ошибок: 0", out.getvalue())
+        self.assertEqual(find_missing_renditions(collect_rendition_targets()), [])
+
+        out = StringIO()
+        call_command('prewarm_renditions', '--workers', '1', stdout=out)
+        self.assertIn("Все рендишены уже на месте", out.getvalue())
+
+    def test_since_and_failures(self):
+        Image.objects.filter(pk=self.card.pk).update(created_at=datetime.datetime(2020, 1, 1, tzinfo=datetime.UTC))
+        jobs = find_missing_renditions(collect_rendition_targets(), since=datetime.datetime(2024, 1, 1, tzinfo=datetime.UTC))
+        self.assertNotIn(self.card.pk, [image_id for image_id, specs in jobs])
+
+        self.icon.file.storage.delete(self.icon.file.name)
+        out, err = StringIO(), StringIO()
+        call_command('prewarm_renditions', '--workers', '1', '--since', '1d', stdout=out, stderr=err)
+        self.assertIn("ошибок: 1", out.getvalue())
+        self.assertIn(f"Картинка {self.icon.pk}", err.getvalue())
@@ -1,5 +1,34 @@
-from django.apps import AppConfig
+from django.apps import AppConfig, apps
 
 
 class BlogConfig(AppConfig):
     name = 'blog'
+
+    def ready(self):
+        from django.db.models.signals import post_delete, post_save, pre_save
+        from wagtail.signals import page_published, page_unpublished, post_page_move
+
+        from .facets import bump_facets_version
+        from .listing import KeysetListingMixin
+        from .models import BlogPage, Category
+        from .related import rebuild_for_article, remember_previous_category
+
+        # Счётчики категорий индексов (блог, видео, аудио) меняются вместе с опубликованными страницами списков
+        listing_models = {
+            apps.get_model(model.listing_model)
+            for model in apps.get_models() if issubclass(model, KeysetListingMixin)
+        }
+        for model in listing_models:
+            uid = model._meta.label_lower
+            page_published.connect(bump_facets_version, sender=model, dispatch_uid=f'listing_facets_publish_{uid}')
+            page_unpublished.connect(bump_facets_version, sender=model, dispatch_uid=f'listing_facets_unpublish_{uid}')
+            post_delete.connect(bump_facets_version, sender=model, dispatch_uid=f'listing_facets_delete_{uid}')
+            post_page_move.connect(bump_facets_version, sender=model, dispatch_uid=f'listing_facets_move_{uid}')
+        post_save.connect(bump_facets_version, sender=Category, dispatch_uid='listing_facets_category_save')
+        post_delete.connect(bump_facets_version, sender=Category, dispatch_uid='listing_facets_category_delete')
+
+        # Списки похожих статей пересчитываются для затронутых категорий
+        pre_save.connect(remember_previous_category, sender=BlogPage, dispatch_uid='blog_related_pre_save')
+        page_published.connect(rebuild_for_article, sender=BlogPage, dispatch_uid='blog_related_publish')
+        page_unpublished.connect(rebuild_for_article, sender=BlogPage, dispatch_uid='blog_related_unpublish')
+        post_delete.connect(rebuild_for_article, sender=BlogPage, dispatch_uid='blog_related_delete')
@@ -0,0 +1,50 @@
+"""
+Счётчики категорий для индексов блога, видео и аудио.
+
+Считаются только опубликованные дочерние страницы индекса, одним
+GROUP BY по category_id, и кешируются до смены версии. Версия меняется
+при публикации, снятии с публикации, удалении и переносе страниц списков,
+а также при правке категорий (см. blog/apps.py).
+"""
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count
+
+FACETS_VERSION_KEY = 'listing:facets:version'
+
+
+def get_facets_version():
+    return cache.get_or_set(FACETS_VERSION_KEY, time.time_ns, timeout=None)
+
+
+def bump_facets_version(**kwargs):
+    """Инвалидирует все закешированные счётчики (годится как обработчик сигналов)."""
+    cache.set(FACETS_VERSION_KEY, time.time_ns(), timeout=None)
+
+
+def get_category_facets(index_page):
+    """
+    {'total': число опубликованных страниц индекса, 'categories': [{'id', 'title', 'item_count'}, ...]}
+    — все категории раздела индекса, в том числе пустые.
+    """
+    from .models import Category
+
+    key = f'listing:facets:{index_page.pk}:{get_facets_version()}'
+    facets = cache.get(key)
+    if facets is None:
+        counts = dict(
+            index_page.get_listing_queryset().order_by()
+            .values_list('category_id').annotate(item_count=Count('pk'))
+        )
+        categories = Category.objects.filter(section=index_page.listing_section).order_by('title')
+        facets = {
+            'total': sum(counts.values()),
+            'categories': [
+                {'id': pk, 'title': title, 'item_count': counts.get(pk, 0)}
+                for pk, title in categories.values_list('pk', 'title')
+            ],
+        }
+        cache.set(key, facets, getattr(settings, 'LISTING_FACETS_CACHE_TIMEOUT', 24 * 60 * 60))
+    return facets
@@ -0,0 +1,127 @@
+"""
+Общий список дочерних страниц для индексов блога, видео и аудио.
+
+Страницы идут по ключу (date, id) от новых к старым: следующая порция
+выбирается условием «после последней показанной», а не OFFSET, поэтому
+её стоимость не растёт с глубиной списка. Со страницей рендерится только
+первая порция карточек; остальные подгружает HTMX-кнопка «Показать ещё» —
+на такой запрос страница отдаёт лишь фрагмент со следующими карточками.
+Счётчики категорий в сайдбаре берутся из кеша (blog/facets.py).
+"""
+import datetime
+
+from django.apps import apps
+from django.db import models
+from django.db.models import Prefetch, Q
+from django.utils.cache import patch_vary_headers
+from wagtail.images import get_image_model
+
+from .facets import get_category_facets
+
+
+def encode_listing_cursor(page):
+    return f"{page.date.isoformat()}|{page.pk}"
+
+
+def decode_listing_cursor(value):
+    """Разбирает курсор списка; при мусоре во входных данных — ValueError."""
+    date, pk = value.split('|')
+    return datetime.date.fromisoformat(date), int(pk)
+
+
+def prefetch_card_images(items, filter_specs):
+    """
+    Подгружает всё, что нужно карточкам: категорию, картинку и её готовые
+    рендишены filter_specs — фиксированное число запросов, сколько бы ни было карточек.
+    """
+    renditions = get_image_model().get_rendition_model().objects.filter(filter_spec__in=filter_specs)
+    return items.select_related('category', 'main_image').prefetch_related(
+        Prefetch('main_image__renditions', queryset=renditions, to_attr='prefetched_renditions')
+    )
+
+
+class KeysetListingMixin(models.Model):
+    listing_page_size = models.PositiveSmallIntegerField(
+        default=12,
+        verbose_name="Карточек на странице",
+        help_text="Столько карточек показывается сразу и подгружается кнопкой «Показать ещё»",
+    )
+
+    # Задаются в наследниках
+    listing_model = None            # 'app_label.Model' дочерних страниц (с полями date и category)
+    listing_section = None          # раздел категорий (blog.models.SECTION_CHOICES)
+    listing_context_name = None     # имя списка в контексте шаблона
+    listing_items_template = None   # фрагмент с карточками и кнопкой «Показать ещё»
+    listing_image_filters = ()      # рендишены main_image, которые выводит этот фрагмент
+
+    class Meta:
+        abstract = True
+
+    def get_listing_model(self):
+        return apps.get_model(self.listing_model)
+
+    def get_listing_category_id(self, request):
+        try:
+            return int(request.GET['category'])
+        except (KeyError, ValueError):
+            return None  # Если мусор в GET — игнорируем фильтр
+
+    def get_listing_queryset(self, category_id=None):
+        items = self.get_listing_model().objects.child_of(self).live()
+        if category_id is not None:
+            items = items.filter(category__id=category_id, category__section=self.listing_section)
+        return items
+
+    def for_listing(self, items):
+        return prefetch_card_images(items, self.listing_image_filters)
+
+    def get_listing_page(self, items, cursor=None):
+        """Одна порция карточек: (список страниц, курсор следующей порции или None)."""
+        items = self.for_listing(items).order_by('-date', '-id')
+        if cursor:
+            date, pk = decode_listing_cursor(cursor)
+            items = items.filter(Q(date__lt=date) | Q(date=date, id__lt=pk))
+
+        # Берём на одну больше, чтобы понять, есть ли следующая порция
+        items = list(items[:self.listing_page_size + 1])
+        if len(items) > self.listing_page_size:
+            return items[:self.listing_page_size], encode_listing_cursor(items[self.listing_page_size - 1])
+        return items, None
+
+    def is_listing_fragment_request(self, request):
+        return bool(request.headers.get('HX-Request') and request.GET.get('cursor'))
+
+    def get_template(self, request, *args, **kwargs):
+        if self.is_listing_fragment_request(request):
+            return self.listing_items_template
+        return super().get_template(request, *args, **kwargs)
+
+    def serve(self, request, *args, **kwargs):
+        response = super().serve(request, *args, **kwargs)
+        # По одному URL отдаётся то страница, то фрагмент — кеши должны различать их по заголовку
+        patch_vary_headers(response, ['HX-Request'])
+        return response
+
+    def get_context(self, request, *args, **kwargs):
+        context = super().get_context(request, *args, **kwargs)
+        category_id = self.get_listing_category_id(request)
+        cursor = request.GET.get('cursor')
+        try:
+            items, next_cursor = self.get_listing_page(self.get_listing_queryset(category_id), cursor)
+        except ValueError:
+            # Испорченный курсор — показываем начало списка
+            cursor = None
+            items, next_cursor = self.get_listing_page(self.get_listing_queryset(category_id))
+
+        context.update({
+            self.listing_context_name: items,
+            'category_id': category_id,
+            'cursor': cursor,
+            'next_cursor': next_cursor,
+        })
+        # Сайдбар нужен только полной странице, не фрагменту «Показать ещё»
+        if not self.is_listing_fragment_request(request):
+            facets = get_category_facets(self)
+            context['categories'] = facets['categories']
+            context['total_count'] = facets['total']
+        return context
@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+
+from base.cache import check_shared_cache
+from blog.models import BlogPage
+from blog.related import rebuild_related_articles
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает списки похожих статей блога для всех категорий (см. blog/related.py)'
+
+    def handle(self, *args, **options):
+        check_shared_cache(self, 'пересчёт не дойдёт до веб-сервера')
+        category_ids = set(
+            BlogPage.objects.live().exclude(category=None).values_list('category_id', flat=True).distinct()
+        )
+        for category_id in sorted(category_ids):
+            rebuild_related_articles(category_id)
+        # Общий список — для статей без категории
+        rebuild_related_articles()
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Пересчитано списков похожих статей: {len(category_ids) + 1} '
+            f'(статей: {BlogPage.objects.live().count()})'
+        ))
@@ -0,0 +1,18 @@
+# Generated by Django 6.0.1 on 2026-10-18 13:45
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0003_blogindexpage_search_image_blogpage_search_image'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='blogindexpage',
+            name='listing_page_size',
+            field=models.PositiveSmallIntegerField(default=12, help_text='Столько карточек показывается сразу и подгружается кнопкой «Показать ещё»', verbose_name='Карточек на странице'),
+        ),
+    ]
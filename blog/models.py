@@ -1,5 +1,4 @@
 from django.db import models
-from django.db.models import Count
 from wagtail.models import Page
 from wagtail.snippets.models import  register_snippet
 from wagtail.fields import RichTextField
@@ -11,6 +10,9 @@ from django.utils.text import slugify
 from wagtailmetadata.models import MetadataPageMixin
 
 from modelcluster.fields import ParentalKey
+
+from .listing import KeysetListingMixin
+from .related import RELATED_IMAGE_FILTERS, get_related_articles
 # from modelcluster.models import Orderable  # Если галерея нужна позже, но пока нет
 
 SECTION_CHOICES = [
@@ -50,40 +52,21 @@ class Category(models.Model):  #
 
 
 # ------------------------------------------------------------
-# Индекс блога (список статей, с фильтром)
-class BlogIndexPage(MetadataPageMixin, Page):
+# Индекс блога (список статей, с фильтром по категории и подгрузкой «Показать ещё»)
+class BlogIndexPage(KeysetListingMixin, MetadataPageMixin, Page):
     intro = RichTextField(blank=True, verbose_name="Введение")
 
     content_panels = Page.content_panels + [
         FieldPanel('intro'),
+        FieldPanel('listing_page_size'),
     ]
 
-    # Кастомный контекст: фильтр по категории из GET
-    def get_context(self, request):
-        context = super().get_context(request)
-
-        # Все категории для меню
-        categories = Category.objects.filter(section=1).annotate(
-            article_count=Count('articles')
-        ).order_by('title')
-        context['categories'] = categories
-
-        # Прямой запрос к BlogPage — ключевой фикс!
-        articles = BlogPage.objects.child_of(self).live().order_by('-date')
-
-        category_id = request.GET.get('category')
-        if category_id:
-            try:
-                category_id = int(category_id)
-                articles = articles.filter(category__id=category_id, category__section=1)
-            except (ValueError, TypeError):
-                pass  # Если мусор в GET — игнорируем фильтр
-
-        # Сортировка по дате (новые сверху)
-        articles = articles.order_by('-date')
-
-        context['articles'] = articles
-        return context
+    listing_model = 'blog.BlogPage'
+    listing_section = 1
+    listing_context_name = 'articles'
+    listing_items_template = 'blog/blog_index_items.html'
+    # Рендишены, которые выводит blog_index_items.html (подгружаются пачкой вместе с карточками)
+    listing_image_filters = ('fill-600x400',)
 
     # Поиск (опционально)
     search_fields = Page.search_fields + [
@@ -107,20 +90,18 @@ class BlogPage(MetadataPageMixin, Page):
         related_name='+', verbose_name="Главное изображение"
     )
 
-        # Контекст для детальной страницы (дети, если нужно)
+    # Рендишены main_image вне карточек индекса: blog_page.html (в том числе похожие статьи)
+    # и поиск по сайту (base/renditions.py)
+    rendition_filters = {'main_image': ('width-200', *RELATED_IMAGE_FILTERS)}
+
+    # Контекст для детальной страницы
     def get_context(self, request):
         context = super().get_context(request)
-        # Похожие статьи: из той же категории, кроме текущей, новые сверху
-        related_articles = BlogPage.objects.live().exclude(id=self.id)
-
-        if self.category:
-            related_articles = related_articles.filter(category=self.category)
-
-        related_articles = related_articles.order_by('-date')[:4]  # 4 штуки — оптимально
-        context['related_articles'] = related_articles
+        # Похожие статьи: из той же категории, кроме текущей, новые сверху (списки id — в кеше, blog/related.py)
+        context['related_articles'] = get_related_articles(self)
 
-        # Опционально: родительский индекс блога (для breadcrumbs или ссылок)
-        context['blog_index'] = self.get_parent().specific
+        # Родительский индекс блога (для ссылки «Вернуться к блогу»); для pageurl specific не нужен
+        context['blog_index'] = self.get_parent()
         return context
 
 
@@ -0,0 +1,77 @@
+"""
+Похожие статьи для страницы статьи блога.
+
+Похожие — опубликованные статьи той же категории (у статьи без категории —
+любые), новые сверху. Для каждой категории в кеше лежит список id её
+RELATED_ARTICLES_COUNT + 1 самых новых статей: страница убирает из него себя
+и загружает карточки одним запросом вместе с картинками и рендишенами.
+
+Список категории пересчитывается при публикации, снятии с публикации и
+удалении статьи этой категории, а при смене категории — и список прежней
+(см. blog/apps.py). Пересчитать всё: python manage.py rebuild_related_articles.
+
+Списки лежат в общем кеше (Redis, CACHES в settings/base.py): пересчёт из
+команды, отложенной публикации по cron (publish_scheduled) или другого
+воркера сразу виден всем веб-процессам.
+"""
+from django.conf import settings
+from django.core.cache import cache
+
+from .listing import prefetch_card_images
+
+RELATED_ARTICLES_COUNT = 4
+# Рендишены main_image, которые выводят карточки похожих статей в blog_page.html
+RELATED_IMAGE_FILTERS = ('fill-300x200',)
+
+ALL_ARTICLES = 'all'  # ключ списка для статей без категории
+
+
+def _related_key(category_id):
+    return f'blog:related:{category_id or ALL_ARTICLES}'
+
+
+def rebuild_related_articles(category_id=None):
+    """Пересчитывает и кладёт в кеш список категории (None — общий список); возвращает его."""
+    from .models import BlogPage
+
+    articles = BlogPage.objects.live()
+    if category_id:
+        articles = articles.filter(category_id=category_id)
+    ids = list(articles.order_by('-date', '-id').values_list('pk', flat=True)[:RELATED_ARTICLES_COUNT + 1])
+    cache.set(_related_key(category_id), ids, getattr(settings, 'RELATED_ARTICLES_CACHE_TIMEOUT', 24 * 60 * 60))
+    return ids
+
+
+def get_related_article_ids(page):
+    ids = cache.get(_related_key(page.category_id))
+    if ids is None:
+        ids = rebuild_related_articles(page.category_id)
+    return [pk for pk in ids if pk != page.pk][:RELATED_ARTICLES_COUNT]
+
+
+def get_related_articles(page):
+    """Карточки похожих статей: один запрос страниц (с картинками) и один — их рендишенов."""
+    from .models import BlogPage
+
+    ids = get_related_article_ids(page)
+    if not ids:
+        return []
+    articles = prefetch_card_images(BlogPage.objects.live().filter(pk__in=ids), RELATED_IMAGE_FILTERS).in_bulk()
+    return [articles[pk] for pk in ids if pk in articles]
+
+
+def remember_previous_category(sender, instance, update_fields=None, **kwargs):
+    """pre_save: запоминает категорию статьи в базе — при публикации она могла смениться."""
+    if instance.pk is None or (update_fields is not None and 'category' not in update_fields):
+        return
+    instance._related_previous_category_id = (
+        sender.objects.filter(pk=instance.pk).values_list('category_id', flat=True).first()
+    )
+
+
+def rebuild_for_article(sender, instance, **kwargs):
+    """Обработчик публикации, снятия с публикации и удаления статьи."""
+    category_ids = {instance.category_id, getattr(instance, '_related_previous_category_id', None)}
+    for category_id in category_ids - {None}:
+        rebuild_related_articles(category_id)
+    rebuild_related_articles()
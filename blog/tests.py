@@ -1,3 +1,208 @@
-from django.test import TestCase
+import datetime
+import io
+import tempfile
 
-# Create your tests here.
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from wagtail.images import get_image_model
+from wagtail.images.tests.utils import get_test_image_file
+from wagtail.models import Site
+
+from blog.models import BlogIndexPage, BlogPage, Category
+
+
+class BlogIndexListingTests(TestCase):
+    """
+    Tests for keyset pagination and HTMX "load more" on the blog index.
+    """
+
+    def setUp(self):
+        cache.clear()
+        root = Site.objects.get(is_default_site=True).root_page
+        self.index = root.add_child(instance=BlogIndexPage(title="Блог", slug="blog", listing_page_size=2))
+        self.category = Category.objects.create(title="Практики", section=1)
+        self.articles = []
+        # Две статьи с одной датой — порядок между ними решает id
+        for i, day in enumerate([1, 2, 2, 3, 4]):
+            self.articles.append(self.index.add_child(instance=BlogPage(
+                title=f"Статья {i}", slug=f"article-{i}", date=datetime.date(2025, 1, day),
+                category=self.category if i % 2 == 0 else None,
+            )))
+
+    def test_first_page_renders_only_first_batch(self):
+        response = self.client.get(self.index.url)
+        self.assertEqual([a.title for a in response.context['articles']], ["Статья 4", "Статья 3"])
+        self.assertNotContains(response, "Статья 2")
+        self.assertContains(response, "Показать ещё")
+        self.assertEqual(response.context['total_count'], 5)
+
+    def test_htmx_request_walks_all_pages_once(self):
+        seen, cursor = [], None
+        response = self.client.get(self.index.url)
+        self.assertIn('HX-Request', response['Vary'])
+        seen += [a.pk for a in response.context['articles']]
+        cursor = response.context['next_cursor']
+        while cursor:
+            response = self.client.get(self.index.url, {'cursor': cursor}, HTTP_HX_REQUEST='true')
+            self.assertTemplateUsed(response, 'blog/blog_index_items.html')
+            self.assertTemplateNotUsed(response, 'blog/blog_index_page.html')
+            self.assertIn('HX-Request', response['Vary'])
+            seen += [a.pk for a in response.context['articles']]
+            cursor = response.context['next_cursor']
+        self.assertEqual(seen, [a.pk for a in sorted(self.articles, key=lambda a: (a.date, a.pk), reverse=True)])
+
+    def test_category_filter_is_kept(self):
+        response = self.client.get(self.index.url, {'category': self.category.pk})
+        self.assertEqual([a.title for a in response.context['articles']], ["Статья 4", "Статья 2"])
+        self.assertContains(response, f"category={self.category.pk}&amp;cursor=")
+
+        response = self.client.get(
+            self.index.url, {'category': self.category.pk, 'cursor': response.context['next_cursor']},
+            HTTP_HX_REQUEST='true',
+        )
+        self.assertEqual([a.title for a in response.context['articles']], ["Статья 0"])
+        self.assertIsNone(response.context['next_cursor'])
+
+
+class CategoryFacetTests(TestCase):
+    """
+    Tests for cached, live-only category counts on content index pages.
+    """
+
+    def setUp(self):
+        cache.clear()
+        root = Site.objects.get(is_default_site=True).root_page
+        self.index = root.add_child(instance=BlogIndexPage(title="Блог", slug="blog"))
+        self.category = Category.objects.create(title="Практики", section=1)
+        Category.objects.create(title="Пустая", section=1)
+        self.live = self.index.add_child(instance=BlogPage(
+            title="Опубликована", slug="live", date=datetime.date(2025, 1, 1), category=self.category
+        ))
+        self.draft = self.index.add_child(instance=BlogPage(
+            title="Черновик", slug="draft", date=datetime.date(2025, 1, 2), category=self.category, live=False
+        ))
+
+    def get_counts(self):
+        response = self.client.get(self.index.url)
+        counts = {cat['title']: cat['item_count'] for cat in response.context['categories']}
+        return response.context['total_count'], counts
+
+    def test_drafts_are_not_counted(self):
+        self.assertEqual(self.get_counts(), (1, {"Практики": 1, "Пустая": 0}))
+
+    def test_counts_cached_until_publish_or_unpublish(self):
+        self.get_counts()
+        BlogPage.objects.filter(pk=self.draft.pk).update(live=True)  # без сигналов — кеш не сброшен
+        self.assertEqual(self.get_counts()[0], 1)
+
+        BlogPage.objects.filter(pk=self.draft.pk).update(live=False)
+        self.draft.refresh_from_db()
+        self.draft.save_revision().publish()
+        self.assertEqual(self.get_counts(), (2, {"Практики": 2, "Пустая": 0}))
+
+        self.live.unpublish()
+        self.assertEqual(self.get_counts()[0], 1)
+
+        self.draft.delete()
+        self.assertEqual(self.get_counts()[0], 0)
+
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp())
+class ListingRenditionPrefetchTests(TestCase):
+    """
+    Tests that index cards get their renditions in a fixed number of queries.
+    """
+
+    def setUp(self):
+        cache.clear()
+        root = Site.objects.get(is_default_site=True).root_page
+        self.index = root.add_child(instance=BlogIndexPage(title="Блог", slug="blog"))
+        for i in range(6):
+            image = get_image_model().objects.create(title=f"Картинка {i}", file=get_test_image_file())
+            image.get_renditions(*BlogIndexPage.listing_image_filters)  # как после прогрева
+            self.index.add_child(instance=BlogPage(
+                title=f"Статья {i}", slug=f"article-{i}", date=datetime.date(2025, 1, i + 1), main_image=image
+            ))
+
+    def count_listing_queries(self, page_size):
+        BlogIndexPage.objects.filter(pk=self.index.pk).update(listing_page_size=page_size)
+        self.client.get(self.index.url)  # кеш сайта, счётчиков и т.п.
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.index.url)
+        self.assertContains(response, 'fill-600x400', count=page_size)
+        return len(queries)
+
+    def test_query_count_does_not_depend_on_card_count(self):
+        self.assertEqual(self.count_listing_queries(2), self.count_listing_queries(6))
+
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp())
+class RelatedArticlesTests(TestCase):
+    """
+    Tests for cached related-article lists on the blog article page.
+    """
+
+    def setUp(self):
+        cache.clear()
+        root = Site.objects.get(is_default_site=True).root_page
+        self.index = root.add_child(instance=BlogIndexPage(title="Блог", slug="blog"))
+        self.practice = Category.objects.create(title="Практики", section=1)
+        self.theory = Category.objects.create(title="Теория", section=1)
+        self.articles = []
+        for i in range(6):
+            image = get_image_model().objects.create(title=f"Картинка {i}", file=get_test_image_file())
+            image.get_renditions('fill-300x200')
+            self.articles.append(self.index.add_child(instance=BlogPage(
+                title=f"Статья {i}", slug=f"article-{i}", date=datetime.date(2025, 1, i + 1),
+                category=self.practice, main_image=image,
+            )))
+
+    def related_titles(self, article):
+        response = self.client.get(article.url)
+        return [a.title for a in response.context['related_articles']]
+
+    def test_same_category_newest_first_without_self(self):
+        self.assertEqual(self.related_titles(self.articles[5]), ["Статья 4", "Статья 3", "Статья 2", "Статья 1"])
+        self.assertEqual(self.related_titles(self.articles[0]), ["Статья 5", "Статья 4", "Статья 3", "Статья 2"])
+
+    def test_cards_load_in_fixed_queries(self):
+        self.client.get(self.articles[0].url)  # кеш сайта и списка
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.articles[0].url)
+        self.assertContains(response, 'fill-300x200', count=4)
+        related = [q['sql'] for q in queries if 'blog_blogpage' in q['sql']]
+        renditions = [q['sql'] for q in queries if 'wagtailimages_rendition' in q['sql']]
+        # Сама статья (specific) и карточки; рендишены — одним запросом
+        self.assertEqual(len(related), 2)
+        self.assertEqual(len(renditions), 1)
+
+    def test_lists_follow_publish_unpublish_and_category_change(self):
+        self.assertIn("Статья 5", self.related_titles(self.articles[0]))
+
+        self.articles[5].unpublish()
+        self.assertEqual(self.related_titles(self.articles[0]), ["Статья 4", "Статья 3", "Статья 2", "Статья 1"])
+
+        self.articles[4].category = self.theory
+        self.articles[4].save_revision().publish()
+        self.assertEqual(self.related_titles(self.articles[0]), ["Статья 3", "Статья 2", "Статья 1"])
+
+        article = BlogPage.objects.get(pk=self.articles[1].pk)
+        article.category = self.theory
+        article.save_revision().publish()
+        self.assertEqual(self.related_titles(self.articles[0]), ["Статья 3", "Статья 2"])
+        self.assertEqual(self.related_titles(self.articles[4]), ["Статья 1"])
+
+    def test_rebuild_command(self):
+        self.assertNotIn("Статья 1", self.related_titles(self.articles[0]))
+        # Правка мимо сигналов: статья 1 становится самой новой
+        BlogPage.objects.filter(pk=self.articles[1].pk).update(date=datetime.date(2025, 2, 1))
+        self.assertNotIn("Статья 1", self.related_titles(self.articles[0]))
+
+        err = io.StringIO()
+        call_command('rebuild_related_articles', stdout=io.StringIO(), stderr=err)
+        # В тестах кеш локальный — команда предупреждает, что веб-процессы пересчёт не увидят
+        self.assertIn("не общий для процессов", err.getvalue())
+        self.assertEqual(self.related_titles(self.articles[0]), ["Статья 1", "Статья 5", "Статья 4", "Статья 3"])
@@ -0,0 +1,95 @@
+"""
+Табличный редактор каналов в админке Wagtail: выгрузка XLSX/CSV, загрузка
+отредактированной таблицы, предпросмотр изменений и их применение.
+"""
+import tempfile
+import uuid
+
+from django.contrib import messages
+from django.core.cache import cache
+from django.core.exceptions import PermissionDenied
+from django.http import FileResponse, StreamingHttpResponse
+from django.shortcuts import redirect
+from django.template.response import TemplateResponse
+from django.urls import reverse
+from django.views.decorators.http import require_POST
+
+from .forms import ChannelSpreadsheetForm
+from .spreadsheet import SpreadsheetError, apply_diff, compute_diff, has_changes, iter_csv, read_spreadsheet, write_xlsx
+
+# Сколько разобранная таблица ждёт подтверждения
+PREVIEW_TIMEOUT = 60 * 60
+PREVIEW_KEY = 'channels:spreadsheet:{}:{}'
+
+
+def _check_permission(request):
+    if not request.user.has_perms(['channels.change_channelgroup', 'channels.change_fchannel']):
+        raise PermissionDenied
+
+
+def export_spreadsheet(request):
+    _check_permission(request)
+    if request.GET.get('format') == 'csv':
+        response = StreamingHttpResponse(iter_csv(), content_type='text/csv; charset=utf-8')
+        response['Content-Disposition'] = 'attachment; filename="channels.csv"'
+        return response
+
+    # Книга собирается во временном файле и отдаётся потоком, а не из памяти
+    workbook_file = tempfile.TemporaryFile()
+    write_xlsx(workbook_file)
+    workbook_file.seek(0)
+    return FileResponse(
+        workbook_file,
+        as_attachment=True,
+        filename='channels.xlsx',
+        content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+    )
+
+
+def import_spreadsheet(request):
+    """GET — форма загрузки, POST — разбор файла и предпросмотр изменений."""
+    _check_permission(request)
+    context = {'form': ChannelSpreadsheetForm()}
+
+    if request.method == 'POST':
+        form = ChannelSpreadsheetForm(request.POST, request.FILES)
+        context['form'] = form
+        if form.is_valid():
+            try:
+                group_rows, channel_rows = read_spreadsheet(form.cleaned_data['file'])
+            except SpreadsheetError as e:
+                form.add_error('file', str(e))
+            else:
+                diff = compute_diff(group_rows, channel_rows)
+                token = uuid.uuid4().hex
+                # До подтверждения храним строки таблицы, а не diff: при применении он считается заново
+                cache.set(PREVIEW_KEY.format(request.user.pk, token), (group_rows, channel_rows), PREVIEW_TIMEOUT)
+                context.update({'diff': diff, 'token': token, 'has_changes': has_changes(diff)})
+
+    return TemplateResponse(request, 'channels/admin/spreadsheet_import.html', context)
+
+
+@require_POST
+def apply_spreadsheet(request):
+    _check_permission(request)
+    key = PREVIEW_KEY.format(request.user.pk, request.POST.get('token', ''))
+    rows = cache.get(key)
+    if rows is None:
+        messages.error(request, "Предпросмотр устарел — загрузите таблицу ещё раз")
+        return redirect('channels_spreadsheet_import')
+
+    diff = compute_diff(*rows)
+    try:
+        counts = apply_diff(diff)
+    except SpreadsheetError as e:
+        messages.error(request, str(e))
+        return redirect('channels_spreadsheet_import')
+
+    cache.delete(key)
+    messages.success(
+        request,
+        f"Группы: создано {counts['groups_create']}, изменено {counts['groups_update']}. "
+        f"Каналы: создано {counts['channels_create']}, изменено {counts['channels_update']}, "
+        f"удалено {counts['channels_delete']}",
+    )
+    return redirect(reverse('channels_spreadsheet_import'))
@@ -3,3 +3,37 @@ from django.apps import AppConfig
 
 class ChannelsConfig(AppConfig):
     name = 'channels'
+
+    def ready(self):
+        from django.db.models.signals import post_delete, post_save
+        from wagtail.documents import get_document_model
+        from wagtail.images import get_image_model
+        from wagtail.models import Page
+        from wagtail.signals import page_published, page_unpublished, post_page_move
+
+        from .cache import bump_channels_version, bump_for_group_image
+        from .models import ChannelGroup, ChannelType, FChannel, UserSavedChannel
+        from .rendering import refresh_for_document, refresh_for_image, refresh_for_page
+        from .saved import invalidate_for_saved_channel
+
+        # Любое изменение каналов меняет версию — закешированное по старой версии больше не используется
+        for model in (ChannelGroup, FChannel, ChannelType):
+            post_save.connect(bump_channels_version, sender=model, dispatch_uid=f'channels_version_save_{model.__name__}')
+            post_delete.connect(bump_channels_version, sender=model, dispatch_uid=f'channels_version_delete_{model.__name__}')
+        # Значки групп: правка картинки проверяется, удаление сбрасывает кеш сразу (ссылку уже обнулил SET_NULL)
+        post_save.connect(bump_for_group_image, sender=get_image_model(), dispatch_uid='channels_version_image_save')
+        post_delete.connect(bump_channels_version, sender=get_image_model(), dispatch_uid='channels_version_image_delete')
+
+        # Готовый HTML каналов зависит от URL страниц и документов и от картинок, на которые он ссылается.
+        # URL страницы меняют только публикация, снятие с публикации, перенос и удаление — черновики не трогаем
+        page_published.connect(refresh_for_page, dispatch_uid='channels_html_page_publish')
+        post_delete.connect(refresh_for_page, sender=Page, dispatch_uid='channels_html_page_delete')
+        page_unpublished.connect(refresh_for_page, dispatch_uid='channels_html_page_unpublish')
+        post_page_move.connect(refresh_for_page, dispatch_uid='channels_html_page_move')
+        for model, handler in ((get_document_model(), refresh_for_document), (get_image_model(), refresh_for_image)):
+            post_save.connect(handler, sender=model, dispatch_uid=f'channels_html_save_{model.__name__}')
+            post_delete.connect(handler, sender=model, dispatch_uid=f'channels_html_delete_{model.__name__}')
+
+        # Набор избранных каналов пользователя — в т.ч. при каскадном удалении канала
+        post_save.connect(invalidate_for_saved_channel, sender=UserSavedChannel, dispatch_uid='channels_saved_save')
+        post_delete.connect(invalidate_for_saved_channel, sender=UserSavedChannel, dispatch_uid='channels_saved_delete')
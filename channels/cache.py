@@ -0,0 +1,71 @@
+"""
+Версия данных каналов и кеш отрендеренных разделов.
+
+Версия меняется при любом изменении групп, каналов, типов и значков групп.
+Она входит в URL содержимого каналов и таблиц групп (?v=...), поэтому эти
+ответы можно кешировать в браузере надолго, и в ключи кеша аккордеона раздела
+и таблиц групп — после правки сниппета они рендерятся заново.
+"""
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import BooleanField, ExpressionWrapper, Q
+from django.template.loader import render_to_string
+from django.utils.safestring import mark_safe
+
+CHANNELS_VERSION_KEY = 'channels:version'
+
+
+def get_channels_version():
+    return cache.get_or_set(CHANNELS_VERSION_KEY, time.time_ns, timeout=None)
+
+
+def bump_channels_version(**kwargs):
+    """Инвалидирует всё, что закешировано по версии каналов (годится как обработчик сигналов)."""
+    cache.set(CHANNELS_VERSION_KEY, time.time_ns(), timeout=None)
+
+
+def bump_for_group_image(sender, instance, **kwargs):
+    """Смена картинки, которая служит значком группы, меняет HTML раздела."""
+    from .models import ChannelGroup
+
+    if ChannelGroup.objects.filter(image_id=instance.pk).exists():
+        bump_channels_version()
+
+
+def render_section_groups(section_type):
+    """
+    HTML аккордеона групп раздела — из кеша, пока версия каналов не сменилась.
+    Только заголовки групп: таблица каналов подгружается при раскрытии группы (render_group_channels).
+    """
+    from .models import ChannelGroup
+
+    version = get_channels_version()
+    key = f'channels:section:{section_type}:{version}'
+    html = cache.get(key)
+    if html is None:
+        groups = ChannelGroup.objects.filter(section=section_type).select_related('image').order_by('sort_order')
+        html = render_to_string('channels/section_groups.html', {'groups': groups, 'channels_version': version})
+        cache.set(key, html, getattr(settings, 'CHANNEL_SECTION_CACHE_TIMEOUT', 24 * 60 * 60))
+    return mark_safe(html)
+
+
+def render_group_channels(group_id):
+    """HTML таблицы каналов группы — из кеша, пока версия каналов не сменилась; None, если группы нет."""
+    from .models import ChannelGroup, FChannel
+
+    version = get_channels_version()
+    key = f'channels:group:{group_id}:{version}'
+    html = cache.get(key)
+    if html is None:
+        group = ChannelGroup.objects.filter(pk=group_id).only('pk').first()
+        if group is None:
+            return None
+        # Полный текст каналов не грузим — его подтягивает страница по запросу (channels:channel_content)
+        channels = FChannel.objects.filter(group=group).only('pk', 'name', 'description').annotate(
+            has_content=ExpressionWrapper(~Q(content=''), output_field=BooleanField())
+        )
+        html = render_to_string('channels/group_channels.html', {'group': group, 'channels': channels})
+        cache.set(key, html, getattr(settings, 'CHANNEL_SECTION_CACHE_TIMEOUT', 24 * 60 * 60))
+    return mark_safe(html)
@@ -0,0 +1,14 @@
+from django import forms
+
+
+class ChannelSpreadsheetForm(forms.Form):
+    file = forms.FileField(
+        label="Таблица каналов",
+        help_text="XLSX (листы groups и channels) или CSV (только каналы), выгруженные отсюда же",
+    )
+
+    def clean_file(self):
+        uploaded = self.cleaned_data['file']
+        if not uploaded.name.lower().endswith(('.xlsx', '.csv')):
+            raise forms.ValidationError("Поддерживаются файлы .xlsx и .csv")
+        return uploaded
@@ -1,46 +1,172 @@
 import json
-from django.core.management.base import BaseCommand
+import time
+
+from django.core.management.base import BaseCommand, CommandError
 from django.db import transaction
-from channels.models import FChannel, ChannelGroup
+from channels.cache import bump_channels_version
+from channels.models import FChannel, ChannelGroup, index_bulk_written_channels
+from channels.rendering import render_channel_content
+
+# Поля, которые импорт обновляет у уже существующего канала
+UPDATE_FIELDS = ['description', 'content']
+
+READ_CHUNK_SIZE = 64 * 1024
+JSON_WHITESPACE = ' \t\r\n'
+
+
+def iter_json_array(f, chunk_size=READ_CHUNK_SIZE):
+    """Отдаёт элементы JSON-массива верхнего уровня по одному, не загружая файл целиком."""
+    decoder = json.JSONDecoder()
+    buffer, pos = '', 0
+    started = eof = False
+
+    while True:
+        # Между элементами пропускаем пробелы и запятые
+        skip = JSON_WHITESPACE + ',' if started else JSON_WHITESPACE
+        while pos < len(buffer) and buffer[pos] in skip:
+            pos += 1
+
+        end = None
+        if pos < len(buffer):
+            if not started:
+                if buffer[pos] != '[':
+                    raise ValueError('Ожидался JSON-массив записей')
+                started = True
+                pos += 1
+                continue
+            if buffer[pos] == ']':
+                return
+            try:
+                item, end = decoder.raw_decode(buffer, pos)
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+            if end is not None and (end < len(buffer) or eof):
+                yield item
+                pos = end
+                continue
+
+        # Данные кончились или запись оборвалась на границе куска — дочитываем
+        if eof:
+            raise ValueError('Неожиданный конец файла: массив не закрыт')
+        chunk = f.read(chunk_size)
+        eof = not chunk
+        buffer, pos = buffer[pos:] + chunk, 0
+
+
+def clean_content(raw_content):
+    """Чистый текст → абзацы <p> (как хранит RichTextField)."""
+    paragraphs = [p.strip() for p in (raw_content or '').strip().split('\n') if p.strip()]
+    return ''.join(f'<p>{p}</p>' for p in paragraphs)
+
 
 class Command(BaseCommand):
-    help = 'Импорт каналов из старой таблицы alsfera_canal в FChannel'
+    help = (
+        'Импорт каналов из старой таблицы alsfera_canal в FChannel. '
+        'Повторный запуск обновляет каналы по ключу (группа, порядковый номер, название), а не дублирует их'
+    )
 
     def add_arguments(self, parser):
         parser.add_argument('json_file', type=str, help='Путь к JSON-файлу с данными')
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help='Сколько записей обрабатывать за один запрос к БД'
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Только показать, что изменится, ничего не записывая'
+        )
 
-    @transaction.atomic
     def handle(self, *args, **options):
-        json_file = options['json_file']
+        started = time.perf_counter()
+        self.verbosity = options['verbosity']
+        # Все группы — одним запросом
+        self.group_ids = set(ChannelGroup.objects.values_list('id', flat=True))
+        self.stats = {'created': 0, 'updated': 0, 'unchanged': 0, 'skipped': 0}
+        total = 0
 
         try:
-            with open(json_file, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-        except Exception as e:
-            self.stderr.write(self.style.ERROR(f'Ошибка чтения JSON: {e}'))
-            return
+            with open(options['json_file'], 'r', encoding='utf-8') as f, transaction.atomic():
+                batch = []
+                for item in iter_json_array(f):
+                    batch.append(item)
+                    total += 1
+                    if len(batch) >= options['batch_size']:
+                        self.import_batch(batch)
+                        batch = []
+                if batch:
+                    self.import_batch(batch)
+
+                if options['dry_run']:
+                    transaction.set_rollback(True)
+                elif self.stats['created'] or self.stats['updated']:
+                    bump_channels_version()  # bulk-запись не шлёт сигналов
+        except (OSError, ValueError) as e:
+            raise CommandError(f'Ошибка чтения JSON: {e}')
 
-        created = 0
+        elapsed = time.perf_counter() - started
+        prefix = 'Пробный запуск, ничего не записано. ' if options['dry_run'] else ''
+        self.stdout.write(self.style.SUCCESS(
+            f"{prefix}Записей: {total}. Создано: {self.stats['created']}, обновлено: {self.stats['updated']}, "
+            f"без изменений: {self.stats['unchanged']}, пропущено: {self.stats['skipped']}"
+        ))
+        self.stdout.write(f'Время: {elapsed:.2f} с ({total / elapsed if elapsed else total:.0f} записей/с)')
 
-        for item in data:
+    def import_batch(self, items):
+        # Последняя запись с тем же ключом побеждает
+        incoming = {}
+        for item in items:
             group_id = item.get('group_id')
-            group = ChannelGroup.objects.get(id=group_id)
-
-            # Обработка content: чистый текст → оборачиваем в <p>
-            raw_content = item.get('content', '').strip()
-            if raw_content:
-                paragraphs = [p.strip() for p in raw_content.split('\n') if p.strip()]
-                clean_content = ''.join(f'<p>{p}</p>' for p in paragraphs)
-            else:
-                clean_content = ''
-
-            FChannel.objects.create(
-                group=group,
-                sort_order=item.get('sort_order', 0),
-                name=item['name'],
-                description=item.get('description', ''),
-                content=clean_content
-            )
-            created += 1
-
-        self.stdout.write(self.style.SUCCESS(f'Импортировано: {created} каналов'))
\ No newline at end of file
+            if group_id not in self.group_ids:
+                self.stats['skipped'] += 1
+                self.stderr.write(self.style.WARNING(f"Нет группы {group_id} для канала «{item.get('name')}»"))
+                continue
+            key = (group_id, item.get('sort_order', 0), item['name'])
+            incoming[key] = {
+                'description': item.get('description', ''),
+                'content': clean_content(item.get('content', '')),
+            }
+
+        existing = {
+            (channel.group_id, channel.sort_order, channel.name): channel
+            for channel in FChannel.objects.filter(
+                group_id__in={key[0] for key in incoming},
+                name__in={key[2] for key in incoming},
+            ).only('id', 'group_id', 'sort_order', 'name', *UPDATE_FIELDS)
+        }
+
+        to_create, to_update = [], []
+        for key, values in incoming.items():
+            channel = existing.get(key)
+            if channel is None:
+                group_id, sort_order, name = key
+                to_create.append(FChannel(
+                    group_id=group_id, sort_order=sort_order, name=name,
+                    content_html=render_channel_content(values['content']), **values
+                ))
+                continue
+
+            changed = [field for field in UPDATE_FIELDS if getattr(channel, field) != values[field]]
+            if not changed:
+                self.stats['unchanged'] += 1
+                continue
+            for field in changed:
+                setattr(channel, field, values[field])
+            channel.content_html = render_channel_content(channel.content)
+            to_update.append(channel)
+            if self.verbosity >= 2:
+                self.stdout.write(f"  ~ {channel.name}: {', '.join(changed)}")
+
+        if self.verbosity >= 2:
+            for channel in to_create:
+                self.stdout.write(f'  + {channel.name}')
+
+        FChannel.objects.bulk_create(to_create)
+        FChannel.objects.bulk_update(to_update, UPDATE_FIELDS + ['content_html'])
+
+        index_bulk_written_channels(to_create, to_update)
+        self.stats['created'] += len(to_create)
+        self.stats['updated'] += len(to_update)
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from channels.rendering import REBUILD_BATCH_SIZE, rebuild_all_channel_html
+
+
+class Command(BaseCommand):
+    help = "Пересобирает готовый HTML текста всех каналов (FChannel.content_html)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=REBUILD_BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        changed = rebuild_all_channel_html(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f"Обновлено каналов: {changed}"))
@@ -0,0 +1,32 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from base.cache import check_shared_cache
+from channels.cache import render_group_channels, render_section_groups
+from channels.models import ChannelGroup
+
+
+class Command(BaseCommand):
+    help = (
+        "Заранее рендерит аккордеоны разделов и таблицы каналов групп в общий кеш (запускать после деплоя). "
+        "Имеет смысл только с кешем, общим для процессов (Redis из настроек base.py)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--require-shared-cache',
+            action='store_true',
+            help='Ошибка вместо предупреждения, если кеш не общий для процессов (для запуска при деплое)'
+        )
+
+    def handle(self, *args, **options):
+        check_shared_cache(self, "прогрев не дойдёт до веб-сервера", required=options['require_shared_cache'])
+        for section_type, label in ChannelGroup.SECTION_CHOICES:
+            started = time.perf_counter()
+            html = render_section_groups(section_type)
+            group_ids = ChannelGroup.objects.filter(section=section_type).values_list('pk', flat=True)
+            size = len(html) + sum(len(render_group_channels(pk) or '') for pk in group_ids)
+            elapsed = (time.perf_counter() - started) * 1000
+            self.stdout.write(f"{label}: {len(group_ids)} групп, {size // 1024} КБ, {elapsed:.0f} мс")
+        self.stdout.write(self.style.SUCCESS("Кеш разделов прогрет"))
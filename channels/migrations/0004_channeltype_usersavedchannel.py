@@ -0,0 +1,55 @@
+# Generated by Django 6.0.1 on 2026-10-18 13:22
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('channels', '0003_remove_channelgroup_old_katg'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ChannelType',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=200, verbose_name='Название типа канала')),
+                ('sort_order', models.IntegerField(default=0, verbose_name='Порядковый номер (для сортировки)')),
+            ],
+            options={
+                'verbose_name': 'Тип канала',
+                'verbose_name_plural': 'Типы каналов',
+                'ordering': ['sort_order', 'name'],
+            },
+        ),
+        migrations.AlterModelOptions(
+            name='fchannel',
+            options={'ordering': ['sort_order'], 'verbose_name': 'Канал / Частота', 'verbose_name_plural': 'Каналы / Частоты'},
+        ),
+        migrations.AddField(
+            model_name='fchannel',
+            name='chtype',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='channels.channeltype', verbose_name='Тип канала'),
+        ),
+        migrations.CreateModel(
+            name='UserSavedChannel',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('notes', models.TextField(blank=True, verbose_name='Заметки пользователя')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Добавлено')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Обновлено')),
+                ('channel', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='saved_by_users', to='channels.fchannel', verbose_name='Канал')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='saved_channels', to=settings.AUTH_USER_MODEL, verbose_name='Пользователь')),
+            ],
+            options={
+                'verbose_name': 'Сохранённый канал',
+                'verbose_name_plural': 'Сохранённые каналы',
+                'ordering': ['-created_at'],
+                'unique_together': {('user', 'channel')},
+            },
+        ),
+    ]
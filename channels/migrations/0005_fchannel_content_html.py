@@ -0,0 +1,18 @@
+# Generated by Django 6.0.1 on 2026-10-18 13:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('channels', '0004_channeltype_usersavedchannel'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='fchannel',
+            name='content_html',
+            field=models.TextField(blank=True, editable=False),
+        ),
+    ]
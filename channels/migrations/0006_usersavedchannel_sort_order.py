@@ -0,0 +1,22 @@
+# Generated by Django 6.0.1 on 2026-10-18 13:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('channels', '0005_fchannel_content_html'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='usersavedchannel',
+            options={'ordering': ['sort_order', '-created_at'], 'verbose_name': 'Сохранённый канал', 'verbose_name_plural': 'Сохранённые каналы'},
+        ),
+        migrations.AddField(
+            model_name='usersavedchannel',
+            name='sort_order',
+            field=models.PositiveIntegerField(default=0, verbose_name='Порядок в списке пользователя'),
+        ),
+    ]
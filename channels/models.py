@@ -6,6 +6,10 @@ from modelcluster.models import ClusterableModel
 from wagtail.admin.panels import FieldPanel, InlinePanel
 from wagtail.snippets.models import register_snippet
 from wagtail.fields import RichTextField
+from wagtail.search import index
+from wagtail.search.queryset import SearchableQuerySetMixin
+
+from .rendering import render_channel_content
 
 User = get_user_model()
 
@@ -52,6 +56,9 @@ class ChannelGroup(ClusterableModel):
     )
     sort_order = models.IntegerField(default=0, verbose_name="Порядковый номер группы")
 
+    # Значок группы в аккордеоне раздела (base/renditions.py)
+    rendition_filters = {'image': ('fill-120x120',)}
+
     panels = [
         FieldPanel('title'),
         FieldPanel('description'),
@@ -68,7 +75,28 @@ class ChannelGroup(ClusterableModel):
         ordering = ['sort_order', 'title']
 
 
-class FChannel(models.Model):
+class FChannelQuerySet(SearchableQuerySetMixin, models.QuerySet):
+    pass
+
+
+def index_bulk_written_channels(created, updated):
+    """
+    bulk_create/bulk_update не шлют сигналов — поисковый индекс обновляем сами.
+    MySQL не возвращает id из bulk_create, поэтому новые каналы перечитываем по ключу.
+    """
+    if created:
+        keys = {(channel.group_id, channel.sort_order, channel.name) for channel in created}
+        created = [
+            channel for channel in FChannel.objects.filter(
+                group_id__in={key[0] for key in keys},
+                name__in={key[2] for key in keys},
+            ) if (channel.group_id, channel.sort_order, channel.name) in keys
+        ]
+    for channel in [*created, *updated]:
+        index.insert_or_update_object(channel)
+
+
+class FChannel(index.Indexed, models.Model):
     group = ParentalKey(
         'channels.ChannelGroup',
         on_delete=models.CASCADE,
@@ -78,6 +106,8 @@ class FChannel(models.Model):
     name = models.CharField(max_length=200, verbose_name="Название канала / частоты")
     description = models.TextField(blank=True, verbose_name="Короткое описание (для таблицы)")
     content = RichTextField(blank=True, verbose_name="Полное содержание (раскрываемый текст)")
+    # Готовый HTML content: ссылки на страницы/документы уже развёрнуты (см. channels/rendering.py)
+    content_html = models.TextField(blank=True, editable=False)
 
     # === НОВОЕ ПОЛЕ: тип канала ===
     chtype = models.ForeignKey(
@@ -89,6 +119,18 @@ class FChannel(models.Model):
         verbose_name="Тип канала"
     )
 
+    objects = FChannelQuerySet.as_manager()
+
+    # Поисковый индекс Wagtail: обновляется при сохранении канала (в т.ч. через сниппет группы)
+    search_fields = [
+        index.SearchField('name', boost=3),
+        index.AutocompleteField('name'),
+        index.SearchField('description', boost=2),
+        index.SearchField('content'),
+        index.FilterField('chtype'),
+        index.FilterField('group'),
+    ]
+
     panels = [
         FieldPanel('sort_order'),
         FieldPanel('name'),
@@ -100,6 +142,14 @@ class FChannel(models.Model):
     def __str__(self):
         return self.name
 
+    def save(self, *args, **kwargs):
+        # Каналы сохраняются и при сохранении сниппета группы — HTML пересчитывается здесь
+        self.content_html = render_channel_content(self.content)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'content' in update_fields:
+            kwargs['update_fields'] = {*update_fields, 'content_html'}
+        super().save(*args, **kwargs)
+
     class Meta:
         ordering = ['sort_order']
         verbose_name = "Канал / Частота"
@@ -123,13 +173,14 @@ class UserSavedChannel(models.Model):
         verbose_name="Канал"
     )
     notes = models.TextField(blank=True, verbose_name="Заметки пользователя")
+    sort_order = models.PositiveIntegerField(default=0, verbose_name="Порядок в списке пользователя")
     created_at = models.DateTimeField(auto_now_add=True, verbose_name="Добавлено")
     updated_at = models.DateTimeField(auto_now=True, verbose_name="Обновлено")
 
     class Meta:
         verbose_name = "Сохранённый канал"
         verbose_name_plural = "Сохранённые каналы"
-        ordering = ['-created_at']
+        ordering = ['sort_order', '-created_at']
         unique_together = ['user', 'channel']  # Один канал - одна запись на пользователя
 
     def __str__(self):
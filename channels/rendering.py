@@ -0,0 +1,75 @@
+"""
+Готовый HTML текста каналов.
+
+Фильтр richtext на каждом рендере разбирает HTML и разворачивает ссылки
+на страницы, документы и картинки. Текст каналов меняется редко, поэтому
+результат хранится в FChannel.content_html: пересчитывается при сохранении
+канала (в т.ч. через сниппет группы) и когда меняется страница, документ
+или изображение, на которые текст ссылается (у страницы — только при
+публикации, снятии с публикации, переносе и удалении: правки черновика URL
+не меняют). Полная пересборка —
+python manage.py rebuild_channel_html.
+"""
+from django.db.models import Q
+from wagtail.templatetags.wagtailcore_tags import richtext
+
+REBUILD_BATCH_SIZE = 200
+
+
+def render_channel_content(content):
+    return str(richtext(content)) if content else ''
+
+
+def _references(kind, value, pk):
+    # Порядок атрибутов в HTML из редактора не гарантирован
+    return (
+        Q(content__regex=rf'{kind}="{value}"[^>]*\sid="{pk}"')
+        | Q(content__regex=rf'\sid="{pk}"[^>]*{kind}="{value}"')
+    )
+
+
+def refresh_channels_referencing(kind, value, pk):
+    """Пересчитывает HTML каналов, в тексте которых есть ссылка/вставка объекта pk."""
+    from .models import FChannel
+
+    for channel in FChannel.objects.filter(_references(kind, value, pk)):
+        channel.save(update_fields=['content_html'])
+
+
+def refresh_for_page(sender, instance, **kwargs):
+    refresh_channels_referencing('linktype', 'page', instance.pk)
+
+
+def refresh_for_document(sender, instance, **kwargs):
+    refresh_channels_referencing('linktype', 'document', instance.pk)
+
+
+def refresh_for_image(sender, instance, **kwargs):
+    refresh_channels_referencing('embedtype', 'image', instance.pk)
+
+
+def rebuild_all_channel_html(batch_size=REBUILD_BATCH_SIZE):
+    """Пересобирает content_html всех каналов пачками. Возвращает число изменённых каналов."""
+    from .cache import bump_channels_version
+    from .models import FChannel
+
+    changed = 0
+    last_pk = 0
+    while True:
+        batch = list(FChannel.objects.filter(pk__gt=last_pk).order_by('pk').only('pk', 'content', 'content_html')[:batch_size])
+        if not batch:
+            break
+        last_pk = batch[-1].pk
+
+        stale = []
+        for channel in batch:
+            html = render_channel_content(channel.content)
+            if html != channel.content_html:
+                channel.content_html = html
+                stale.append(channel)
+        FChannel.objects.bulk_update(stale, ['content_html'])
+        changed += len(stale)
+
+    if changed:
+        bump_channels_version()  # bulk_update не шлёт сигналов
+    return changed
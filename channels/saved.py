@@ -0,0 +1,125 @@
+"""
+Избранные каналы пользователя (UserSavedChannel).
+
+Набор id сохранённых каналов кешируется по пользователю и сбрасывается при
+любом изменении этого набора. Аккордеон раздела закеширован один на всех,
+поэтому звёздочки в нём отмечаются стилями страницы по этому набору.
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.db.models import Max, Q
+from django.utils import timezone
+
+SAVED_KEY = 'channels:saved:{}'
+
+
+def get_saved_channel_ids(user):
+    """Множество id сохранённых каналов: один поход в кеш за запрос, в БД — только после изменений."""
+    from .models import UserSavedChannel
+
+    if not user.is_authenticated:
+        return frozenset()
+    if not hasattr(user, '_saved_channel_ids'):
+        key = SAVED_KEY.format(user.pk)
+        ids = cache.get(key)
+        if ids is None:
+            ids = frozenset(UserSavedChannel.objects.filter(user=user).values_list('channel_id', flat=True))
+            cache.set(key, ids, getattr(settings, 'CHANNEL_SAVED_CACHE_TIMEOUT', 24 * 60 * 60))
+        user._saved_channel_ids = ids
+    return user._saved_channel_ids
+
+
+def invalidate_saved_channels(user):
+    cache.delete(SAVED_KEY.format(user.pk))
+    try:
+        del user._saved_channel_ids
+    except AttributeError:
+        pass
+
+
+def invalidate_for_saved_channel(sender, instance, **kwargs):
+    """Обработчик post_save/post_delete UserSavedChannel (в т.ч. каскадного удаления)."""
+    cache.delete(SAVED_KEY.format(instance.user_id))
+
+
+def _next_sort_order(user):
+    from .models import UserSavedChannel
+
+    last = UserSavedChannel.objects.filter(user=user).aggregate(last=Max('sort_order'))['last']
+    return 0 if last is None else last + 1
+
+
+def set_channel_saved(user, channel, saved=None):
+    """
+    Сохраняет канал (saved=True), убирает его (False) или переключает (None).
+    Возвращает итоговое состояние.
+    """
+    from .models import UserSavedChannel
+
+    if saved is None:
+        saved = channel.pk not in get_saved_channel_ids(user)
+
+    if saved:
+        try:
+            # Savepoint: повторное сохранение упирается в unique_together, а не в гонку чтения
+            with transaction.atomic():
+                UserSavedChannel.objects.create(user=user, channel=channel, sort_order=_next_sort_order(user))
+        except IntegrityError:
+            pass
+    else:
+        UserSavedChannel.objects.filter(user=user, channel=channel).delete()
+    invalidate_saved_channels(user)
+    return saved
+
+
+def save_channels(user, channel_ids):
+    """Сохраняет сразу несколько каналов (в конец списка). Возвращает число добавленных."""
+    from .models import FChannel, UserSavedChannel
+
+    already = get_saved_channel_ids(user)
+    new_ids = list(
+        FChannel.objects.filter(pk__in=channel_ids).exclude(pk__in=already)
+        .order_by('group__sort_order', 'sort_order').values_list('pk', flat=True)
+    )
+    if not new_ids:
+        return 0
+
+    start = _next_sort_order(user)
+    UserSavedChannel.objects.bulk_create(
+        [UserSavedChannel(user=user, channel_id=pk, sort_order=start + i) for i, pk in enumerate(new_ids)],
+        ignore_conflicts=True,
+    )
+    invalidate_saved_channels(user)  # bulk_create не шлёт сигналов
+    return len(new_ids)
+
+
+def reorder_saved_channels(user, channel_ids):
+    """Порядок списка — как в channel_ids; каналы, которых там нет, уходят в конец."""
+    from .models import UserSavedChannel
+
+    position = {pk: i for i, pk in enumerate(channel_ids)}
+    rows = list(UserSavedChannel.objects.filter(user=user).only('pk', 'channel_id', 'sort_order'))
+    rows.sort(key=lambda row: (position.get(row.channel_id, len(position)), row.sort_order))
+
+    changed = []
+    for i, row in enumerate(rows):
+        if row.sort_order != i:
+            row.sort_order = i
+            changed.append(row)
+    UserSavedChannel.objects.bulk_update(changed, ['sort_order'])
+    return len(changed)
+
+
+def update_saved_notes(user, channel_id, notes):
+    """
+    Заметки к сохранённому каналу. Автосохранение шлёт запрос на каждую паузу
+    в наборе, поэтому неизменённый текст в БД не пишется.
+    Возвращает False, если канал не сохранён у пользователя.
+    """
+    from .models import UserSavedChannel
+
+    rows = UserSavedChannel.objects.filter(user=user, channel_id=channel_id)
+    if rows.filter(~Q(notes=notes)).update(notes=notes, updated_at=timezone.now()):
+        return True
+    return rows.exists()
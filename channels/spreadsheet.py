@@ -0,0 +1,294 @@
+"""
+Выгрузка каналов в таблицу (XLSX/CSV) и загрузка отредактированной таблицы обратно.
+
+Правка большой группы через сниппет пересохраняет все её каналы (InlinePanel
++ modelcluster). Здесь таблица сравнивается с базой построчно, и записываются
+только изменившиеся строки — пачками, в одной транзакции.
+
+XLSX содержит два листа: groups и channels. CSV — только каналы.
+Новая строка — без id; строка канала с отметкой в колонке delete удаляется.
+"""
+import csv
+import io
+
+from django.db import transaction
+from openpyxl import Workbook, load_workbook
+from openpyxl.cell.cell import ILLEGAL_CHARACTERS_RE
+
+from .cache import bump_channels_version
+from .models import ChannelGroup, ChannelType, FChannel, index_bulk_written_channels
+from .rendering import render_channel_content
+
+GROUP_COLUMNS = ['id', 'title', 'description', 'section', 'sort_order']
+CHANNEL_COLUMNS = ['id', 'group_id', 'sort_order', 'name', 'description', 'chtype', 'content', 'delete']
+GROUP_FIELDS = ['title', 'description', 'section', 'sort_order']
+CHANNEL_FIELDS = ['group_id', 'sort_order', 'name', 'description', 'chtype_id', 'content']
+
+BATCH_SIZE = 500
+DELETE_MARKS = {'1', 'x', 'х', 'да', 'yes', 'true', 'удалить', 'delete'}
+
+
+class SpreadsheetError(ValueError):
+    pass
+
+
+def _cell(value):
+    if isinstance(value, str):
+        return ILLEGAL_CHARACTERS_RE.sub('', value)
+    return value
+
+
+def _channel_rows():
+    channels = FChannel.objects.order_by('group__section', 'group__sort_order', 'group_id', 'sort_order', 'pk')
+    for row in channels.values_list(
+        'id', 'group_id', 'sort_order', 'name', 'description', 'chtype__name', 'content'
+    ).iterator(chunk_size=BATCH_SIZE):
+        yield [*row[:5], row[5] or '', row[6], '']
+
+
+def write_xlsx(fileobj):
+    """Пишет книгу в режиме write_only: строки уходят на диск по мере чтения из БД."""
+    workbook = Workbook(write_only=True)
+
+    sheet = workbook.create_sheet('groups')
+    sheet.append(GROUP_COLUMNS)
+    for row in ChannelGroup.objects.order_by('section', 'sort_order', 'pk').values_list(*GROUP_COLUMNS).iterator():
+        sheet.append([_cell(value) for value in row])
+
+    sheet = workbook.create_sheet('channels')
+    sheet.append(CHANNEL_COLUMNS)
+    for row in _channel_rows():
+        sheet.append([_cell(value) for value in row])
+
+    workbook.save(fileobj)
+
+
+def iter_csv():
+    """Строки CSV (только каналы) по одной — для StreamingHttpResponse."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    # BOM — чтобы Excel открыл UTF-8 с кириллицей
+    yield '\ufeff'
+    writer.writerow(CHANNEL_COLUMNS)
+    for row in _channel_rows():
+        writer.writerow(row)
+        if buffer.tell() > 64 * 1024:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
+
+
+def _rows_by_header(rows, columns, sheet_name):
+    """Словари по строкам таблицы; колонки ищутся по заголовку, порядок не важен."""
+    rows = iter(rows)
+    header = [str(value).strip().lower() if value is not None else '' for value in next(rows, [])]
+    missing = [column for column in columns if column not in header and column != 'delete']
+    if missing:
+        raise SpreadsheetError(f"Лист {sheet_name}: нет колонок {', '.join(missing)}")
+
+    positions = {column: header.index(column) for column in columns if column in header}
+    for number, values in enumerate(rows, start=2):
+        values = list(values)
+        if not any(value not in (None, '') for value in values):
+            continue
+        row = {
+            column: values[position] if position < len(values) else None
+            for column, position in positions.items()
+        }
+        row['row'] = number
+        yield row
+
+
+def read_spreadsheet(uploaded_file):
+    """
+    Читает загруженный XLSX или CSV. Возвращает (строки групп, строки каналов) —
+    простые словари, которые можно положить в кеш до подтверждения.
+    """
+    name = uploaded_file.name.lower()
+    try:
+        if name.endswith('.csv'):
+            text = io.TextIOWrapper(uploaded_file.file, encoding='utf-8-sig', newline='')
+            return [], list(_rows_by_header(csv.reader(text), CHANNEL_COLUMNS, 'channels'))
+        if name.endswith('.xlsx'):
+            workbook = load_workbook(uploaded_file, read_only=True, data_only=True)
+            try:
+                groups = []
+                if 'groups' in workbook.sheetnames:
+                    groups = list(_rows_by_header(
+                        workbook['groups'].iter_rows(values_only=True), GROUP_COLUMNS, 'groups'
+                    ))
+                if 'channels' not in workbook.sheetnames:
+                    raise SpreadsheetError('В книге нет листа channels')
+                channels = list(_rows_by_header(
+                    workbook['channels'].iter_rows(values_only=True), CHANNEL_COLUMNS, 'channels'
+                ))
+            finally:
+                workbook.close()
+            return groups, channels
+    except (OSError, UnicodeDecodeError, KeyError, ValueError) as e:
+        if isinstance(e, SpreadsheetError):
+            raise
+        raise SpreadsheetError(f'Не удалось прочитать файл: {e}')
+    raise SpreadsheetError('Поддерживаются файлы .xlsx и .csv')
+
+
+def _int(value, default=None):
+    if value in (None, ''):
+        return default
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    return int(str(value).strip())
+
+
+def _safe_int(value):
+    try:
+        return _int(value)
+    except ValueError:
+        return None
+
+
+def _text(value):
+    return '' if value is None else str(value)
+
+
+def _changes(obj, values, fields):
+    return {field: (getattr(obj, field), values[field]) for field in fields if getattr(obj, field) != values[field]}
+
+
+def compute_diff(group_rows, channel_rows):
+    """
+    Сравнивает строки таблицы с базой. Возвращает словарь со списками
+    groups_create / groups_update / channels_create / channels_update /
+    channels_delete и errors. Для обновлений хранится объект и {поле: (было, стало)}.
+    """
+    diff = {key: [] for key in (
+        'groups_create', 'groups_update', 'channels_create', 'channels_update', 'channels_delete', 'errors'
+    )}
+    sections = {value for value, label in ChannelGroup.SECTION_CHOICES}
+
+    group_ids = {_safe_int(row['id']) for row in group_rows} - {None}
+    groups = ChannelGroup.objects.in_bulk(group_ids)
+    for row in group_rows:
+        try:
+            pk = _int(row['id'])
+            values = {
+                'title': _text(row['title']).strip(),
+                'description': _text(row['description']),
+                'section': _int(row['section']),
+                'sort_order': _int(row['sort_order'], 0),
+            }
+        except ValueError:
+            diff['errors'].append(f"groups, строка {row['row']}: id, section и sort_order должны быть числами")
+            continue
+        if not values['title'] or values['section'] not in sections:
+            diff['errors'].append(f"groups, строка {row['row']}: нужны название и раздел ({', '.join(map(str, sections))})")
+            continue
+        if pk is None:
+            diff['groups_create'].append({'row': row['row'], 'obj': ChannelGroup(**values)})
+        elif pk not in groups:
+            diff['errors'].append(f"groups, строка {row['row']}: нет группы с id {pk}")
+        elif changes := _changes(groups[pk], values, GROUP_FIELDS):
+            diff['groups_update'].append({'row': row['row'], 'obj': groups[pk], 'changes': changes})
+
+    types = dict(ChannelType.objects.values_list('name', 'pk'))
+    channel_ids = {_safe_int(row['id']) for row in channel_rows} - {None}
+    channels = {}
+    for start in range(0, len(channel_ids), BATCH_SIZE):
+        batch = list(channel_ids)[start:start + BATCH_SIZE]
+        channels.update(FChannel.objects.defer('content_html').in_bulk(batch))
+    known_groups = set(ChannelGroup.objects.filter(
+        pk__in={_safe_int(row['group_id']) for row in channel_rows} - {None}
+    ).values_list('pk', flat=True))
+
+    for row in channel_rows:
+        try:
+            pk = _int(row['id'])
+            values = {
+                'group_id': _int(row['group_id']),
+                'sort_order': _int(row['sort_order'], 0),
+                'name': _text(row['name']).strip(),
+                'description': _text(row['description']),
+                'content': _text(row['content']),
+            }
+        except ValueError:
+            diff['errors'].append(f"channels, строка {row['row']}: id, group_id и sort_order должны быть числами")
+            continue
+
+        if _text(row.get('delete')).strip().lower() in DELETE_MARKS:
+            if pk in channels:
+                diff['channels_delete'].append({'row': row['row'], 'obj': channels[pk]})
+            else:
+                diff['errors'].append(f"channels, строка {row['row']}: удалить можно только существующий канал")
+            continue
+
+        chtype = _text(row['chtype']).strip()
+        if chtype and chtype not in types:
+            diff['errors'].append(f"channels, строка {row['row']}: нет типа канала «{chtype}»")
+            continue
+        values['chtype_id'] = types.get(chtype)
+        if not values['name'] or values['group_id'] not in known_groups:
+            diff['errors'].append(f"channels, строка {row['row']}: нужны название и id существующей группы")
+            continue
+
+        if pk is None:
+            diff['channels_create'].append({'row': row['row'], 'obj': FChannel(**values)})
+        elif pk not in channels:
+            diff['errors'].append(f"channels, строка {row['row']}: нет канала с id {pk}")
+        elif changes := _changes(channels[pk], values, CHANNEL_FIELDS):
+            diff['channels_update'].append({'row': row['row'], 'obj': channels[pk], 'changes': changes})
+
+    return diff
+
+
+def has_changes(diff):
+    return any(diff[key] for key in diff if key != 'errors')
+
+
+def _changed_fields(items):
+    return sorted({field for item in items for field in item['changes']})
+
+
+@transaction.atomic
+def apply_diff(diff, batch_size=BATCH_SIZE):
+    """Записывает только изменившиеся строки: пачками, в одной транзакции. Возвращает число строк по видам."""
+    if diff['errors']:
+        raise SpreadsheetError('В таблице есть ошибки — изменения не применены')
+
+    for item in diff['groups_update']:
+        for field, (old, new) in item['changes'].items():
+            setattr(item['obj'], field, new)
+    if diff['groups_update']:
+        ChannelGroup.objects.bulk_update(
+            [item['obj'] for item in diff['groups_update']], _changed_fields(diff['groups_update']),
+            batch_size=batch_size,
+        )
+    ChannelGroup.objects.bulk_create([item['obj'] for item in diff['groups_create']], batch_size=batch_size)
+
+    updated = []
+    for item in diff['channels_update']:
+        channel = item['obj']
+        for field, (old, new) in item['changes'].items():
+            setattr(channel, field, new)
+        if 'content' in item['changes']:
+            channel.content_html = render_channel_content(channel.content)
+        updated.append(channel)
+    if updated:
+        fields = _changed_fields(diff['channels_update'])
+        if 'content' in fields:
+            fields.append('content_html')
+        FChannel.objects.bulk_update(updated, fields, batch_size=batch_size)
+
+    created = [item['obj'] for item in diff['channels_create']]
+    for channel in created:
+        channel.content_html = render_channel_content(channel.content)
+    FChannel.objects.bulk_create(created, batch_size=batch_size)
+
+    deleted_ids = [item['obj'].pk for item in diff['channels_delete']]
+    FChannel.objects.filter(pk__in=deleted_ids).delete()
+
+    # bulk-запись не шлёт сигналов — индекс и версия каналов обновляются здесь
+    index_bulk_written_channels(created, updated)
+    bump_channels_version()
+
+    return {key: len(diff[key]) for key in diff if key != 'errors'}
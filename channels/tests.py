@@ -1,3 +1,433 @@
+import io
+import json
+import tempfile
+from io import StringIO
+from pathlib import Path
+
+from openpyxl import load_workbook
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import CommandError, call_command
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from wagtail.models import Site
+
+from channels.cache import render_group_channels, render_section_groups
+from channels.models import ChannelGroup, ChannelType, FChannel, UserSavedChannel
+from channels.saved import get_saved_channel_ids
+from home.models import ChannelSectionPage
+
+OLD_CHANNELS_JSON = Path(settings.BASE_DIR) / 'old_channels.json'
+
+
+class ImportFChannelsTests(TestCase):
+    """
+    Tests for the streaming, idempotent import_fchannels command.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        for group_id in range(2, 12):
+            ChannelGroup.objects.create(id=group_id, title=f"Группа {group_id}", section=1)
+
+    def run_import(self, path, *args):
+        out = StringIO()
+        call_command('import_fchannels', str(path), *args, stdout=out, stderr=StringIO())
+        return out.getvalue()
+
+    def write_json(self, records):
+        f = tempfile.NamedTemporaryFile('w', suffix='.json', encoding='utf-8', delete=False)
+        json.dump(records, f, ensure_ascii=False)
+        f.close()
+        return f.name
+
+    def test_reimport_changes_nothing(self):
+        self.run_import(OLD_CHANNELS_JSON, '--batch-size', '100')
+        self.assertEqual(FChannel.objects.count(), 424)
+
+        with CaptureQueriesContext(connection) as queries:
+            output = self.run_import(OLD_CHANNELS_JSON, '--batch-size', '100')
+        self.assertIn("Создано: 0, обновлено: 0, без изменений: 424", output)
+        self.assertEqual(FChannel.objects.count(), 424)
+        # Повтор только читает: по одному SELECT каналов на пачку, никаких записей
+        channel_queries = [q['sql'] for q in queries if 'channels_fchannel' in q['sql']]
+        self.assertEqual(len(channel_queries), 5)
+        self.assertTrue(all(sql.startswith('SELECT') for sql in channel_queries))
+
+    def test_upsert_and_dry_run(self):
+        path = self.write_json([
+            {'group_id': 2, 'sort_order': 1, 'name': 'A', 'description': 'old', 'content': 'text'},
+            {'group_id': 99, 'sort_order': 1, 'name': 'No group', 'description': '', 'content': ''},
+        ])
+        self.run_import(path)
+        channel = FChannel.objects.get(name='A')
+        self.assertEqual(channel.content, '<p>text</p>')
+
+        path = self.write_json([
+            {'group_id': 2, 'sort_order': 1, 'name': 'A', 'description': 'new', 'content': 'text'},
+            {'group_id': 2, 'sort_order': 2, 'name': 'B', 'description': '', 'content': ''},
+        ])
+        output = self.run_import(path, '--dry-run')
+        self.assertIn("Создано: 1, обновлено: 1", output)
+        self.assertEqual(FChannel.objects.count(), 1)
+
+        self.run_import(path)
+        channel.refresh_from_db()
+        self.assertEqual(channel.description, 'new')
+        self.assertEqual(FChannel.objects.count(), 2)
+
+
+class ChannelContentLazyLoadTests(TestCase):
+    """
+    Tests that channel content is served lazily from a cacheable endpoint.
+    """
+
+    def setUp(self):
+        self.group = ChannelGroup.objects.create(title="Матрица", section=1)
+        self.channel = FChannel.objects.create(
+            group=self.group, sort_order=1, name="Канал", description="кратко", content="<p>Полный текст канала</p>"
+        )
+        FChannel.objects.create(group=self.group, sort_order=2, name="Пустой")
+        root = Site.objects.get(is_default_site=True).root_page
+        self.page = root.add_child(instance=ChannelSectionPage(title="Частоты", slug="chastoty", section_type=1))
+
+    def test_page_renders_without_content(self):
+        response = self.client.get(self.page.url)
+        self.assertContains(response, "Матрица")
+        self.assertNotContains(response, "Пустой")
+        self.assertContains(response, reverse('channels:group_channels', args=[self.group.pk]), count=1)
+
+    def test_group_channels_endpoint(self):
+        response = self.client.get(reverse('channels:group_channels', args=[self.group.pk]), {'v': 1})
+        self.assertContains(response, f'<tr data-channel-id="{self.channel.pk}">')
+        self.assertContains(response, "<details><summary>Канал</summary></details>", count=1)
+        self.assertContains(response, "Пустой")
+        self.assertNotContains(response, "Полный текст канала")
+        self.assertIn('public', response['Cache-Control'])
+        self.assertEqual(self.client.get(reverse('channels:group_channels', args=[0])).status_code, 404)
+
+    def test_content_endpoint_is_cacheable(self):
+        url = reverse('channels:channel_content', args=[self.channel.pk])
+        response = self.client.get(url, {'v': 1})
+        self.assertContains(response, "Полный текст канала")
+        self.assertIn('max-age=', response['Cache-Control'])
+        self.assertIn('public', response['Cache-Control'])
+
+        response = self.client.get(url, {'v': 1}, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 304)
+
+
+class ChannelPrerenderedHtmlTests(TestCase):
+    """
+    Tests for pre-rendered channel content HTML and its invalidation.
+    """
+
+    def setUp(self):
+        root = Site.objects.get(is_default_site=True).root_page
+        self.target = root.add_child(instance=ChannelSectionPage(title="Цель", slug="old-slug", section_type=1))
+        group = ChannelGroup.objects.create(title="Матрица", section=1)
+        self.channel = FChannel.objects.create(
+            group=group, name="Канал", content=f'<p><a linktype="page" id="{self.target.pk}">ссылка</a></p>'
+        )
+
+    def test_html_is_expanded_on_save(self):
+        self.assertIn('href="/old-slug/"', self.channel.content_html)
+
+    def test_page_publish_refreshes_html(self):
+        # Черновик ссылок не меняет — каналы не пересматриваются
+        self.target.title = "Черновик"
+        with CaptureQueriesContext(connection) as queries:
+            self.target.save_revision()
+        self.assertFalse([q for q in queries if 'channels_fchannel' in q['sql']])
+
+        self.target.slug = "published-slug"
+        self.target.save_revision().publish()
+        self.channel.refresh_from_db()
+        self.assertIn('href="/published-slug/"', self.channel.content_html)
+
+    def test_page_delete_refreshes_html(self):
+        self.target.delete()
+        self.channel.refresh_from_db()
+        self.assertNotIn('href="/old-slug/"', self.channel.content_html)
+
+    def test_rebuild_command(self):
+        FChannel.objects.update(content_html='')
+        out = StringIO()
+        call_command('rebuild_channel_html', stdout=out)
+        self.assertIn("Обновлено каналов: 1", out.getvalue())
+        self.channel.refresh_from_db()
+        self.assertIn('href="/old-slug/"', self.channel.content_html)
+
+
+class ChannelSectionCacheTests(TestCase):
+    """
+    Tests for the per-section accordion render cache and its signal-based invalidation.
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.group = ChannelGroup.objects.create(title="Матрица", section=1)
+        self.channel = FChannel.objects.create(group=self.group, sort_order=1, name="Первый")
+
+    def test_cached_until_snippet_changes(self):
+        html = render_section_groups(1)
+        with self.assertNumQueries(0):
+            self.assertEqual(render_section_groups(1), html)
+
+        self.channel.name = "Переименован"
+        self.channel.save()
+        self.assertIn("Переименован", render_group_channels(self.group.pk))
+        with self.assertNumQueries(0):
+            render_group_channels(self.group.pk)
+
+        ChannelType.objects.create(name="Тип")
+        with self.assertNumQueries(1):  # только группы — кеш сброшен
+            render_section_groups(1)
+        with self.assertNumQueries(2):  # группа и её каналы
+            render_group_channels(self.group.pk)
+
+    def test_warm_up_command(self):
+        out, err = StringIO(), StringIO()
+        call_command('warm_channel_sections', stdout=out, stderr=err)
+        self.assertIn("Кеш разделов прогрет", out.getvalue())
+        # В тестах кеш локальный — команда предупреждает, что веб-процессы прогрев не увидят
+        self.assertIn("не общий для процессов", err.getvalue())
+        with self.assertRaisesMessage(CommandError, "не общий для процессов"):
+            call_command('warm_channel_sections', '--require-shared-cache', stdout=StringIO())
+        with self.assertNumQueries(0):
+            self.assertIn("Матрица", render_section_groups(1))
+            self.assertIn("Первый", render_group_channels(self.group.pk))
+
+
+class ChannelSectionPageSizeTests(TestCase):
+    """
+    Tests that the section page stays small on the full catalogue from old_channels.json.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        for group_id in range(2, 12):
+            ChannelGroup.objects.create(id=group_id, title=f"Группа {group_id}", section=1)
+        call_command('import_fchannels', str(OLD_CHANNELS_JSON), stdout=StringIO(), stderr=StringIO())
+
+    def setUp(self):
+        cache.clear()
+
+    def test_page_is_far_smaller_than_inline_catalogue(self):
+        root = Site.objects.get(is_default_site=True).root_page
+        page = root.add_child(instance=ChannelSectionPage(title="Частоты", slug="chastoty", section_type=1))
+        page_size = len(self.client.get(page.url).content)
+        # Прежняя страница выводила весь текст каналов прямо в аккордеоне — он один задаёт нижнюю границу её размера
+        inline_size = sum(len(content.encode()) for content in FChannel.objects.values_list('content', flat=True))
+        self.assertLess(page_size * 10, inline_size)
+
+        group_size = rows = 0
+        for group in ChannelGroup.objects.all():
+            response = self.client.get(reverse('channels:group_channels', args=[group.pk]))
+            group_size += len(response.content)
+            rows += response.content.count(b'<tr data-channel-id=')
+        self.assertEqual(rows, FChannel.objects.count())
+        # Строка таблицы — номер, название, описание и пустая кнопка без атрибутов и разметки стилей
+        overhead = group_size - sum(
+            len(name.encode()) + len(description.encode())
+            for name, description in FChannel.objects.values_list('name', 'description')
+        )
+        self.assertLess(overhead / rows, 200)
+
+
+class ChannelSearchTests(TestCase):
+    """
+    Tests for the faceted channel search endpoint.
+    """
+
+    def setUp(self):
+        self.chtype = ChannelType.objects.create(name="Частота")
+        with self.captureOnCommitCallbacks(execute=True):
+            matrix = ChannelGroup.objects.create(title="Матрица", section=1)
+            other = ChannelGroup.objects.create(title="Другие", section=2)
+            FChannel.objects.create(group=matrix, name="Гармония", chtype=self.chtype, content="<p>сон</p>")
+            FChannel.objects.create(group=matrix, name="Покой", description="гармония сна")
+            FChannel.objects.create(group=other, name="Гармония воды")
+        self.url = reverse('channels:channel_search')
+
+    def test_search_with_facets(self):
+        response = self.client.get(self.url, {'q': "гармония"})
+        self.assertEqual(response.context['total'], 3)
+        self.assertEqual(
+            {facet['value']: facet['count'] for facet in response.context['section_facets']}, {1: 2, 2: 1}
+        )
+        self.assertIn({'value': self.chtype.pk, 'label': "Частота", 'count': 1, 'active': False},
+                      response.context['type_facets'])
+
+    def test_filters_narrow_results(self):
+        response = self.client.get(self.url, {'q': "гармония", 'section': 1, 'chtype': self.chtype.pk})
+        self.assertEqual([channel.name for channel in response.context['results']], ["Гармония"])
+        # Фасет раздела считается без фильтра по разделу
+        self.assertEqual(
+            {facet['value']: facet['count'] for facet in response.context['section_facets']}, {1: 1}
+        )
+
+    def test_index_follows_snippet_edits(self):
+        channel = FChannel.objects.get(name="Покой")
+        with self.captureOnCommitCallbacks(execute=True):
+            channel.description = "тишина"
+            channel.save()
+        response = self.client.get(self.url, {'q': "гармония"})
+        self.assertEqual(response.context['total'], 2)
+
+
+class SavedChannelsTests(TestCase):
+    """
+    Tests for the per-user saved-channel set and the "my channels" endpoints.
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.user = get_user_model().objects.create_user('member', password='pass')
+        self.client.force_login(self.user)
+        self.group = ChannelGroup.objects.create(title="Матрица", section=1)
+        self.channels = [
+            FChannel.objects.create(group=self.group, sort_order=i, name=f"Канал {i}") for i in range(1, 4)
+        ]
+
+    def test_saved_ids_are_cached_until_change(self):
+        self.assertEqual(get_saved_channel_ids(self.user), frozenset())
+        user = get_user_model().objects.get(pk=self.user.pk)
+        with self.assertNumQueries(0):
+            get_saved_channel_ids(user)
+
+        self.client.post(reverse('channels:saved_toggle', args=[self.channels[0].pk]))
+        user = get_user_model().objects.get(pk=self.user.pk)
+        self.assertEqual(get_saved_channel_ids(user), {self.channels[0].pk})
+
+        # Каскадное удаление канала тоже сбрасывает кеш
+        self.channels[0].delete()
+        user = get_user_model().objects.get(pk=self.user.pk)
+        self.assertEqual(get_saved_channel_ids(user), frozenset())
+
+    def test_section_page_marks_without_per_channel_queries(self):
+        root = Site.objects.get(is_default_site=True).root_page
+        page = root.add_child(instance=ChannelSectionPage(title="Частоты", slug="chastoty", section_type=1))
+        UserSavedChannel.objects.create(user=self.user, channel=self.channels[1])
+
+        response = self.client.get(page.url)
+        self.assertContains(response, f'tr[data-channel-id="{self.channels[1].pk}"] .channel-save:not(.is-unsaved)')
+        response = self.client.get(reverse('channels:group_channels', args=[self.group.pk]))
+        self.assertContains(response, 'class="channel-save"', count=3)
+
+    def test_toggle_bulk_reorder_and_notes(self):
+        first, second, third = self.channels
+        response = self.client.post(reverse('channels:saved_toggle', args=[first.pk]))
+        self.assertContains(response, 'is-saved')
+        response = self.client.post(reverse('channels:saved_toggle', args=[first.pk]))
+        self.assertContains(response, 'is-unsaved')
+
+        response = self.client.post(reverse('channels:saved_bulk'), {'group': self.group.pk})
+        self.assertContains(response, "Добавлено в «Мои каналы»: 3")
+        self.assertContains(response, 'hx-swap-oob="true"', count=3)
+        self.assertEqual(
+            json.loads(response['HX-Trigger']), {'channels-saved': {'ids': [channel.pk for channel in self.channels]}}
+        )
+
+        self.client.post(reverse('channels:saved_reorder'), {'channel': [third.pk, first.pk, second.pk]})
+        order = list(UserSavedChannel.objects.filter(user=self.user).values_list('channel_id', flat=True))
+        self.assertEqual(order, [third.pk, first.pk, second.pk])
+
+        url = reverse('channels:saved_notes', args=[second.pk])
+        self.assertContains(self.client.post(url, {'notes': "перед сном"}), "Сохранено")
+        written = UserSavedChannel.objects.get(channel=second)
+        self.assertEqual(written.notes, "перед сном")
+        # Повтор того же текста запись не трогает
+        self.assertContains(self.client.post(url, {'notes': "перед сном"}), "Сохранено")
+        self.assertEqual(UserSavedChannel.objects.get(channel=second).updated_at, written.updated_at)
+
+    def test_saved_list_page(self):
+        for channel in self.channels:
+            UserSavedChannel.objects.create(user=self.user, channel=channel, notes=f"о {channel.name}")
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('channels:saved_channels'))
+        # Каналы, группы и типы — одним запросом с join
+        self.assertEqual(len([q for q in queries if 'channels_' in q['sql']]), 1)
+        self.assertContains(response, "о Канал 3")
+        self.assertContains(response, "Матрица", count=3)
+
+
+class ChannelSpreadsheetTests(TestCase):
+    """
+    Tests for the XLSX/CSV channel editor: export, diff preview and batched apply.
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.user = get_user_model().objects.create_superuser('admin', 'admin@example.com', 'pass')
+        self.client.force_login(self.user)
+        self.group = ChannelGroup.objects.create(title="Матрица", section=1)
+        self.chtype = ChannelType.objects.create(name="Частота")
+        self.channels = [
+            FChannel.objects.create(group=self.group, sort_order=i, name=f"Канал {i}", content=f"<p>текст {i}</p>")
+            for i in range(1, 6)
+        ]
+
+    def export_workbook(self):
+        response = self.client.get(reverse('channels_spreadsheet_export'))
+        self.assertEqual(response.status_code, 200)
+        return load_workbook(io.BytesIO(b''.join(response.streaming_content)))
+
+    def upload(self, workbook):
+        buffer = io.BytesIO()
+        workbook.save(buffer)
+        upload = SimpleUploadedFile('channels.xlsx', buffer.getvalue())
+        return self.client.post(reverse('channels_spreadsheet_import'), {'file': upload})
+
+    def test_round_trip_without_edits_has_no_changes(self):
+        response = self.upload(self.export_workbook())
+        self.assertContains(response, "Таблица совпадает с базой")
+
+    def test_preview_then_apply_only_changed_rows(self):
+        workbook = self.export_workbook()
+        sheet = workbook['channels']
+        header = [cell.value for cell in sheet[1]]
+        sheet.cell(row=2, column=header.index('description') + 1, value="новое описание")
+        sheet.cell(row=3, column=header.index('chtype') + 1, value="Частота")
+        sheet.cell(row=4, column=header.index('delete') + 1, value="x")
+        sheet.append([None, self.group.pk, 9, "Новый", "", "", "<p>новый</p>", None])
+
+        response = self.upload(workbook)
+        diff = response.context['diff']
+        self.assertEqual(len(diff['channels_update']), 2)
+        self.assertEqual(len(diff['channels_delete']), 1)
+        self.assertEqual(len(diff['channels_create']), 1)
+        self.assertEqual(FChannel.objects.get(pk=self.channels[0].pk).description, "")  # ещё не применено
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(reverse('channels_spreadsheet_apply'), {'token': response.context['token']})
+        # Одна пачка UPDATE на изменённые каналы, нетронутые строки не пишутся
+        updates = [q['sql'] for q in queries if q['sql'].startswith('UPDATE "channels_fchannel"')]
+        self.assertEqual(len(updates), 1)
+        self.assertNotIn(f'"id" = {self.channels[4].pk}', updates[0])
+        self.assertRedirects(response, reverse('channels_spreadsheet_import'))
+
+        self.assertEqual(FChannel.objects.get(pk=self.channels[0].pk).description, "новое описание")
+        self.assertEqual(FChannel.objects.get(pk=self.channels[1].pk).chtype, self.chtype)
+        self.assertFalse(FChannel.objects.filter(pk=self.channels[2].pk).exists())
+        self.assertIn("<p>новый</p>", FChannel.objects.get(name="Новый").content_html)
+
+    def test_errors_block_apply(self):
+        workbook = self.export_workbook()
+        workbook['channels'].append([None, 999, 1, "Без группы", "", "", "", None])
+        response = self.upload(workbook)
+        self.assertContains(response, "нужны название и id существующей группы")
+        self.assertNotContains(response, "Применить изменения")
 
-# Create your tests here.
+    def test_csv_round_trip(self):
+        response = self.client.get(reverse('channels_spreadsheet_export'), {'format': 'csv'})
+        content = b''.join(response.streaming_content).decode('utf-8-sig')
+        content = content.replace("Канал 5", "Канал пять")
+        upload = SimpleUploadedFile('channels.csv', content.encode('utf-8'))
+        response = self.client.post(reverse('channels_spreadsheet_import'), {'file': upload})
+        self.assertEqual(len(response.context['diff']['channels_update']), 1)
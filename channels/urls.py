@@ -0,0 +1,16 @@
+from django.urls import path
+from . import views
+
+
+app_name = 'channels'
+
+urlpatterns = [
+    path('search/', views.channel_search, name='channel_search'),
+    path('channel/<int:pk>/content/', views.channel_content, name='channel_content'),
+    path('group/<int:pk>/channels/', views.group_channels, name='group_channels'),
+    path('saved/', views.saved_channels, name='saved_channels'),
+    path('saved/bulk/', views.saved_bulk, name='saved_bulk'),
+    path('saved/reorder/', views.saved_reorder, name='saved_reorder'),
+    path('saved/<int:pk>/toggle/', views.saved_toggle, name='saved_toggle'),
+    path('saved/<int:pk>/notes/', views.saved_notes, name='saved_notes'),
+]
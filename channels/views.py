@@ -1,3 +1,170 @@
-from django.shortcuts import render
+import hashlib
+import json
 
-# Create your views here.
+from django.conf import settings
+from django.contrib.auth.decorators import login_required
+from django.http import Http404, HttpResponse, HttpResponseBadRequest
+from django.shortcuts import get_object_or_404, render
+from django.utils.cache import patch_cache_control
+from django.views.decorators.http import condition, require_GET, require_POST
+
+from .cache import get_channels_version, render_group_channels
+from .models import ChannelGroup, ChannelType, FChannel, UserSavedChannel
+from .saved import (
+    get_saved_channel_ids, reorder_saved_channels, save_channels, set_channel_saved, update_saved_notes,
+)
+
+SEARCH_RESULTS_LIMIT = 50
+
+
+def channel_content_etag(request, pk):
+    row = FChannel.objects.filter(pk=pk).values_list('content', 'content_html').first()
+    return hashlib.md5(''.join(row).encode()).hexdigest() if row is not None else None
+
+
+@require_GET
+@condition(etag_func=channel_content_etag)
+def channel_content(request, pk):
+    """
+    Полный текст канала — подгружается аккордеоном страницы раздела при раскрытии.
+    URL содержит версию каналов (?v=...), поэтому ответ кешируется надолго.
+    """
+    channel = get_object_or_404(FChannel.objects.only('pk', 'content', 'content_html'), pk=pk)
+    response = render(request, 'channels/channel_content.html', {'channel': channel})
+    patch_cache_control(response, public=True, max_age=settings.CHANNEL_CONTENT_MAX_AGE)
+    return response
+
+
+@require_GET
+def group_channels(request, pk):
+    """
+    Таблица каналов группы — подгружается страницей раздела при раскрытии группы.
+    Как и содержимое каналов, URL содержит версию каналов (?v=...), поэтому ответ кешируется надолго.
+    """
+    html = render_group_channels(pk)
+    if html is None:
+        raise Http404
+    response = HttpResponse(html)
+    patch_cache_control(response, public=True, max_age=settings.CHANNEL_CONTENT_MAX_AGE)
+    return response
+
+
+def _int_param(request, name):
+    try:
+        return int(request.GET.get(name, ''))
+    except ValueError:
+        return None
+
+
+@require_GET
+def channel_search(request):
+    """
+    Поиск по каталогу каналов через поисковый индекс (HTMX-фрагмент) с фасетами
+    по типу канала и разделу. Фасет считается без своего же фильтра —
+    чтобы было видно, сколько найдётся при выборе другого значения.
+    """
+    query = request.GET.get('q', '').strip()
+    chtype = _int_param(request, 'chtype')
+    section = _int_param(request, 'section')
+    context = {'query': query, 'chtype': chtype, 'section': section}
+
+    if query:
+        channels = FChannel.objects.select_related('group', 'chtype').defer('content', 'content_html')
+        by_section = channels.filter(group__in=ChannelGroup.objects.filter(section=section).values('pk')) if section else channels
+        by_type = channels.filter(chtype=chtype) if chtype else channels
+
+        type_counts = by_section.search(query).facet('chtype_id')
+        group_counts = by_type.search(query).facet('group_id')
+
+        type_names = dict(ChannelType.objects.filter(pk__in=[pk for pk in type_counts if pk]).values_list('pk', 'name'))
+        context['type_facets'] = [
+            {'value': pk or '', 'label': type_names.get(pk, "Без типа"), 'count': count, 'active': pk == chtype}
+            for pk, count in type_counts.items()
+        ]
+
+        section_counts = {}
+        group_sections = ChannelGroup.objects.filter(pk__in=list(group_counts)).values_list('pk', 'section')
+        for group_id, group_section in group_sections:
+            section_counts[group_section] = section_counts.get(group_section, 0) + group_counts[group_id]
+        context['section_facets'] = [
+            {'value': value, 'label': label, 'count': section_counts[value], 'active': value == section}
+            for value, label in ChannelGroup.SECTION_CHOICES if value in section_counts
+        ]
+
+        results = by_type.filter(group__in=ChannelGroup.objects.filter(section=section).values('pk')) if section else by_type
+        context['results'] = results.search(query)[:SEARCH_RESULTS_LIMIT]
+        context['total'] = type_counts.get(chtype, 0) if chtype else sum(type_counts.values())
+        context['channels_version'] = get_channels_version()
+
+    return render(request, 'channels/search_results.html', context)
+
+
+def _int_list(values):
+    try:
+        return [int(value) for value in values]
+    except ValueError:
+        return None
+
+
+@login_required
+@require_GET
+def saved_channels(request):
+    """Личный список сохранённых каналов."""
+    saved = (
+        UserSavedChannel.objects.filter(user=request.user)
+        .select_related('channel__group', 'channel__chtype')
+        .defer('channel__content', 'channel__content_html')
+    )
+    return render(request, 'channels/saved_channels.html', {
+        'saved_channels': saved,
+        'channels_version': get_channels_version(),
+    })
+
+
+@login_required
+@require_POST
+def saved_toggle(request, pk):
+    """Звёздочка канала: saved=1 — сохранить, saved=0 — убрать, без параметра — переключить."""
+    channel = get_object_or_404(FChannel.objects.only('pk'), pk=pk)
+    saved = {'1': True, '0': False}.get(request.POST.get('saved'))
+    saved = set_channel_saved(request.user, channel, saved)
+    return render(request, 'channels/save_button.html', {'channel_id': channel.pk, 'saved': saved})
+
+
+@login_required
+@require_POST
+def saved_bulk(request):
+    """Сохраняет несколько каналов (channel=...) или все каналы группы (group=...)."""
+    channel_ids = _int_list(request.POST.getlist('channel'))
+    group_ids = _int_list(request.POST.getlist('group'))
+    if channel_ids is None or group_ids is None:
+        return HttpResponseBadRequest('Некорректный id')
+    if group_ids:
+        channel_ids += FChannel.objects.filter(group__in=group_ids).values_list('pk', flat=True)
+
+    added = save_channels(request.user, channel_ids)
+    saved_ids = [pk for pk in channel_ids if pk in get_saved_channel_ids(request.user)]
+    # Звёздочки затронутых каналов обновляются out-of-band, а строки таблиц раздела — по событию channels-saved
+    response = render(request, 'channels/saved_bulk.html', {'added': added, 'channel_ids': saved_ids})
+    response['HX-Trigger'] = json.dumps({'channels-saved': {'ids': saved_ids}})
+    return response
+
+
+@login_required
+@require_POST
+def saved_reorder(request):
+    """Новый порядок списка: id каналов в поле channel в нужной последовательности."""
+    channel_ids = _int_list(request.POST.getlist('channel'))
+    if channel_ids is None:
+        return HttpResponseBadRequest('Некорректный id')
+    reorder_saved_channels(request.user, channel_ids)
+    return HttpResponse(status=204)
+
+
+@login_required
+@require_POST
+def saved_notes(request, pk):
+    """Автосохранение заметок к каналу (форма шлёт запрос после паузы в наборе)."""
+    if not update_saved_notes(request.user, pk, request.POST.get('notes', '')):
+        return HttpResponse('Канал не сохранён', status=404)
+    return HttpResponse('Сохранено')
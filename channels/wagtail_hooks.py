@@ -0,0 +1,30 @@
+from django.urls import path, reverse
+from wagtail import hooks
+from wagtail.admin.menu import MenuItem
+
+from . import admin_views
+
+
+@hooks.register("register_admin_urls")
+def register_spreadsheet_urls():
+    return [
+        path('channels/spreadsheet/export/', admin_views.export_spreadsheet, name='channels_spreadsheet_export'),
+        path('channels/spreadsheet/import/', admin_views.import_spreadsheet, name='channels_spreadsheet_import'),
+        path('channels/spreadsheet/apply/', admin_views.apply_spreadsheet, name='channels_spreadsheet_apply'),
+    ]
+
+
+class SpreadsheetMenuItem(MenuItem):
+    def is_shown(self, request):
+        return request.user.has_perms(['channels.change_channelgroup', 'channels.change_fchannel'])
+
+
+@hooks.register("register_admin_menu_item")
+def register_spreadsheet_menu_item():
+    # Правка больших групп таблицей вместо InlinePanel сниппета
+    return SpreadsheetMenuItem(
+        "Каналы: таблица",
+        reverse('channels_spreadsheet_import'),
+        icon_name='table',
+        order=310,
+    )
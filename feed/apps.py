@@ -9,13 +9,27 @@ class FeedConfig(AppConfig):
         # Все импорты только здесь — внутри ready()
         from django.contrib.auth import get_user_model
         from django.contrib.auth.models import Group
-        from django.db.models.signals import post_save
+        from django.core.signals import request_finished
+        from django.db.models.signals import m2m_changed, post_delete, post_save
         from django.dispatch import receiver
 
-        from .models import Profile
+        from .counters import push_if_due
+        from .models import Post, PostDocument, PostImage, Profile
+        from .page_cache import bump_feed_version
 
         User = get_user_model()
 
+        # Накопленные просмотры постов уходят в кеш после отправки ответа (в БД их пишет flush_post_views)
+        request_finished.connect(push_if_due, dispatch_uid='feed_push_post_views')
+
+        # Любое изменение постов и их вложений инвалидирует кеш страниц ленты
+        for model in (Post, PostImage, PostDocument):
+            post_save.connect(bump_feed_version, sender=model, dispatch_uid=f'feed_version_save_{model.__name__}')
+            post_delete.connect(bump_feed_version, sender=model, dispatch_uid=f'feed_version_delete_{model.__name__}')
+        m2m_changed.connect(
+            bump_feed_version, sender=Post.visibility_groups.through, dispatch_uid='feed_version_visibility'
+        )
+
         @receiver(post_save, sender=User)
         def create_user_profile(sender, instance, created, **kwargs):
             if created:
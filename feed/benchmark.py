@@ -0,0 +1,239 @@
+"""
+Синтетические данные и замеры производительности ленты.
+
+seed_members() и seed_posts() заполняют БД пользователями, группами и
+постами с вложениями (пачками, без сигналов). run_benchmark() прогоняет типовые запросы ленты на
+нескольких объёмах данных и возвращает p50/p95 времени ответа и число
+SQL-запросов — отчёт пишет команда benchmark_feed, отчёты разных релизов
+можно сравнивать между собой.
+"""
+import io
+import math
+import platform
+import random
+import statistics
+import time
+import uuid
+
+import django
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import Group
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from PIL import Image as PILImage
+from wagtail.documents import get_document_model
+from wagtail.images import get_image_model
+from wagtail.models import Site
+
+from .models import FeedPage, Post, PostDocument, PostImage
+from .page_cache import bump_feed_version
+
+User = get_user_model()
+Image = get_image_model()
+Document = get_document_model()
+
+SEED_PREFIX = 'seed-'
+BATCH_SIZE = 1000
+
+WORDS = (
+    "виноград урожай лоза сорт погреб выдержка дегустация винодельня бочка терруар "
+    "купаж сбор солнце склон почва обрезка цветение сусло брожение бутылка"
+).split()
+
+
+def _sample_image_file():
+    buffer = io.BytesIO()
+    PILImage.new('RGB', (800, 600), (120, 40, 60)).save(buffer, format='JPEG')
+    return ContentFile(buffer.getvalue(), name='seed.jpg')
+
+
+def seed_members(users=20, groups=3, seed=None):
+    """Создаёт пользователей и группы; каждый пользователь — в одной случайной группе."""
+    rng = random.Random(seed)
+    tag = SEED_PREFIX + uuid.uuid4().hex[:8]
+
+    Group.objects.bulk_create([Group(name=f'{tag}-group-{i}') for i in range(groups)])
+    group_list = list(Group.objects.filter(name__startswith=f'{tag}-'))
+
+    # Непригодный пароль: войти под сгенерированными (предсказуемыми) логинами нельзя — бенчмарк использует force_login
+    password = make_password(None)
+    User.objects.bulk_create(
+        [User(username=f'{tag}-user-{i}', password=password) for i in range(users)], batch_size=BATCH_SIZE
+    )
+    user_list = list(User.objects.filter(username__startswith=f'{tag}-'))
+    if group_list:
+        User.groups.through.objects.bulk_create(
+            [User.groups.through(user=user, group=rng.choice(group_list)) for user in user_list],
+            batch_size=BATCH_SIZE,
+        )
+    return user_list, group_list
+
+
+def seed_posts(authors, groups, posts=100, images_per_post=1, documents_per_post=1,
+               restricted_share=0.3, seed=None):
+    """
+    Создаёт посты с вложениями; часть постов видна только одной из groups.
+    Все вложения ссылаются на один файл — важны строки в БД, а не байты на диске.
+    Возвращает число созданных постов.
+    """
+    rng = random.Random(seed)
+    tag = SEED_PREFIX + uuid.uuid4().hex[:8]
+
+    # MySQL не возвращает id из bulk_create — строки перечитываются по метке
+    Post.objects.bulk_create(
+        [
+            Post(author=rng.choice(authors), content=f"[{tag}] " + " ".join(rng.choices(WORDS, k=30)))
+            for _ in range(posts)
+        ],
+        batch_size=BATCH_SIZE,
+    )
+    post_list = list(Post.objects.filter(content__startswith=f'[{tag}]').order_by('pk'))
+
+    if groups:
+        Post.visibility_groups.through.objects.bulk_create(
+            [
+                Post.visibility_groups.through(post=post, group=rng.choice(groups))
+                for post in post_list if rng.random() < restricted_share
+            ],
+            batch_size=BATCH_SIZE,
+        )
+
+    if images_per_post and post_list:
+        sample = Image.objects.create(title=f'{tag}-sample', file=_sample_image_file())
+        Image.objects.bulk_create(
+            [
+                Image(title=f'{tag}-img-{post.pk}-{i}', file=sample.file.name, width=sample.width,
+                      height=sample.height, file_size=sample.file_size, file_hash=sample.file_hash)
+                for post in post_list for i in range(images_per_post)
+            ],
+            batch_size=BATCH_SIZE,
+        )
+        images = Image.objects.filter(title__startswith=f'{tag}-img-').values_list('pk', 'title')
+        PostImage.objects.bulk_create(
+            [PostImage(post_id=int(title.split('-')[-2]), image_id=pk) for pk, title in images],
+            batch_size=BATCH_SIZE,
+        )
+
+    if documents_per_post and post_list:
+        sample = Document.objects.create(title=f'{tag}-sample', file=ContentFile(b'seed', name='seed.txt'))
+        Document.objects.bulk_create(
+            [
+                Document(title=f'{tag}-doc-{post.pk}-{i}', file=sample.file.name,
+                         file_size=sample.file_size, file_hash=sample.file_hash)
+                for post in post_list for i in range(documents_per_post)
+            ],
+            batch_size=BATCH_SIZE,
+        )
+        documents = Document.objects.filter(title__startswith=f'{tag}-doc-').values_list('pk', 'title')
+        PostDocument.objects.bulk_create(
+            [PostDocument(post_id=int(title.split('-')[-2]), document_id=pk) for pk, title in documents],
+            batch_size=BATCH_SIZE,
+        )
+
+    # bulk_create не шлёт сигналов — сбрасываем закешированные страницы вручную
+    bump_feed_version()
+    return len(post_list)
+
+
+def percentile(values, share):
+    ordered = sorted(values)
+    return ordered[max(math.ceil(share * len(ordered)) - 1, 0)]
+
+
+def measure(request, iterations, setup=None):
+    """
+    Выполняет request(prepared) iterations раз. setup() вызывается перед каждым
+    замером и в него не входит; его результат передаётся в request.
+    """
+    timings, queries = [], []
+    for _ in range(iterations):
+        prepared = setup() if setup else None
+        with CaptureQueriesContext(connection) as captured:
+            start = time.perf_counter()
+            response = request(prepared)
+            timings.append((time.perf_counter() - start) * 1000)
+        if response.status_code >= 400:
+            raise RuntimeError(f"Запрос вернул {response.status_code}")
+        queries.append(len(captured))
+
+    return {
+        'p50_ms': round(percentile(timings, 0.5), 2),
+        'p95_ms': round(percentile(timings, 0.95), 2),
+        'mean_ms': round(statistics.fmean(timings), 2),
+        'queries': max(queries),
+    }
+
+
+def get_feed_page():
+    page = FeedPage.objects.live().first()
+    if page is None:
+        site = Site.objects.filter(is_default_site=True).first() or Site.objects.first()
+        page = site.root_page.add_child(instance=FeedPage(title="Лента (бенчмарк)", slug='feed-benchmark'))
+    return page
+
+
+def benchmark_size(user, iterations):
+    """Замеры для текущего объёма данных от имени user."""
+    client = Client()
+    client.force_login(user)
+    htmx = {'HTTP_HX_REQUEST': 'true'}
+    feed_url = get_feed_page().url
+
+    own_post = Post.objects.create(author=user, content="benchmark")
+    _, cursor = Post.objects.visible_to(user).feed_page()
+
+    # Прогрев: рендишены первых двух страниц и кеш шаблонов
+    client.get(feed_url)
+    client.get(reverse('feed:post_list'), {'cursor': cursor})
+
+    def create_post():
+        return Post.objects.create(author=user, content="to delete").pk
+
+    return {
+        'feed_page_cold': measure(lambda _: client.get(feed_url), iterations, setup=cache.clear),
+        'feed_page_cached': measure(lambda _: client.get(feed_url), iterations),
+        'load_more': measure(lambda _: client.get(reverse('feed:post_list'), {'cursor': cursor}), iterations),
+        'post_create': measure(
+            lambda _: client.post(reverse('feed:post_create'), {'content': 'benchmark'}, **htmx), iterations
+        ),
+        'post_update': measure(
+            lambda _: client.post(reverse('feed:post_update', args=[own_post.pk]), {'content': 'edited'}, **htmx),
+            iterations,
+        ),
+        'post_delete': measure(
+            lambda pk: client.post(reverse('feed:post_delete', args=[pk]), **htmx), iterations, setup=create_post,
+        ),
+    }
+
+
+def run_benchmark(sizes, iterations=20, users=50, groups=5, seed=0, log=None):
+    """
+    Наращивает ленту до каждого из размеров sizes (число постов) и замеряет запросы.
+    Возвращает отчёт для сохранения в JSON.
+    """
+    report = {
+        'generated_at': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        'python': platform.python_version(),
+        'django': django.get_version(),
+        'database': connection.vendor,
+        'iterations': iterations,
+        'results': {},
+    }
+
+    members, group_list = seed_members(users=users, groups=groups, seed=seed)
+    user = members[0]
+    total = 0
+    for size in sorted(sizes):
+        if size > total:
+            seed_posts(members, group_list, posts=size - total, seed=seed)
+            total = size
+        if log:
+            log(f"Постов в ленте: {size}")
+        report['results'][str(size)] = benchmark_size(user, iterations)
+
+    return report
@@ -0,0 +1,130 @@
+"""
+Буферизованные счётчики просмотров постов ленты.
+
+Просмотр ленты не обращается к БД: инкременты копятся в памяти воркера и не
+чаще раза в FEED_VIEW_COUNTER_PUSH_INTERVAL секунд (после отправки ответа)
+уходят в общий кеш одной пачкой. Пачки нумеруются атомарным счётчиком
+(cache.incr), поэтому их видит любой процесс.
+
+В БД просмотры пишет только отдельный воркер — python manage.py
+flush_post_views --loop: раз в FEED_VIEW_COUNTER_FLUSH_INTERVAL секунд он
+забирает накопившиеся пачки и обновляет Post.views_count сгруппированными
+UPDATE ... SET views_count = views_count + N. Стоимость сброса зависит от
+числа просмотренных постов, а не от размера таблицы постов.
+"""
+import threading
+import time
+from collections import Counter, defaultdict
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import F
+
+SEQ_KEY = 'feed:views:seq'
+FLUSHED_KEY = 'feed:views:flushed'
+FLUSH_LOCK_KEY = 'feed:views:flush-lock'
+BATCH_TIMEOUT = 24 * 60 * 60
+
+_pending = Counter()
+_pending_lock = threading.Lock()
+_next_push = 0.0
+
+
+def get_flush_interval():
+    return getattr(settings, 'FEED_VIEW_COUNTER_FLUSH_INTERVAL', 60)
+
+
+def get_push_interval():
+    return getattr(settings, 'FEED_VIEW_COUNTER_PUSH_INTERVAL', 5)
+
+
+def _batch_key(seq):
+    return f'feed:views:batch:{seq}'
+
+
+def record_post_views(post_ids):
+    """Запоминает просмотр постов в памяти воркера (без обращений к БД и кешу)."""
+    with _pending_lock:
+        _pending.update(post_ids)
+
+
+def push_pending_views(force=False):
+    """
+    Отправляет накопленные в памяти инкременты пачкой в кеш — не чаще раза
+    в FEED_VIEW_COUNTER_PUSH_INTERVAL секунд, если не force. К БД не обращается.
+    """
+    global _next_push
+
+    with _pending_lock:
+        now = time.monotonic()
+        if not _pending or (not force and now < _next_push):
+            return
+        pending = dict(_pending)
+        _pending.clear()
+        _next_push = now + get_push_interval()
+
+    try:
+        seq = cache.incr(SEQ_KEY)
+    except ValueError:
+        # Счётчика пачек ещё нет: add не перезапишет созданный параллельно
+        cache.add(SEQ_KEY, 0, timeout=None)
+        seq = cache.incr(SEQ_KEY)
+    cache.set(_batch_key(seq), pending, timeout=BATCH_TIMEOUT)
+
+
+def push_if_due(**kwargs):
+    """Обработчик request_finished: отправляет накопленные просмотры в кеш после ответа."""
+    push_pending_views()
+
+
+def _apply_views(totals):
+    """Прибавляет просмотры к постам: посты с одинаковым приростом — одним UPDATE."""
+    from .models import Post
+
+    by_delta = defaultdict(list)
+    for post_id, delta in totals.items():
+        by_delta[delta].append(post_id)
+    with transaction.atomic():
+        for delta, ids in by_delta.items():
+            Post.objects.filter(pk__in=ids).update(views_count=F('views_count') + delta)
+
+
+def flush_post_views():
+    """
+    Забирает из кеша пачки просмотров, отправленные после прошлого сброса,
+    и прибавляет их к Post.views_count. Параллельные сбросы исключает
+    блокировка в кеше. Возвращает количество обновлённых постов.
+    """
+    push_pending_views(force=True)
+
+    current = cache.get(SEQ_KEY, 0)
+    flushed, late = cache.get(FLUSHED_KEY, (0, ()))
+    if current < flushed:
+        flushed, late = 0, ()  # счётчик пачек вытеснили из кеша — нумерация началась заново
+    if current <= flushed and not late:
+        return 0
+    if not cache.add(FLUSH_LOCK_KEY, 1, timeout=get_flush_interval()):
+        return 0  # сбрасывает другой процесс
+
+    try:
+        new = range(flushed + 1, current + 1)
+        keys = [_batch_key(seq) for seq in (*late, *new)]
+        batches = cache.get_many(keys)
+
+        totals = Counter()
+        for pending in batches.values():
+            totals.update(pending)
+        if totals:
+            _apply_views(totals)
+
+        # Номер пачки выдаётся до её записи — отсутствующую новую пачку проверим ещё раз
+        # при следующем сбросе; не появившаяся и тогда считается потерянной (воркер упал)
+        late = tuple(seq for seq in new if _batch_key(seq) not in batches)
+        cache.set(FLUSHED_KEY, (current, late), timeout=None)
+        cache.delete_many(list(batches))
+    finally:
+        cache.delete(FLUSH_LOCK_KEY)
+
+    # Кеш страниц ленты не сбрасываем: счётчики страница запрашивает отдельно (PostCountersView)
+    return len(totals)
@@ -0,0 +1,106 @@
+"""
+Лайки и комментарии постов ленты.
+
+Счётчики Post.likes_count / comments_count денормализованы: меняются
+атомарным UPDATE ... SET x = x ± 1 в той же транзакции, что и строка
+лайка/комментария, поэтому параллельные запросы не теряют инкременты.
+Уникальная пара (post, user) не даёт лайкнуть дважды даже при гонке.
+Расхождения (ручные правки в БД, сбои) чинит reconcile_post_counters.
+
+Кеш страниц ленты при этом не сбрасывается: свежие счётчики страница
+получает отдельным запросом (PostCountersView).
+"""
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, IntegerField, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+from .models import Post, PostComment, PostLike
+
+RECONCILE_BATCH_SIZE = 1000
+
+
+def _increment(post_id, field):
+    Post.objects.filter(pk=post_id).update(**{field: F(field) + 1})
+
+
+def _decrement(post_id, field):
+    # Условие вместо Greatest(): в MySQL x - 1 для UNSIGNED нуля — ошибка
+    Post.objects.filter(pk=post_id, **{f'{field}__gt': 0}).update(**{field: F(field) - 1})
+
+
+def set_post_like(post, user, liked=None):
+    """
+    Ставит (liked=True) или снимает (liked=False) лайк; liked=None — переключает.
+    Повтор того же запроса ничего не меняет. Возвращает итоговое состояние.
+    """
+    with transaction.atomic():
+        if liked is None:
+            liked = not PostLike.objects.filter(post=post, user=user).exists()
+
+        if liked:
+            try:
+                with transaction.atomic():
+                    PostLike.objects.create(post=post, user=user)
+            except IntegrityError:
+                return True  # параллельный запрос уже поставил лайк
+            _increment(post.pk, 'likes_count')
+        else:
+            deleted, _ = PostLike.objects.filter(post=post, user=user).delete()
+            if not deleted:
+                return False
+            _decrement(post.pk, 'likes_count')
+
+    return liked
+
+
+def add_comment(post, user, content):
+    with transaction.atomic():
+        comment = PostComment.objects.create(post=post, author=user, content=content)
+        _increment(post.pk, 'comments_count')
+    return comment
+
+
+def delete_comment(comment):
+    with transaction.atomic():
+        deleted, _ = PostComment.objects.filter(pk=comment.pk).delete()
+        if deleted:
+            _decrement(comment.post_id, 'comments_count')
+
+
+def _count_subquery(model):
+    counts = (
+        model.objects.filter(post=OuterRef('pk'))
+        .order_by().values('post').annotate(count=Count('pk')).values('count')
+    )
+    return Coalesce(Subquery(counts, output_field=IntegerField()), Value(0))
+
+
+def reconcile_post_counters(batch_size=RECONCILE_BATCH_SIZE):
+    """
+    Сверяет likes_count / comments_count с реальным числом строк и чинит
+    расхождения. Исправление — один UPDATE с подзапросом, так что инкременты,
+    пришедшие между проверкой и записью, не затираются. Возвращает число исправленных постов.
+    """
+    fixed = 0
+    last_pk = 0
+    while True:
+        batch = list(
+            Post.objects.filter(pk__gt=last_pk).order_by('pk').values_list('pk', flat=True)[:batch_size]
+        )
+        if not batch:
+            break
+        last_pk = batch[-1]
+
+        stale = list(
+            Post.objects.filter(pk__in=batch)
+            .annotate(real_likes=_count_subquery(PostLike), real_comments=_count_subquery(PostComment))
+            .exclude(likes_count=F('real_likes'), comments_count=F('real_comments'))
+            .values_list('pk', flat=True)
+        )
+        if stale:
+            fixed += Post.objects.filter(pk__in=stale).update(
+                likes_count=_count_subquery(PostLike),
+                comments_count=_count_subquery(PostComment),
+            )
+
+    return fixed
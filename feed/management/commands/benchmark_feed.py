@@ -0,0 +1,56 @@
+import json
+import tempfile
+
+from django.core.management.base import BaseCommand
+from django.test.runner import DiscoverRunner
+from django.test.utils import override_settings, setup_test_environment, teardown_test_environment
+
+from feed.benchmark import run_benchmark
+
+
+class Command(BaseCommand):
+    help = (
+        "Замеряет p50/p95 времени ответа и число SQL-запросов ленты на нескольких объёмах данных. "
+        "Работает на отдельной тестовой БД и пишет отчёт в JSON"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--sizes',
+            default='100,1000,5000',
+            help='Число постов в ленте для замеров, через запятую'
+        )
+        parser.add_argument('--iterations', type=int, default=20, help='Повторов каждого запроса')
+        parser.add_argument('--users', type=int, default=50)
+        parser.add_argument('--groups', type=int, default=5)
+        parser.add_argument('--label', default='', help='Метка отчёта, например версия релиза')
+        parser.add_argument('--output', default='feed_benchmark.json', help='Куда записать отчёт')
+
+    def handle(self, *args, **options):
+        sizes = [int(size) for size in options['sizes'].split(',')]
+
+        # Данные генерируются в тестовой БД и временном MEDIA_ROOT — рабочие не трогаются
+        runner = DiscoverRunner(verbosity=0, interactive=False)
+        setup_test_environment()
+        old_config = runner.setup_databases(serialized_aliases=set())
+        try:
+            with override_settings(MEDIA_ROOT=tempfile.mkdtemp()):
+                report = run_benchmark(
+                    sizes, iterations=options['iterations'], users=options['users'],
+                    groups=options['groups'], log=self.stdout.write,
+                )
+        finally:
+            runner.teardown_databases(old_config)
+            teardown_test_environment()
+
+        report['label'] = options['label']
+        with open(options['output'], 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+
+        for size, scenarios in report['results'].items():
+            self.stdout.write(f"— {size} постов")
+            for name, stats in scenarios.items():
+                self.stdout.write(
+                    f"  {name}: p50 {stats['p50_ms']} мс, p95 {stats['p95_ms']} мс, запросов {stats['queries']}"
+                )
+        self.stdout.write(self.style.SUCCESS(f"Отчёт сохранён: {options['output']}"))
@@ -0,0 +1,28 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from feed.models import ChunkedUpload
+from feed.uploads import discard_upload
+
+
+class Command(BaseCommand):
+    help = "Удаляет брошенные загрузки по частям вместе с их файлами"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--hours',
+            type=int,
+            default=24,
+            help='Сколько часов без новых частей считать загрузку брошенной (по умолчанию 24)'
+        )
+
+    def handle(self, *args, **options):
+        threshold = timezone.now() - timedelta(hours=options['hours'])
+        removed = 0
+        for upload in ChunkedUpload.objects.filter(updated_at__lt=threshold):
+            discard_upload(upload)
+            removed += 1
+
+        self.stdout.write(self.style.SUCCESS(f"Удалено загрузок: {removed}"))
@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+
+from feed.page_cache import get_cache_stats, reset_cache_stats
+
+
+class Command(BaseCommand):
+    help = "Показывает статистику попаданий в кеш страниц ленты"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--reset', action='store_true', help='Обнулить счётчики после вывода')
+
+    def handle(self, *args, **options):
+        stats = get_cache_stats()
+        total = stats['hits'] + stats['misses']
+        ratio = stats['hits'] / total * 100 if total else 0
+
+        self.stdout.write(f"Попаданий: {stats['hits']}")
+        self.stdout.write(f"Промахов: {stats['misses']}")
+        self.stdout.write(self.style.SUCCESS(f"Доля попаданий: {ratio:.1f}%"))
+
+        if options['reset']:
+            reset_cache_stats()
+            self.stdout.write("Счётчики обнулены")
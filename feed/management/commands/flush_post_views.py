@@ -0,0 +1,25 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from feed.counters import flush_post_views, get_flush_interval
+
+
+class Command(BaseCommand):
+    help = "Сбрасывает накопленные в кеше просмотры постов ленты в Post.views_count (см. feed/counters.py)"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--loop',
+            action='store_true',
+            help='Работать постоянно, сбрасывая счётчики раз в FEED_VIEW_COUNTER_FLUSH_INTERVAL секунд'
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            updated = flush_post_views()
+            self.stdout.write(self.style.SUCCESS(f"Обновлено постов: {updated}"))
+
+            if not options['loop']:
+                break
+            time.sleep(get_flush_interval())
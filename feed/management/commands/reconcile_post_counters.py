@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from feed.interactions import RECONCILE_BATCH_SIZE, reconcile_post_counters
+
+
+class Command(BaseCommand):
+    help = "Сверяет счётчики лайков и комментариев постов ленты с реальными данными и исправляет расхождения"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=RECONCILE_BATCH_SIZE,
+            help='Сколько постов проверять за один запрос'
+        )
+
+    def handle(self, *args, **options):
+        fixed = reconcile_post_counters(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f"Исправлено постов: {fixed}"))
@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand
+
+from feed.benchmark import seed_members, seed_posts
+
+
+class Command(BaseCommand):
+    help = "Заполняет ленту синтетическими данными: пользователи, группы, посты с вложениями (для нагрузочных проверок)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=20)
+        parser.add_argument('--groups', type=int, default=3)
+        parser.add_argument('--posts', type=int, default=100)
+        parser.add_argument('--images-per-post', type=int, default=1)
+        parser.add_argument('--documents-per-post', type=int, default=1)
+        parser.add_argument(
+            '--restricted-share',
+            type=float,
+            default=0.3,
+            help='Доля постов, видимых только одной группе'
+        )
+        parser.add_argument('--seed', type=int, default=None, help='Зерно генератора для воспроизводимых данных')
+
+    def handle(self, *args, **options):
+        users, groups = seed_members(options['users'], options['groups'], seed=options['seed'])
+        created = seed_posts(
+            users, groups,
+            posts=options['posts'],
+            images_per_post=options['images_per_post'],
+            documents_per_post=options['documents_per_post'],
+            restricted_share=options['restricted_share'],
+            seed=options['seed'],
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f"Создано пользователей: {len(users)}, групп: {len(groups)}, постов: {created}"
+        ))
@@ -0,0 +1,40 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from feed.notifications import dispatch_deliveries, expand_notifications
+
+
+class Command(BaseCommand):
+    help = "Рассылает уведомления о новых постах ленты в WhatsApp из очереди (outbox)"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--loop',
+            action='store_true',
+            help='Работать постоянно, проверяя очередь раз в --interval секунд'
+        )
+        parser.add_argument('--interval', type=int, default=5, help='Пауза при пустой очереди (секунд)')
+        parser.add_argument('--batch-size', type=int, default=settings.FEED_WHATSAPP_BATCH_SIZE)
+        parser.add_argument(
+            '--concurrency',
+            type=int,
+            default=settings.FEED_WHATSAPP_CONCURRENCY,
+            help='Сколько сообщений отправлять одновременно'
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            created = expand_notifications()
+            if created:
+                self.stdout.write(f"Новых отправок в очереди: {created}")
+
+            sent, failed = dispatch_deliveries(options['batch_size'], options['concurrency'])
+            if sent or failed:
+                self.stdout.write(self.style.SUCCESS(f"Отправлено: {sent}, ошибок: {failed}"))
+
+            if not options['loop']:
+                break
+            if not (created or sent or failed):
+                time.sleep(options['interval'])
@@ -0,0 +1,24 @@
+# Generated by Django 6.0.1 on 2026-10-18 12:48
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('feed', '0003_feedpage_search_image'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='post',
+            options={'ordering': ['-pinned', '-created_at', '-id'], 'verbose_name': 'Пост в ленте', 'verbose_name_plural': 'Посты в ленте'},
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(fields=['-pinned', '-created_at', '-id'], name='feed_post_feed_order_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 6.0.1 on 2026-10-18 12:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('feed', '0004_post_feed_order'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='pending_attachments',
+            field=models.PositiveSmallIntegerField(default=0, editable=False),
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 6.0.1 on 2026-10-18 12:56
+
+import django.db.models.deletion
+import uuid
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('feed', '0005_post_pending_attachments'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ChunkedUpload',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('kind', models.CharField(choices=[('image', 'Изображение'), ('document', 'Документ')], max_length=10)),
+                ('filename', models.CharField(max_length=255, verbose_name='Имя файла')),
+                ('file', models.CharField(max_length=255, verbose_name='Путь в хранилище')),
+                ('size', models.PositiveBigIntegerField(verbose_name='Размер')),
+                ('offset', models.PositiveBigIntegerField(default=0, verbose_name='Получено байт')),
+                ('sha1', models.CharField(blank=True, max_length=40, verbose_name='SHA-1 содержимого')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='feed_uploads', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Загрузка по частям',
+                'verbose_name_plural': 'Загрузки по частям',
+            },
+        ),
+    ]
@@ -0,0 +1,49 @@
+# Generated by Django 6.0.1 on 2026-10-18 13:04
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('feed', '0007_postlike_postcomment'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PostNotification',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('expanded_at', models.DateTimeField(blank=True, null=True, verbose_name='Получатели определены')),
+                ('post', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='notification', to='feed.post')),
+            ],
+            options={
+                'verbose_name': 'Уведомление о посте',
+                'verbose_name_plural': 'Уведомления о постах',
+            },
+        ),
+        migrations.CreateModel(
+            name='WhatsAppDelivery',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('phone', models.CharField(max_length=20)),
+                ('status', models.CharField(choices=[('pending', 'В очереди'), ('sent', 'Отправлено'), ('failed', 'Ошибка')], default='pending', max_length=10)),
+                ('attempts', models.PositiveSmallIntegerField(default=0)),
+                ('next_attempt_at', models.DateTimeField(verbose_name='Следующая попытка')),
+                ('last_error', models.TextField(blank=True)),
+                ('sent_at', models.DateTimeField(blank=True, null=True)),
+                ('post', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='whatsapp_deliveries', to='feed.post')),
+                ('recipient', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='whatsapp_deliveries', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Отправка в WhatsApp',
+                'verbose_name_plural': 'Отправки в WhatsApp',
+                'indexes': [models.Index(fields=['status', 'next_attempt_at'], name='feed_delivery_due_idx')],
+                'constraints': [models.UniqueConstraint(fields=('post', 'recipient'), name='feed_whatsappdelivery_unique_recipient')],
+            },
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 6.0.1 on 2026-10-18 14:10
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('feed', '0008_whatsapp_outbox'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PostViewBuffer',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('views', models.PositiveIntegerField()),
+                ('post', models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='feed.post')),
+            ],
+            options={
+                'verbose_name': 'Просмотры в буфере',
+                'verbose_name_plural': 'Просмотры в буфере',
+            },
+        ),
+    ]
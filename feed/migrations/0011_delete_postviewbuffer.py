@@ -0,0 +1,29 @@
+from collections import Counter
+
+from django.db import migrations
+from django.db.models import F
+
+
+def apply_buffered_views(apps, schema_editor):
+    # Просмотры, ещё лежащие в буфере, переносим в посты до удаления таблицы
+    Post = apps.get_model('feed', 'Post')
+    PostViewBuffer = apps.get_model('feed', 'PostViewBuffer')
+    totals = Counter()
+    for post_id, views in PostViewBuffer.objects.values_list('post_id', 'views'):
+        totals[post_id] += views
+    for post_id, views in totals.items():
+        Post.objects.filter(pk=post_id).update(views_count=F('views_count') + views)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('feed', '0010_chunkedupload_claim'),
+    ]
+
+    operations = [
+        migrations.RunPython(apply_buffered_views, migrations.RunPython.noop),
+        migrations.DeleteModel(
+            name='PostViewBuffer',
+        ),
+    ]
@@ -1,4 +1,9 @@
+import uuid
+from datetime import datetime
+
+from django.conf import settings
 from django.db import models
+from django.db.models import Exists, OuterRef, Prefetch, Q
 from django.contrib.auth import get_user_model
 from django.contrib.auth.models import Group
 from django.contrib.contenttypes.fields import GenericRelation
@@ -6,6 +11,8 @@ from modelcluster.fields import ParentalKey
 from modelcluster.models import ClusterableModel
 from wagtail.images.models import Image
 from wagtail.documents.models import Document
+from wagtail.search import index
+from wagtail.search.queryset import SearchableQuerySetMixin
 
 from wagtail.models import Page
 from wagtail.fields import RichTextField
@@ -13,6 +20,9 @@ from wagtail.admin.panels import FieldPanel
 # from .models import Post  # уже есть импорт выше
 from wagtailmetadata.models import MetadataPageMixin
 
+from .counters import record_post_views
+from .page_cache import render_feed_page
+
 User = get_user_model()
 
 # Расширение профиля пользователя (WhatsApp понадобится позже)
@@ -34,8 +44,96 @@ class Profile(models.Model):
         verbose_name_plural = "Профили пользователей для ленты"
 
 
+# Порядок ленты: закреплённые сверху, затем новые; id — для однозначного курсора
+FEED_ORDERING = ('-pinned', '-created_at', '-id')
+
+# Рендишены изображений, которые выводит шаблон feed/post.html
+FEED_IMAGE_FILTERS = ('fill-400x300',)
+
+
+def encode_feed_cursor(post):
+    return f"{int(post.pinned)}|{post.created_at.isoformat()}|{post.pk}"
+
+
+def decode_feed_cursor(value):
+    """Разбирает курсор ленты; при мусоре во входных данных — ValueError."""
+    pinned, created_at, pk = value.split('|')
+    return bool(int(pinned)), datetime.fromisoformat(created_at), int(pk)
+
+
+class PostQuerySet(SearchableQuerySetMixin, models.QuerySet):
+
+    def visible_to(self, user):
+        """
+        Посты, видимые пользователю, — одним SQL-запросом.
+        Правило то же, что в Post.is_visible_to: без групп — видно всем
+        авторизованным, с группами — только членам этих групп.
+        """
+        if not user.is_authenticated:
+            return self.none()
+
+        post_groups = Post.visibility_groups.through.objects.filter(post=OuterRef('pk'))
+        return self.filter(
+            ~Exists(post_groups) | Exists(post_groups.filter(group__user=user))
+        )
+
+    def search_visible_to(self, user, query):
+        """
+        Полнотекстовый поиск по индексу среди постов, видимых пользователю.
+        Поисковый бэкенд не умеет фильтровать по EXISTS, поэтому правило
+        видимости передаётся ему подзапросом id — оно по-прежнему выполняется в SQL.
+        """
+        visible_ids = Post.objects.visible_to(user).values('pk')
+        return self.filter(pk__in=visible_ids).search(query)
+
+    def for_feed(self):
+        """
+        Подгружает всё, что нужно шаблону ленты: автора, изображения с готовыми
+        рендишенами и документы — фиксированное число запросов на страницу.
+        """
+        return self.select_related('author').prefetch_related(
+            Prefetch(
+                'images',
+                queryset=PostImage.objects.prefetch_related(
+                    Prefetch('image', queryset=Image.objects.prefetch_renditions(*FEED_IMAGE_FILTERS))
+                ),
+            ),
+            Prefetch('documents', queryset=PostDocument.objects.select_related('document')),
+        )
+
+    def after(self, cursor):
+        """Посты, идущие в ленте после курсора (keyset по pinned, created_at, id — без OFFSET)."""
+        pinned, created_at, pk = decode_feed_cursor(cursor)
+        return self.filter(
+            Q(pinned__lt=pinned)
+            | Q(pinned=pinned, created_at__lt=created_at)
+            | Q(pinned=pinned, created_at=created_at, pk__lt=pk)
+        )
+
+    def newer_than(self, cursor):
+        """Посты, созданные позже поста из курсора (закреплённость не учитывается)."""
+        _, created_at, pk = decode_feed_cursor(cursor)
+        return self.filter(Q(created_at__gt=created_at) | Q(created_at=created_at, pk__gt=pk))
+
+    def feed_page(self, cursor=None, page_size=None):
+        """
+        Одна страница ленты: (список постов, курсор следующей страницы или None).
+        Без курсора — первая страница, закреплённые посты на ней сверху.
+        """
+        page_size = page_size or settings.FEED_PAGE_SIZE
+        posts = self.order_by(*FEED_ORDERING)
+        if cursor:
+            posts = posts.after(cursor)
+
+        # Берём на один пост больше, чтобы понять, есть ли следующая страница
+        posts = list(posts[:page_size + 1])
+        if len(posts) > page_size:
+            return posts[:page_size], encode_feed_cursor(posts[page_size - 1])
+        return posts, None
+
+
 # Пост в ленте
-class Post(ClusterableModel):
+class Post(index.Indexed, ClusterableModel):
     author = models.ForeignKey(User, on_delete=models.CASCADE, related_name='feed_posts')
     content = models.TextField(verbose_name="Текст поста")
     created_at = models.DateTimeField(auto_now_add=True, verbose_name="Дата создания")
@@ -53,13 +151,37 @@ class Post(ClusterableModel):
         help_text="Если не выбрано — видно всем авторизованным пользователям"
     )
 
-    # Счётчики (лайки и комментарии добавим позже, пока заглушки)
+    # Денормализованные счётчики: лента читает их из поста, без COUNT по связанным таблицам.
+    # Лайки и комментарии меняются атомарно через F() (см. feed/interactions.py)
     views_count = models.PositiveIntegerField(default=0, verbose_name="Просмотры")
     likes_count = models.PositiveIntegerField(default=0, editable=False)
     comments_count = models.PositiveIntegerField(default=0, editable=False)
 
+    # Сколько загруженных вложений ещё обрабатывается в фоне (см. feed/tasks.py)
+    pending_attachments = models.PositiveSmallIntegerField(default=0, editable=False)
+
+    objects = PostQuerySet.as_manager()
+
+    # Полнотекстовый индекс Wagtail: обновляется при сохранении/удалении поста
+    search_fields = [
+        index.SearchField('content'),
+        index.AutocompleteField('content'),
+        index.RelatedFields('author', [
+            index.SearchField('username'),
+            index.SearchField('first_name'),
+            index.SearchField('last_name'),
+        ]),
+        index.FilterField('author'),
+        index.FilterField('id'),
+        index.FilterField('pinned'),
+        index.FilterField('created_at'),
+    ]
+
     class Meta:
-        ordering = ['-pinned', '-created_at']
+        ordering = list(FEED_ORDERING)
+        indexes = [
+            models.Index(fields=list(FEED_ORDERING), name='feed_post_feed_order_idx'),
+        ]
         verbose_name = "Пост в ленте"
         verbose_name_plural = "Посты в ленте"
 
@@ -70,9 +192,7 @@ class Post(ClusterableModel):
     def is_visible_to(self, user):
         if not user.is_authenticated:
             return False
-        if not self.visibility_groups.exists():
-            return True
-        return self.visibility_groups.filter(user=user).exists()
+        return Post.objects.visible_to(user).filter(pk=self.pk).exists()
 
 
 # Изображения к посту (через Wagtail)
@@ -80,6 +200,9 @@ class PostImage(models.Model):
     post = ParentalKey(Post, on_delete=models.CASCADE, related_name='images')
     image = models.ForeignKey(Image, on_delete=models.PROTECT, related_name='+')
 
+    # Обычно их создаёт задача обработки вложений; нужны и после восстановления медиа (base/renditions.py)
+    rendition_filters = {'image': FEED_IMAGE_FILTERS}
+
     class Meta:
         verbose_name = "Изображение поста"
         verbose_name_plural = "Изображения поста"
@@ -95,6 +218,120 @@ class PostDocument(models.Model):
         verbose_name_plural = "Документы поста"
 
 
+# Лайк поста: не больше одного от пользователя
+class PostLike(models.Model):
+    post = models.ForeignKey(Post, on_delete=models.CASCADE, related_name='likes')
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='feed_likes')
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['post', 'user'], name='feed_postlike_unique_user'),
+        ]
+        verbose_name = "Лайк"
+        verbose_name_plural = "Лайки"
+
+    def __str__(self):
+        return f"{self.user} ❤ {self.post_id}"
+
+
+# Комментарий к посту
+class PostComment(models.Model):
+    post = models.ForeignKey(Post, on_delete=models.CASCADE, related_name='comments')
+    author = models.ForeignKey(User, on_delete=models.CASCADE, related_name='feed_comments')
+    content = models.TextField(verbose_name="Текст комментария")
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name="Дата создания")
+
+    class Meta:
+        ordering = ['created_at', 'id']
+        verbose_name = "Комментарий"
+        verbose_name_plural = "Комментарии"
+
+    def __str__(self):
+        return f"Комментарий {self.author} к посту {self.post_id}"
+
+
+# Транзакционный outbox: одна строка на новый пост, пишется в той же транзакции,
+# что и сам пост. Рассылку по подписчикам разворачивает воркер (feed/notifications.py)
+class PostNotification(models.Model):
+    post = models.OneToOneField(Post, on_delete=models.CASCADE, related_name='notification')
+    created_at = models.DateTimeField(auto_now_add=True)
+    expanded_at = models.DateTimeField(null=True, blank=True, verbose_name="Получатели определены")
+
+    class Meta:
+        verbose_name = "Уведомление о посте"
+        verbose_name_plural = "Уведомления о постах"
+
+    def __str__(self):
+        return f"Уведомление о посте {self.post_id}"
+
+
+# Доставка уведомления одному получателю; пара (пост, получатель) уникальна — без дублей
+class WhatsAppDelivery(models.Model):
+    STATUS_PENDING = 'pending'
+    STATUS_SENT = 'sent'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = [
+        (STATUS_PENDING, "В очереди"),
+        (STATUS_SENT, "Отправлено"),
+        (STATUS_FAILED, "Ошибка"),
+    ]
+
+    post = models.ForeignKey(Post, on_delete=models.CASCADE, related_name='whatsapp_deliveries')
+    recipient = models.ForeignKey(User, on_delete=models.CASCADE, related_name='whatsapp_deliveries')
+    phone = models.CharField(max_length=20)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=STATUS_PENDING)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(verbose_name="Следующая попытка")
+    last_error = models.TextField(blank=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['post', 'recipient'], name='feed_whatsappdelivery_unique_recipient'),
+        ]
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at'], name='feed_delivery_due_idx'),
+        ]
+        verbose_name = "Отправка в WhatsApp"
+        verbose_name_plural = "Отправки в WhatsApp"
+
+    def __str__(self):
+        return f"{self.phone}: пост {self.post_id} ({self.status})"
+
+
+# Загрузка вложения по частям (с докачкой); файл сразу пишется в итоговое хранилище
+class ChunkedUpload(models.Model):
+    KIND_CHOICES = [
+        ('image', "Изображение"),
+        ('document', "Документ"),
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='feed_uploads')
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+    filename = models.CharField(max_length=255, verbose_name="Имя файла")
+    file = models.CharField(max_length=255, verbose_name="Путь в хранилище")
+    size = models.PositiveBigIntegerField(verbose_name="Размер")
+    offset = models.PositiveBigIntegerField(default=0, verbose_name="Получено байт")
+    sha1 = models.CharField(max_length=40, blank=True, verbose_name="SHA-1 содержимого")
+    # Кто сейчас дописывает файл (см. feed/uploads.py write_chunk): часть пишется вне транзакции
+    claim = models.UUIDField(null=True, blank=True, editable=False)
+    claimed_at = models.DateTimeField(null=True, blank=True, editable=False)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "Загрузка по частям"
+        verbose_name_plural = "Загрузки по частям"
+
+    def __str__(self):
+        return f"{self.filename} ({self.offset}/{self.size})"
+
+    @property
+    def is_complete(self):
+        return self.offset == self.size
+
 
 class FeedPage(MetadataPageMixin, Page):
     intro = RichTextField(blank=True, verbose_name="Вступительный текст (над лентой)")
@@ -109,20 +346,14 @@ class FeedPage(MetadataPageMixin, Page):
     def get_context(self, request, *args, **kwargs):
         context = super().get_context(request, *args, **kwargs)
 
-        # Все посты, отсортированные (закреплённые сверху)
-        posts = Post.objects.all().order_by('-pinned', '-created_at')
-
         if request.user.is_authenticated:
-            # Фильтруем только видимые для текущего пользователя
-            visible_posts = [post for post in posts if post.is_visible_to(request.user)]
-
-            # Увеличиваем счётчик просмотров для каждого видимого поста
-            for post in visible_posts:
-                post.views_count += 1
-                post.save(update_fields=['views_count'])
-        else:
-            visible_posts = []
+            # Первая страница ленты (закреплённые сверху) — из кеша, если она там есть
+            posts_html, post_ids, newest_cursor = render_feed_page(request.user)
 
-        context["posts"] = visible_posts
+            # Просмотры копятся в буфере и сбрасываются в БД пачками (см. feed/counters.py)
+            record_post_views(post_ids)
+            context["posts_html"] = posts_html
+            context["newest_cursor"] = newest_cursor
+            context["poll_interval"] = settings.FEED_POLL_INTERVAL
         context["feed_page"] = self  # если понадобится в шаблоне
         return context
\ No newline at end of file
@@ -0,0 +1,176 @@
+"""
+Уведомления о новых постах ленты в WhatsApp.
+
+Запрос на создание поста пишет одну строку PostNotification в той же
+транзакции, что и пост, — время публикации не зависит от числа подписчиков
+и от доступности внешнего API. Воркер (manage.py send_whatsapp_notifications)
+разворачивает её в строки WhatsAppDelivery по подписчикам, которым виден пост,
+и отправляет их пачками в несколько потоков, с повторами и растущей паузой.
+Отправитель подключается настройкой FEED_WHATSAPP_SENDER.
+"""
+import json
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from .models import PostNotification, Profile, WhatsAppDelivery
+
+logger = logging.getLogger(__name__)
+
+# Сколько секунд взятая в работу пачка недоступна другим воркерам
+CLAIM_TIMEOUT = 5 * 60
+MAX_RETRY_DELAY = 6 * 60 * 60
+MESSAGE_PREVIEW_LENGTH = 300
+
+
+class WhatsAppSendError(Exception):
+    """Сообщение не отправлено; доставка будет повторена позже."""
+
+
+class BaseWhatsAppSender:
+    """Интерфейс отправителя. Вызывается из нескольких потоков одновременно."""
+
+    def send(self, phone, text):
+        raise NotImplementedError
+
+
+class ConsoleWhatsAppSender(BaseWhatsAppSender):
+    """Для разработки: пишет сообщения в лог."""
+
+    def send(self, phone, text):
+        logger.info("WhatsApp → %s: %s", phone, text)
+
+
+class FileWhatsAppSender(BaseWhatsAppSender):
+    """Для тестов и отладки: дописывает сообщения в JSON Lines файл FEED_WHATSAPP_FILE_PATH."""
+
+    _lock = threading.Lock()
+
+    def send(self, phone, text):
+        line = json.dumps({'phone': phone, 'text': text}, ensure_ascii=False)
+        with self._lock, open(settings.FEED_WHATSAPP_FILE_PATH, 'a', encoding='utf-8') as f:
+            f.write(line + '\n')
+
+
+def get_sender():
+    return import_string(settings.FEED_WHATSAPP_SENDER)()
+
+
+def notify_post_created(post):
+    """Кладёт новый пост в outbox. Вызывать в транзакции, в которой создаётся пост."""
+    PostNotification.objects.get_or_create(post=post)
+
+
+def get_recipients(post):
+    """(id пользователя, номер) подписчиков, которым виден пост, кроме автора."""
+    profiles = (
+        Profile.objects.filter(whatsapp_notifications=True, user__is_active=True)
+        .exclude(whatsapp_number__isnull=True)
+        .exclude(whatsapp_number='')
+        .exclude(user_id=post.author_id)
+    )
+    # То же правило, что в PostQuerySet.visible_to: без групп — видно всем
+    group_ids = list(post.visibility_groups.values_list('pk', flat=True))
+    if group_ids:
+        profiles = profiles.filter(user__groups__in=group_ids).distinct()
+    return profiles.values_list('user_id', 'whatsapp_number')
+
+
+def expand_notifications(limit=100):
+    """Создаёт доставки для ещё не развёрнутых постов. Возвращает число новых доставок."""
+    created = 0
+    pending = PostNotification.objects.filter(expanded_at__isnull=True).select_related('post')
+    for notification in pending.order_by('pk')[:limit]:
+        now = timezone.now()
+        deliveries = [
+            WhatsAppDelivery(post_id=notification.post_id, recipient_id=user_id, phone=phone, next_attempt_at=now)
+            for user_id, phone in get_recipients(notification.post)
+        ]
+        with transaction.atomic():
+            # Уникальная пара (пост, получатель): повторное разворачивание не даёт дублей
+            WhatsAppDelivery.objects.bulk_create(deliveries, batch_size=1000, ignore_conflicts=True)
+            PostNotification.objects.filter(pk=notification.pk).update(expanded_at=now)
+        created += len(deliveries)
+    return created
+
+
+def claim_due_deliveries(batch_size):
+    """Забирает пачку доставок, которым пора уходить, и прячет её от других воркеров на CLAIM_TIMEOUT."""
+    now = timezone.now()
+    with transaction.atomic():
+        due = (
+            WhatsAppDelivery.objects.select_for_update(skip_locked=True)
+            .filter(status=WhatsAppDelivery.STATUS_PENDING, next_attempt_at__lte=now)
+            .order_by('next_attempt_at')
+        )
+        ids = list(due.values_list('pk', flat=True)[:batch_size])
+        WhatsAppDelivery.objects.filter(pk__in=ids).update(next_attempt_at=now + timedelta(seconds=CLAIM_TIMEOUT))
+    return list(WhatsAppDelivery.objects.filter(pk__in=ids).select_related('post__author'))
+
+
+def build_message(post):
+    author = post.author.get_full_name() or post.author.username
+    text = post.content
+    if len(text) > MESSAGE_PREVIEW_LENGTH:
+        text = text[:MESSAGE_PREVIEW_LENGTH].rstrip() + '…'
+    return f"Новый пост в ленте от {author}:\n{text}"
+
+
+def get_retry_delay(attempts):
+    return min(settings.FEED_WHATSAPP_RETRY_DELAY * 2 ** (attempts - 1), MAX_RETRY_DELAY)
+
+
+def dispatch_deliveries(batch_size=None, concurrency=None, sender=None):
+    """
+    Отправляет одну пачку доставок. Потоки только ходят во внешний API,
+    результаты пишутся в БД из основного потока. Возвращает (отправлено, ошибок).
+    """
+    batch_size = batch_size or settings.FEED_WHATSAPP_BATCH_SIZE
+    concurrency = concurrency or settings.FEED_WHATSAPP_CONCURRENCY
+    sender = sender or get_sender()
+
+    deliveries = claim_due_deliveries(batch_size)
+    if not deliveries:
+        return 0, 0
+
+    messages = {}
+    for delivery in deliveries:
+        if delivery.post_id not in messages:
+            messages[delivery.post_id] = build_message(delivery.post)
+
+    def send(delivery):
+        try:
+            sender.send(delivery.phone, messages[delivery.post_id])
+        except Exception as e:
+            logger.warning("WhatsApp: не удалось отправить %s: %s", delivery.phone, e)
+            return delivery, str(e) or e.__class__.__name__
+        return delivery, None
+
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        results = list(executor.map(send, deliveries))
+
+    now = timezone.now()
+    sent_ids = [delivery.pk for delivery, error in results if error is None]
+    WhatsAppDelivery.objects.filter(pk__in=sent_ids).update(
+        status=WhatsAppDelivery.STATUS_SENT, attempts=F('attempts') + 1, sent_at=now, last_error='',
+    )
+
+    failed = [(delivery, error) for delivery, error in results if error is not None]
+    for delivery, error in failed:
+        attempts = delivery.attempts + 1
+        exhausted = attempts >= settings.FEED_WHATSAPP_MAX_ATTEMPTS
+        WhatsAppDelivery.objects.filter(pk=delivery.pk).update(
+            attempts=attempts,
+            last_error=error,
+            status=WhatsAppDelivery.STATUS_FAILED if exhausted else WhatsAppDelivery.STATUS_PENDING,
+            next_attempt_at=now + timedelta(seconds=get_retry_delay(attempts)),
+        )
+
+    return len(sent_ids), len(failed)
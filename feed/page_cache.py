@@ -0,0 +1,115 @@
+"""
+Кеш отрендеренных страниц ленты.
+
+Ключ страницы состоит из глобальной версии ленты (меняется при любом
+изменении постов и их вложений) и подписи видимости — набора групп
+пользователя. Пользователи с одинаковыми группами делят одни и те же
+записи кеша, поэтому в HTML страницы нет ничего персонального: кнопки
+«Редактировать/Удалить» показываются стилями на странице ленты.
+
+Просмотры, лайки и комментарии версию не меняют — иначе под нагрузкой кеш
+сбрасывался бы непрерывно. Счётчики в закешированном HTML могут отставать:
+свежие значения (и состояние лайка пользователя) страница подгружает одним
+запросом к PostCountersView (feed/counters_loader.html).
+"""
+import hashlib
+import time
+from datetime import datetime, timezone
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Max
+from django.template.loader import render_to_string
+from django.utils.safestring import mark_safe
+
+FEED_VERSION_KEY = 'feed:version'
+STATS_KEY_PREFIX = 'feed:page-cache:'
+EPOCH = datetime.fromtimestamp(0, tz=timezone.utc)
+
+
+def get_feed_version():
+    return cache.get_or_set(FEED_VERSION_KEY, time.time_ns, timeout=None)
+
+
+def bump_feed_version(**kwargs):
+    """Инвалидирует все закешированные страницы ленты (годится как обработчик сигналов)."""
+    cache.set(FEED_VERSION_KEY, time.time_ns(), timeout=None)
+
+
+def get_visibility_signature(user):
+    group_ids = sorted(user.groups.values_list('pk', flat=True))
+    return ','.join(map(str, group_ids)) or '-'
+
+
+def _page_key(user, cursor, page_size):
+    raw = f'{get_feed_version()}:{get_visibility_signature(user)}:{cursor or ""}:{page_size}'
+    return 'feed:page:' + hashlib.md5(raw.encode()).hexdigest()
+
+
+def _count(name):
+    key = STATS_KEY_PREFIX + name
+    try:
+        cache.incr(key)
+    except ValueError:
+        if not cache.add(key, 1, timeout=None):
+            cache.incr(key)
+
+
+def get_cache_stats():
+    stats = cache.get_many([STATS_KEY_PREFIX + 'hits', STATS_KEY_PREFIX + 'misses'])
+    return {
+        'hits': stats.get(STATS_KEY_PREFIX + 'hits', 0),
+        'misses': stats.get(STATS_KEY_PREFIX + 'misses', 0),
+    }
+
+
+def reset_cache_stats():
+    cache.delete_many([STATS_KEY_PREFIX + 'hits', STATS_KEY_PREFIX + 'misses'])
+
+
+def render_feed_page(user, cursor=None):
+    """
+    HTML страницы ленты, видимой пользователю, id постов на ней и курсор
+    самого нового поста (для опроса новых постов). При некорректном курсоре — ValueError.
+    """
+    from .models import Post, encode_feed_cursor
+
+    page_size = settings.FEED_PAGE_SIZE
+    key = _page_key(user, cursor, page_size)
+    entry = cache.get(key)
+
+    if entry is None:
+        _count('misses')
+        posts, next_cursor = Post.objects.visible_to(user).for_feed().feed_page(cursor=cursor)
+        entry = {
+            'html': render_to_string('feed/posts_page.html', {
+                'posts': posts,
+                'cursor': cursor,
+                'next_cursor': next_cursor,
+            }),
+            'post_ids': [post.pk for post in posts],
+            'newest_cursor': (
+                encode_feed_cursor(max(posts, key=lambda post: (post.created_at, post.pk))) if posts else None
+            ),
+        }
+        cache.set(key, entry, getattr(settings, 'FEED_PAGE_CACHE_TIMEOUT', 3600))
+    else:
+        _count('hits')
+
+    return mark_safe(entry['html']), entry['post_ids'], entry['newest_cursor']
+
+
+def get_latest_update(user):
+    """
+    Время последнего изменения видимых пользователю постов — для ETag/Last-Modified.
+    Кешируется до смены версии ленты, поэтому опрос без изменений не ходит в БД за постами.
+    """
+    from .models import Post
+
+    raw = f'{get_feed_version()}:{get_visibility_signature(user)}'
+    key = 'feed:latest-update:' + hashlib.md5(raw.encode()).hexdigest()
+    latest = cache.get(key)
+    if latest is None:
+        latest = Post.objects.visible_to(user).aggregate(latest=Max('updated_at'))['latest'] or EPOCH
+        cache.set(key, latest, getattr(settings, 'FEED_PAGE_CACHE_TIMEOUT', 3600))
+    return latest
@@ -0,0 +1,146 @@
+"""
+Фоновая обработка вложений постов ленты (django-tasks, бэкенд "feed").
+
+Запрос только складывает загруженные файлы в хранилище и ставит задачу;
+воркер (python manage.py db_worker --backend feed) создаёт строки
+Image/Document и связи пачками, нормализует фото с телефонов и заранее
+генерирует рендишены, которые выводит лента.
+"""
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import transaction
+from django.db.models import F
+from django.db.models.functions import Greatest
+from django_tasks import task
+from PIL import ExifTags, Image as PILImage, ImageOps
+from wagtail.documents import get_document_model
+from wagtail.images import get_image_model
+from wagtail.search import index
+from wagtail.utils.file import hash_filelike
+
+from .models import FEED_IMAGE_FILTERS, ChunkedUpload, Post, PostDocument, PostImage
+from .page_cache import bump_feed_version
+
+Image = get_image_model()
+Document = get_document_model()
+
+
+def store_upload(model, uploaded_file):
+    """Кладёт загруженный файл сразу туда, где его будет хранить модель; возвращает путь."""
+    field = model._meta.get_field('file')
+    name = field.generate_filename(model(), uploaded_file.name)
+    return field.storage.save(name, uploaded_file)
+
+
+def enqueue_post_attachments(post, image_files, document_files, uploads=()):
+    """
+    Сохраняет файлы и ставит их обработку в очередь. Пост сразу виден в ленте,
+    вместо вложений — заглушки (по счётчику pending_attachments).
+    uploads — завершённые ChunkedUpload: их файлы уже на месте и не копируются.
+    """
+    images = [[store_upload(Image, f), f.name, ''] for f in image_files]
+    documents = [[store_upload(Document, f), f.name, ''] for f in document_files]
+    for upload in uploads:
+        target = images if upload.kind == 'image' else documents
+        target.append([upload.file, upload.filename, upload.sha1])
+    # Файлы переходят посту — сами записи о загрузке больше не нужны
+    ChunkedUpload.objects.filter(pk__in=[upload.pk for upload in uploads]).delete()
+    count = len(images) + len(documents)
+    if not count:
+        return
+
+    Post.objects.filter(pk=post.pk).update(pending_attachments=F('pending_attachments') + count)
+    post.pending_attachments += count
+    process_post_attachments.enqueue(post.pk, images, documents)
+
+
+def normalize_image(storage, path):
+    """
+    Поворачивает фото по EXIF и уменьшает до FEED_IMAGE_MAX_SIZE по длинной стороне.
+    Возвращает (путь, ширина, высота, был ли файл перезаписан).
+    """
+    max_size = getattr(settings, 'FEED_IMAGE_MAX_SIZE', 2560)
+
+    with storage.open(path) as f:
+        original = PILImage.open(f)
+        original.load()
+
+    rotated = original.getexif().get(ExifTags.Base.Orientation, 1) != 1
+    if not rotated and max(original.size) <= max_size:
+        return path, original.width, original.height, False
+
+    image = ImageOps.exif_transpose(original)
+    image.thumbnail((max_size, max_size))
+    image_format = original.format or 'JPEG'
+    if image_format == 'JPEG' and image.mode not in ('RGB', 'L'):
+        image = image.convert('RGB')
+
+    buffer = BytesIO()
+    image.save(buffer, format=image_format, quality=85)
+    storage.delete(path)
+    return storage.save(path, ContentFile(buffer.getvalue())), image.width, image.height, True
+
+
+def _file_metadata(storage, path, file_hash=''):
+    """Размер и SHA-1 файла; хэш, посчитанный при загрузке по частям, не пересчитывается."""
+    if file_hash:
+        return storage.size(path), file_hash
+    with storage.open(path) as f:
+        return storage.size(path), hash_filelike(f)
+
+
+@task(backend='feed')
+def process_post_attachments(post_id, images, documents):
+    """Создаёт вложения поста пачками и генерирует рендишены для ленты."""
+    image_storage = Image._meta.get_field('file').storage
+    document_storage = Document._meta.get_field('file').storage
+
+    if not Post.objects.filter(pk=post_id).exists():
+        # Пост удалили раньше, чем дошла очередь, — файлы больше не нужны
+        for path, *_ in images:
+            image_storage.delete(path)
+        for path, *_ in documents:
+            document_storage.delete(path)
+        return
+
+    try:
+        image_rows = []
+        for path, title, file_hash in images:
+            path, width, height, rewritten = normalize_image(image_storage, path)
+            if rewritten:
+                file_hash = ''  # хэш загрузки относится к исходному файлу
+            file_size, file_hash = _file_metadata(image_storage, path, file_hash)
+            image_rows.append(Image(
+                title=title, file=path, width=width, height=height,
+                file_size=file_size, file_hash=file_hash,
+            ))
+
+        document_rows = []
+        for path, title, file_hash in documents:
+            file_size, file_hash = _file_metadata(document_storage, path, file_hash)
+            document_rows.append(Document(title=title, file=path, file_size=file_size, file_hash=file_hash))
+
+        with transaction.atomic():
+            Image.objects.bulk_create(image_rows)
+            Document.objects.bulk_create(document_rows)
+
+            # MySQL не возвращает id из bulk_create — перечитываем созданные строки по путям
+            image_rows = list(Image.objects.filter(file__in=[row.file.name for row in image_rows]))
+            document_rows = list(Document.objects.filter(file__in=[row.file.name for row in document_rows]))
+
+            PostImage.objects.bulk_create(PostImage(post_id=post_id, image=image) for image in image_rows)
+            PostDocument.objects.bulk_create(PostDocument(post_id=post_id, document=doc) for doc in document_rows)
+
+        for obj in image_rows + document_rows:
+            index.insert_or_update_object(obj)
+
+        # Первый просмотр ленты не должен ждать Pillow
+        for image in image_rows:
+            image.get_renditions(*FEED_IMAGE_FILTERS)
+    finally:
+        Post.objects.filter(pk=post_id).update(
+            pending_attachments=Greatest(F('pending_attachments') - len(images) - len(documents), 0)
+        )
+        bump_feed_version()
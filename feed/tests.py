@@ -1,3 +1,719 @@
-from django.test import TestCase
+import hashlib
+import io
+import json
+import os
+import tempfile
+import uuid
+from datetime import timedelta
 
-# Create your tests here.
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import AnonymousUser, Group
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from wagtail.documents.models import Document
+from wagtail.images.models import Image
+from wagtail.images.tests.utils import get_test_image_file
+
+from feed.benchmark import get_feed_page, seed_members, seed_posts
+from feed.counters import SEQ_KEY, _batch_key, flush_post_views, push_pending_views, record_post_views
+from feed.interactions import add_comment, delete_comment, reconcile_post_counters, set_post_like
+from feed.models import (
+    ChunkedUpload, Post, PostComment, PostDocument, PostImage, PostLike, Profile,
+    WhatsAppDelivery,
+)
+from feed.notifications import BaseWhatsAppSender, dispatch_deliveries, expand_notifications
+from feed.page_cache import get_cache_stats, render_feed_page
+from feed.uploads import HASHERS_LIMIT, UploadInProgress, UploadOffsetMismatch, _hashers, write_chunk
+
+User = get_user_model()
+
+IMMEDIATE_TASKS = {'BACKEND': 'django_tasks.backends.immediate.ImmediateBackend'}
+
+
+class PostVisibilityTests(TestCase):
+    """
+    Tests for the set-based Post.objects.visible_to() queryset.
+    """
+
+    def setUp(self):
+        self.group = Group.objects.create(name="Members")
+        self.member = User.objects.create_user(username="member", password="x")
+        self.member.groups.add(self.group)
+        self.outsider = User.objects.create_user(username="outsider", password="x")
+
+        self.public_post = Post.objects.create(author=self.member, content="public")
+        self.group_post = Post.objects.create(author=self.member, content="group")
+        self.group_post.visibility_groups.set([self.group])
+
+    def test_anonymous_sees_nothing(self):
+        self.assertFalse(Post.objects.visible_to(AnonymousUser()).exists())
+
+    def test_member_sees_public_and_group_posts(self):
+        visible = set(Post.objects.visible_to(self.member))
+        self.assertEqual(visible, {self.public_post, self.group_post})
+
+    def test_outsider_sees_only_public_posts(self):
+        visible = list(Post.objects.visible_to(self.outsider))
+        self.assertEqual(visible, [self.public_post])
+
+    def test_single_query_without_duplicates(self):
+        other_group = Group.objects.create(name="Others")
+        self.member.groups.add(other_group)
+        self.group_post.visibility_groups.add(other_group)
+
+        with self.assertNumQueries(1):
+            posts = list(Post.objects.visible_to(self.member).order_by('-pinned', '-created_at')[:10])
+        self.assertEqual(len(posts), 2)
+
+    def test_is_visible_to_matches_queryset(self):
+        self.assertTrue(self.group_post.is_visible_to(self.member))
+        self.assertFalse(self.group_post.is_visible_to(self.outsider))
+        self.assertTrue(self.public_post.is_visible_to(self.outsider))
+
+
+class PostViewCounterTests(TestCase):
+    """
+    Tests for buffered, batched view counters.
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create_user(username="author", password="x")
+        self.posts = [Post.objects.create(author=self.author, content=str(i)) for i in range(3)]
+
+    def test_feed_requests_do_not_write_views(self):
+        with self.assertNumQueries(0):
+            record_post_views(post.pk for post in self.posts)
+            # Накопленное уходит пачкой в кеш, не в БД
+            push_pending_views(force=True)
+        self.assertEqual(Post.objects.filter(views_count__gt=0).count(), 0)
+
+    def test_flush_applies_grouped_increments(self):
+        record_post_views(post.pk for post in self.posts)
+        record_post_views([self.posts[0].pk])
+
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(flush_post_views(), 3)
+        # По одному UPDATE на каждый прирост (+2 и +1), без чтения таблицы постов
+        self.assertEqual(len([q for q in queries if 'feed_post' in q['sql']]), 2)
+        self.assertTrue(all(q['sql'].startswith('UPDATE') for q in queries if 'feed_post' in q['sql']))
+        counts = dict(Post.objects.values_list('pk', 'views_count'))
+        self.assertEqual(counts, {self.posts[0].pk: 2, self.posts[1].pk: 1, self.posts[2].pk: 1})
+
+        # Повторный сброс ничего не добавляет и в БД не ходит
+        with self.assertNumQueries(0):
+            self.assertEqual(flush_post_views(), 0)
+
+    def test_command_sees_views_pushed_by_other_workers(self):
+        record_post_views([self.posts[1].pk] * 5)
+        push_pending_views(force=True)
+        record_post_views([self.posts[1].pk])
+        push_pending_views(force=True)
+
+        out = io.StringIO()
+        call_command('flush_post_views', stdout=out)
+        self.assertIn("Обновлено постов: 1", out.getvalue())
+        self.assertEqual(Post.objects.get(pk=self.posts[1].pk).views_count, 6)
+
+    def test_late_batch_is_picked_up_by_next_flush(self):
+        # Номер пачки уже выдан, а сама пачка ещё не записана
+        cache.set(SEQ_KEY, 1)
+        self.assertEqual(flush_post_views(), 0)
+        cache.set(_batch_key(1), {self.posts[0].pk: 4})
+        self.assertEqual(flush_post_views(), 1)
+        self.assertEqual(Post.objects.get(pk=self.posts[0].pk).views_count, 4)
+
+    def test_views_of_deleted_post_are_dropped(self):
+        record_post_views([self.posts[2].pk])
+        push_pending_views(force=True)
+        self.posts[2].delete()
+        self.assertEqual(flush_post_views(), 1)
+        self.assertEqual(flush_post_views(), 0)
+
+
+@override_settings(FEED_PAGE_SIZE=2)
+class FeedPaginationTests(TestCase):
+    """
+    Tests for keyset pagination of the feed.
+    """
+
+    def setUp(self):
+        self.user = User.objects.create_user(username="reader", password="x")
+        self.posts = [Post.objects.create(author=self.user, content=str(i)) for i in range(5)]
+        self.pinned = self.posts[0]
+        self.pinned.pinned = True
+        self.pinned.save()
+
+    def test_pages_cover_feed_without_gaps(self):
+        seen = []
+        cursor = None
+        while True:
+            posts, cursor = Post.objects.visible_to(self.user).feed_page(cursor=cursor)
+            seen.extend(posts)
+            if not cursor:
+                break
+
+        self.assertEqual(seen[0], self.pinned)
+        self.assertEqual(seen, list(Post.objects.visible_to(self.user)))
+
+    def test_load_more_endpoint(self):
+        self.client.force_login(self.user)
+        _, cursor = Post.objects.visible_to(self.user).feed_page()
+
+        response = self.client.get(reverse('feed:post_list'), {'cursor': cursor})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.context['posts']), 2)
+
+        response = self.client.get(reverse('feed:post_list'), {'cursor': 'garbage'})
+        self.assertEqual(response.status_code, 400)
+
+
+class PostMutationFragmentTests(TestCase):
+    """
+    Tests that HTMX create/update/delete respond with a single post fragment.
+    """
+
+    def setUp(self):
+        self.user = User.objects.create_user(username="writer", password="x")
+        self.client.force_login(self.user)
+        self.others = [Post.objects.create(author=self.user, content=f"other {i}") for i in range(3)]
+
+    def test_create_returns_only_new_post(self):
+        response = self.client.post(reverse('feed:post_create'), {'content': 'new'}, HTTP_HX_REQUEST='true')
+        post = Post.objects.get(content='new')
+        self.assertTemplateUsed(response, 'feed/post.html')
+        self.assertTemplateNotUsed(response, 'feed/posts_list.html')
+        self.assertContains(response, f'id="post-{post.pk}"')
+        self.assertContains(response, '<article', count=1)
+
+    def test_update_returns_only_updated_post(self):
+        post = self.others[0]
+        response = self.client.post(
+            reverse('feed:post_update', args=[post.pk]), {'content': 'edited'}, HTTP_HX_REQUEST='true'
+        )
+        self.assertContains(response, 'edited')
+        self.assertContains(response, '<article', count=1)
+
+    def test_invalid_form_goes_back_to_modal(self):
+        for url in (reverse('feed:post_create'), reverse('feed:post_update', args=[self.others[0].pk])):
+            response = self.client.post(url, {'content': ''}, HTTP_HX_REQUEST='true')
+            self.assertEqual(response.status_code, 422)
+            self.assertEqual(response['HX-Retarget'], '#modal-body')
+            self.assertEqual(response['HX-Reswap'], 'innerHTML')
+            self.assertTemplateUsed(response, 'feed/post_form.html')
+        self.assertEqual(Post.objects.count(), 3)
+
+    def test_delete_returns_empty_fragment(self):
+        post = self.others[0]
+        response = self.client.post(reverse('feed:post_delete', args=[post.pk]), HTTP_HX_REQUEST='true')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.content, b'')
+        self.assertFalse(Post.objects.filter(pk=post.pk).exists())
+
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp(), FEED_PAGE_SIZE=50)
+class FeedEagerLoadingTests(TestCase):
+    """
+    Tests that the number of queries for a feed page does not depend on its size.
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username="viewer", password="x")
+        self.client.force_login(self.user)
+
+    def add_posts(self, count):
+        for i in range(count):
+            post = Post.objects.create(author=self.user, content=f"post {i}")
+            image = Image.objects.create(title=f"image {i}", file=get_test_image_file())
+            PostImage.objects.create(post=post, image=image)
+            document = Document.objects.create(title=f"doc {i}", file=ContentFile(b"data", name="doc.txt"))
+            PostDocument.objects.create(post=post, document=document)
+
+    def count_page_queries(self):
+        url = reverse('feed:post_list')
+        self.client.get(url)  # первый рендер создаёт рендишены
+        cache.clear()  # меряем рендер, а не попадание в кеш страниц
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(queries)
+
+    def test_queries_do_not_grow_with_posts(self):
+        self.add_posts(2)
+        small = self.count_page_queries()
+        self.add_posts(8)
+        self.assertEqual(self.count_page_queries(), small)
+
+
+class FeedPageCacheTests(TestCase):
+    """
+    Tests for the version-stamped, group-keyed feed page cache.
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.group = Group.objects.create(name="Members")
+        self.first = User.objects.create_user(username="first", password="x")
+        self.second = User.objects.create_user(username="second", password="x")
+        self.outsider = User.objects.create_user(username="outsider", password="x")
+        for user in (self.first, self.second):
+            user.groups.add(self.group)
+        self.post = Post.objects.create(author=self.first, content="hello")
+        self.post.visibility_groups.set([self.group])
+
+    def test_users_with_same_groups_share_entries(self):
+        render_feed_page(self.first)
+        with self.assertNumQueries(1):  # только группы пользователя
+            html, post_ids, _ = render_feed_page(self.second)
+        self.assertEqual(post_ids, [self.post.pk])
+        self.assertEqual(get_cache_stats(), {'hits': 1, 'misses': 1})
+
+        _, post_ids, _ = render_feed_page(self.outsider)
+        self.assertEqual(post_ids, [])
+
+    def test_post_changes_invalidate_pages(self):
+        render_feed_page(self.first)
+        self.post.content = "changed"
+        self.post.save()
+
+        html, _, _ = render_feed_page(self.second)
+        self.assertIn("changed", html)
+        self.assertEqual(get_cache_stats()['misses'], 2)
+
+    def test_counter_changes_keep_pages(self):
+        html, _, _ = render_feed_page(self.first)
+        self.assertIn(reverse('feed:post_counters'), html)
+
+        set_post_like(self.post, self.second, liked=True)
+        comment = add_comment(self.post, self.second, "hi")
+        delete_comment(comment)
+        record_post_views([self.post.pk])
+        flush_post_views()
+
+        render_feed_page(self.second)
+        self.assertEqual(get_cache_stats(), {'hits': 1, 'misses': 1})
+
+    def test_counters_view_returns_fresh_values_and_like_state(self):
+        hidden = Post.objects.create(author=self.outsider, content="hidden")
+        hidden.visibility_groups.set([Group.objects.create(name="Others")])
+        set_post_like(self.post, self.second, liked=True)
+        self.client.force_login(self.second)
+
+        response = self.client.get(reverse('feed:post_counters'), {'ids': f'{self.post.pk},{hidden.pk}'})
+        self.assertContains(response, f'id="post-{self.post.pk}-counters" hx-swap-oob="true"')
+        self.assertContains(response, '❤️ 1')
+        self.assertContains(response, 'text-red-600 font-medium')
+        self.assertNotContains(response, f'post-{hidden.pk}-counters')
+
+        response = self.client.get(reverse('feed:post_counters'), {'ids': 'garbage'})
+        self.assertEqual(response.status_code, 400)
+
+
+@override_settings(
+    MEDIA_ROOT=tempfile.mkdtemp(),
+    FEED_IMAGE_MAX_SIZE=100,
+    TASKS={'default': IMMEDIATE_TASKS, 'feed': IMMEDIATE_TASKS},
+)
+class PostAttachmentTaskTests(TestCase):
+    """
+    Tests for background processing of uploaded feed attachments.
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username="uploader", password="x")
+        self.client.force_login(self.user)
+
+    def test_upload_creates_attachments_and_renditions(self):
+        image = SimpleUploadedFile("photo.png", get_test_image_file(size=(640, 480)).file.getvalue())
+        document = SimpleUploadedFile("notes.txt", b"hello")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(
+                reverse('feed:post_create'),
+                {'content': 'with files', 'images': [image], 'documents': [document]},
+                HTTP_HX_REQUEST='true',
+            )
+
+        post = Post.objects.get(content='with files')
+        self.assertEqual(post.pending_attachments, 0)
+        self.assertEqual(post.documents.get().document.title, "notes.txt")
+
+        stored = post.images.get().image
+        self.assertEqual((stored.width, stored.height), (100, 75))
+        self.assertTrue(stored.renditions.filter(filter_spec='fill-400x300').exists())
+
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp(), TASKS={'default': IMMEDIATE_TASKS, 'feed': IMMEDIATE_TASKS})
+class ChunkedUploadTests(TestCase):
+    """
+    Tests for resumable chunked uploads.
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username="mobile", password="x")
+        self.client.force_login(self.user)
+        self.content = b"0123456789" * 10
+
+    def send_chunk(self, upload_id, offset, data):
+        return self.client.patch(
+            reverse('feed:upload_chunk', args=[upload_id]), data,
+            content_type='application/octet-stream', headers={'Upload-Offset': str(offset)},
+        )
+
+    def test_resume_and_attach(self):
+        response = self.client.post(
+            reverse('feed:upload_start'), {'kind': 'document', 'filename': 'big.pdf', 'size': len(self.content)}
+        )
+        self.assertEqual(response.status_code, 201)
+        upload_id = response.json()['id']
+
+        self.send_chunk(upload_id, 0, self.content[:40])
+        # Повтор с устаревшим смещением — сервер подсказывает, откуда продолжать
+        response = self.send_chunk(upload_id, 0, self.content[:40])
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.json()['offset'], 40)
+
+        offset = self.client.get(reverse('feed:upload_chunk', args=[upload_id])).json()['offset']
+        response = self.send_chunk(upload_id, offset, self.content[offset:])
+        self.assertTrue(response.json()['complete'])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse('feed:post_create'), {'content': 'chunked', 'uploads': [upload_id]})
+
+        document = Post.objects.get(content='chunked').documents.get().document
+        self.assertEqual(document.file.read(), self.content)
+        self.assertEqual(document.file_hash, hashlib.sha1(self.content).hexdigest())
+        self.assertFalse(ChunkedUpload.objects.exists())
+
+    def start(self, size=None):
+        response = self.client.post(
+            reverse('feed:upload_start'), {'kind': 'document', 'filename': 'big.pdf', 'size': size or len(self.content)}
+        )
+        return response.json()['id']
+
+    def test_chunk_is_written_outside_the_row_lock(self):
+        upload_id = self.start()
+        test = self
+
+        class SlowClient(io.BytesIO):
+            def read(self, size=-1):
+                # Пока часть пишется, строка не заблокирована, а параллельная часть получает 409
+                with test.assertRaises(UploadInProgress):
+                    write_chunk(upload_id, 0, io.BytesIO(b'x'))
+                return super().read(size)
+
+        upload = write_chunk(upload_id, 0, SlowClient(self.content[:40]))
+        self.assertEqual(upload.offset, 40)
+        written = ChunkedUpload.objects.get(pk=upload_id)
+        self.assertEqual((written.offset, written.claim), (40, None))
+
+        ChunkedUpload.objects.filter(pk=upload_id).update(claim=uuid.uuid4(), claimed_at=timezone.now())
+        response = self.send_chunk(upload_id, 40, self.content[40:])
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response['Retry-After'], '5')
+
+    def test_abandoned_claim_is_taken_over(self):
+        upload_id = self.start()
+        stale = timezone.now() - timedelta(seconds=settings.FEED_UPLOAD_CLAIM_TIMEOUT + 1)
+        ChunkedUpload.objects.filter(pk=upload_id).update(claim=uuid.uuid4(), claimed_at=stale)
+
+        class TakenOver(io.BytesIO):
+            def read(self, size=-1):
+                # Пока мы пишем, нашу отметку перехватили
+                ChunkedUpload.objects.filter(pk=upload_id).update(claim=uuid.uuid4())
+                return super().read(size)
+
+        with self.assertRaises(UploadOffsetMismatch):
+            write_chunk(upload_id, 0, TakenOver(self.content[:40]))
+        self.assertEqual(ChunkedUpload.objects.get(pk=upload_id).offset, 0)
+
+        ChunkedUpload.objects.filter(pk=upload_id).update(claim=None)
+        self.assertTrue(write_chunk(upload_id, 0, io.BytesIO(self.content)).is_complete)
+
+    def test_partial_hashes_are_bounded(self):
+        for _ in range(HASHERS_LIMIT + 3):
+            write_chunk(self.start(), 0, io.BytesIO(self.content[:10]))
+        self.assertEqual(len(_hashers), HASHERS_LIMIT)
+
+    def test_rejects_disallowed_extension(self):
+        response = self.client.post(
+            reverse('feed:upload_start'), {'kind': 'document', 'filename': 'run.exe', 'size': 10}
+        )
+        self.assertEqual(response.status_code, 400)
+
+
+class NewPostsPollingTests(TestCase):
+    """
+    Tests for the conditional "new posts since" polling endpoint.
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.reader = User.objects.create_user(username="reader", password="x")
+        self.writer = User.objects.create_user(username="writer", password="x")
+        self.client.force_login(self.reader)
+        self.post = Post.objects.create(author=self.writer, content="first")
+
+    def test_unchanged_feed_returns_not_modified(self):
+        _, _, since = render_feed_page(self.reader)
+        url = reverse('feed:new_posts')
+        response = self.client.get(url, {'since': since})
+        self.assertEqual(response.status_code, 200)
+        self.assertNotContains(response, '<article')
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, {'since': since}, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 304)
+        self.assertFalse([q for q in queries if 'feed_post' in q['sql']])
+
+    def test_returns_only_new_posts_of_others(self):
+        _, _, since = render_feed_page(self.reader)
+        Post.objects.create(author=self.reader, content="mine")
+        new_post = Post.objects.create(author=self.writer, content="fresh")
+
+        response = self.client.get(reverse('feed:new_posts'), {'since': since})
+        self.assertEqual(list(response.context['posts']), [new_post])
+        self.assertContains(response, 'hx-swap-oob="true"')
+
+        response = self.client.get(reverse('feed:new_posts'), {'since': 'garbage'})
+        self.assertEqual(response.status_code, 400)
+
+
+class PostLikesAndCommentsTests(TestCase):
+    """
+    Tests for likes and comments with denormalised counters on Post.
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username="fan", password="x")
+        self.client.force_login(self.user)
+        self.post = Post.objects.create(author=self.user, content="likeable")
+
+    def test_like_is_idempotent(self):
+        url = reverse('feed:post_like', args=[self.post.pk])
+        for _ in range(2):
+            response = self.client.post(url, {'liked': '1'}, HTTP_HX_REQUEST='true')
+        self.assertTemplateUsed(response, 'feed/post_counters.html')
+        self.assertContains(response, '❤️ 1')
+        self.assertEqual(PostLike.objects.count(), 1)
+        # Кнопка в ответе шлёт следующее состояние явно — повтор того же запроса не снимет лайк
+        self.assertContains(response, """hx-vals='{"liked": "0"}'""")
+        self.assertContains(response, 'aria-pressed="true"')
+
+        self.client.post(url)  # без параметра — переключение
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.likes_count, 0)
+        self.assertFalse(set_post_like(self.post, self.user, liked=False))
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.likes_count, 0)
+
+    def test_comment_create_and_delete_update_counter(self):
+        url = reverse('feed:post_comments', args=[self.post.pk])
+        set_post_like(self.post, self.user, liked=True)
+        response = self.client.post(url, {'content': 'nice'}, HTTP_HX_REQUEST='true')
+        self.assertContains(response, '💬 1')
+        self.assertContains(response, 'aria-pressed="true"')  # лайк не «теряется» при обновлении счётчиков
+        self.assertContains(response, 'hx-swap-oob="beforeend:')
+
+        comment = PostComment.objects.get()
+        response = self.client.post(reverse('feed:comment_delete', args=[comment.pk]), HTTP_HX_REQUEST='true')
+        self.assertContains(response, '💬 0')
+        self.assertFalse(PostComment.objects.exists())
+
+    def test_reconcile_fixes_drift(self):
+        PostLike.objects.create(post=self.post, user=self.user)
+        PostComment.objects.create(post=self.post, author=self.user, content="raw")
+        Post.objects.filter(pk=self.post.pk).update(comments_count=5)
+
+        self.assertEqual(reconcile_post_counters(), 1)
+        self.post.refresh_from_db()
+        self.assertEqual((self.post.likes_count, self.post.comments_count), (1, 1))
+        self.assertEqual(reconcile_post_counters(), 0)
+
+
+class FailingWhatsAppSender(BaseWhatsAppSender):
+    def send(self, phone, text):
+        raise ConnectionError("API недоступен")
+
+
+@override_settings(
+    FEED_WHATSAPP_SENDER='feed.notifications.FileWhatsAppSender',
+    FEED_WHATSAPP_FILE_PATH=os.path.join(tempfile.mkdtemp(), 'outbox.jsonl'),
+)
+class WhatsAppOutboxTests(TestCase):
+    """
+    Tests for the transactional WhatsApp notification outbox.
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create_user(username="author", password="x")
+        self.subscribers = []
+        for i in range(3):
+            user = User.objects.create_user(username=f"sub{i}", password="x")
+            Profile.objects.filter(user=user).update(whatsapp_number=f"+7700000000{i}", whatsapp_notifications=True)
+            self.subscribers.append(user)
+        User.objects.create_user(username="silent", password="x")
+        self.client.force_login(self.author)
+
+    def create_post(self):
+        self.client.post(reverse('feed:post_create'), {'content': 'news'}, HTTP_HX_REQUEST='true')
+        return Post.objects.get(content='news')
+
+    def test_posting_does_not_depend_on_subscribers(self):
+        with CaptureQueriesContext(connection) as few:
+            self.client.post(reverse('feed:post_create'), {'content': 'first'}, HTTP_HX_REQUEST='true')
+        for i in range(3, 10):
+            user = User.objects.create_user(username=f"sub{i}", password="x")
+            Profile.objects.filter(user=user).update(whatsapp_number="+77000000001", whatsapp_notifications=True)
+        with CaptureQueriesContext(connection) as many:
+            self.client.post(reverse('feed:post_create'), {'content': 'second'}, HTTP_HX_REQUEST='true')
+        self.assertEqual(len(many), len(few))
+        self.assertFalse(WhatsAppDelivery.objects.exists())
+
+    def test_worker_delivers_once(self):
+        post = self.create_post()
+        self.assertEqual(expand_notifications(), 3)
+        self.assertEqual(expand_notifications(), 0)
+
+        self.assertEqual(dispatch_deliveries(batch_size=2, concurrency=2), (2, 0))
+        self.assertEqual(dispatch_deliveries(batch_size=2, concurrency=2), (1, 0))
+        self.assertEqual(dispatch_deliveries(), (0, 0))
+
+        with open(settings.FEED_WHATSAPP_FILE_PATH, encoding='utf-8') as f:
+            lines = [json.loads(line) for line in f]
+        self.assertEqual(sorted(line['phone'] for line in lines), ["+77000000000", "+77000000001", "+77000000002"])
+        self.assertIn("news", lines[0]['text'])
+        self.assertEqual(post.whatsapp_deliveries.filter(status=WhatsAppDelivery.STATUS_SENT).count(), 3)
+
+    @override_settings(FEED_WHATSAPP_MAX_ATTEMPTS=2)
+    def test_failures_are_retried_with_backoff(self):
+        self.create_post()
+        expand_notifications()
+
+        with self.assertLogs('feed.notifications', 'WARNING'):
+            self.assertEqual(dispatch_deliveries(sender=FailingWhatsAppSender()), (0, 3))
+        delivery = WhatsAppDelivery.objects.first()
+        self.assertEqual(delivery.attempts, 1)
+        self.assertEqual(delivery.status, WhatsAppDelivery.STATUS_PENDING)
+        self.assertEqual(dispatch_deliveries(sender=FailingWhatsAppSender()), (0, 0))  # ещё рано
+
+        WhatsAppDelivery.objects.update(next_attempt_at=delivery.next_attempt_at - timedelta(days=1))
+        with self.assertLogs('feed.notifications', 'WARNING'):
+            dispatch_deliveries(sender=FailingWhatsAppSender())
+        self.assertEqual(WhatsAppDelivery.objects.filter(status=WhatsAppDelivery.STATUS_FAILED).count(), 3)
+
+
+class PostSearchTests(TestCase):
+    """
+    Tests for index-backed, visibility-aware search over feed posts.
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.group = Group.objects.create(name="Members")
+        self.member = User.objects.create_user(username="member", password="x")
+        self.member.groups.add(self.group)
+        self.outsider = User.objects.create_user(username="outsider", password="x")
+
+        # Индекс обновляется после коммита транзакции
+        with self.captureOnCommitCallbacks(execute=True):
+            self.public_post = Post.objects.create(author=self.member, content="vineyard harvest report")
+            self.group_post = Post.objects.create(author=self.member, content="secret harvest plans")
+            Post.objects.create(author=self.member, content="unrelated")
+        self.group_post.visibility_groups.set([self.group])
+
+    def test_search_applies_visibility(self):
+        self.assertEqual(
+            set(Post.objects.search_visible_to(self.member, "harvest")), {self.public_post, self.group_post}
+        )
+        self.assertEqual(list(Post.objects.search_visible_to(self.outsider, "harvest")), [self.public_post])
+
+    def test_search_endpoint(self):
+        self.client.force_login(self.outsider)
+        response = self.client.get(reverse('feed:post_search'), {'q': 'harvest'})
+        self.assertEqual(list(response.context['page']), [self.public_post])
+        self.assertContains(response, '<article', count=1)
+
+    def test_admin_search_uses_index(self):
+        admin = User.objects.create_superuser(username="admin", password="x")
+        self.client.force_login(admin)
+        response = self.client.get(reverse('feed_posts:index'), {'q': 'harvest'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            set(response.context['object_list']), {self.public_post, self.group_post}
+        )
+
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp(), FEED_PAGE_SIZE=20)
+class FeedQueryBudgetTests(TestCase):
+    """
+    Query budgets for the main feed paths: fail when a change adds queries.
+    """
+
+    # Потолки SQL-запросов на один запрос к ленте (с сессией и авторизацией)
+    FEED_PAGE_BUDGET = 23
+    LOAD_MORE_BUDGET = 11
+    CREATE_BUDGET = 17
+    UPDATE_BUDGET = 11
+    DELETE_BUDGET = 21
+
+    @classmethod
+    def setUpTestData(cls):
+        members, groups = seed_members(users=5, groups=2, seed=1)
+        seed_posts(members, groups, posts=45, seed=1)
+        cls.user = members[0]
+        cls.feed_url = get_feed_page().url
+
+    def setUp(self):
+        cache.clear()
+        # Просмотры, накопленные прошлыми тестами, дописываются в буфер после ответа — не в счёт бюджета
+        flush_post_views()
+        self.client.force_login(self.user)
+        self.htmx = {'HTTP_HX_REQUEST': 'true'}
+
+    def assertMaxQueries(self, budget, request):
+        with CaptureQueriesContext(connection) as queries:
+            response = request()
+        self.assertLess(response.status_code, 400)
+        self.assertLessEqual(len(queries), budget, f"{len(queries)} queries, budget is {budget}")
+
+    def test_seeded_members_cannot_log_in(self):
+        self.assertFalse(self.user.has_usable_password())
+        self.assertFalse(self.client.login(username=self.user.username, password='seed'))
+
+    def test_feed_page(self):
+        self.client.get(self.feed_url)  # рендишены создаются один раз
+        cache.clear()
+        self.assertMaxQueries(self.FEED_PAGE_BUDGET, lambda: self.client.get(self.feed_url))
+
+    def test_load_more(self):
+        _, cursor = Post.objects.visible_to(self.user).feed_page()
+        url = reverse('feed:post_list')
+        self.client.get(url, {'cursor': cursor})
+        cache.clear()
+        self.assertMaxQueries(self.LOAD_MORE_BUDGET, lambda: self.client.get(url, {'cursor': cursor}))
+
+    def test_create_update_delete(self):
+        self.assertMaxQueries(self.CREATE_BUDGET, lambda: self.client.post(
+            reverse('feed:post_create'), {'content': 'budget'}, **self.htmx
+        ))
+        post = Post.objects.get(content='budget')
+        self.assertMaxQueries(self.UPDATE_BUDGET, lambda: self.client.post(
+            reverse('feed:post_update', args=[post.pk]), {'content': 'budget edited'}, **self.htmx
+        ))
+        self.assertMaxQueries(self.DELETE_BUDGET, lambda: self.client.post(
+            reverse('feed:post_delete', args=[post.pk]), **self.htmx
+        ))
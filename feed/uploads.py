@@ -0,0 +1,144 @@
+"""
+Загрузка вложений ленты по частям с докачкой.
+
+Файл резервируется сразу в итоговом хранилище модели (original_images/,
+documents/), каждая часть дописывается в него потоком, SHA-1 считается
+по ходу записи. Готовая загрузка прикрепляется к посту без повторного
+копирования — через ту же фоновую обработку, что и обычные вложения.
+Дописывание требует локального хранилища (FileSystemStorage.path()).
+
+Часть может идти долго (медленный клиент, сотни мегабайт), поэтому под
+блокировкой строки только проверяется смещение и ставится отметка
+«пишу» (claim); сам файл пишется вне транзакции, а новое смещение
+фиксируется условным UPDATE — только если смещение и отметка не менялись.
+"""
+import hashlib
+import uuid
+from collections import OrderedDict
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import transaction
+from django.utils import timezone
+from wagtail.documents import get_document_model
+from wagtail.images import get_image_model
+
+from .models import ChunkedUpload
+
+CHUNK_READ_SIZE = 64 * 1024
+
+# Хэш-объекты незавершённых загрузок этого воркера: id → (смещение, sha1).
+# Брошенные загрузки отсюда никто не убирает — храним только последние HASHERS_LIMIT,
+# для вытесненной хэш досчитывается по файлу
+HASHERS_LIMIT = 64
+_hashers = OrderedDict()
+
+
+class UploadOffsetMismatch(Exception):
+    """Клиент прислал часть не с того смещения — ему нужно продолжить с upload.offset."""
+
+
+class UploadInProgress(UploadOffsetMismatch):
+    """Часть с этого смещения уже пишет другой запрос — клиенту нужно подождать и спросить смещение."""
+
+
+def get_upload_model(kind):
+    return get_image_model() if kind == 'image' else get_document_model()
+
+
+def get_upload_storage(kind):
+    return get_upload_model(kind)._meta.get_field('file').storage
+
+
+def start_upload(user, filename, size, kind):
+    """Резервирует файл в итоговом хранилище и создаёт запись о загрузке."""
+    model = get_upload_model(kind)
+    field = model._meta.get_field('file')
+    path = field.storage.save(field.generate_filename(model(), filename), ContentFile(b''))
+    return ChunkedUpload.objects.create(user=user, kind=kind, filename=filename, file=path, size=size)
+
+
+def _get_hasher(upload, path):
+    offset, hasher = _hashers.pop(upload.pk, (None, None))
+    if offset == upload.offset:
+        # Копия — чтобы оборванная запись не испортила сохранённое состояние
+        return hasher.copy()
+
+    # Докачка в другом воркере или после перезапуска — досчитываем хэш по уже записанному
+    hasher = hashlib.sha1()
+    with open(path, 'rb') as f:
+        remaining = upload.offset
+        while remaining:
+            data = f.read(min(CHUNK_READ_SIZE, remaining))
+            if not data:
+                break
+            hasher.update(data)
+            remaining -= len(data)
+    return hasher
+
+
+def _remember_hasher(upload_id, offset, hasher):
+    _hashers[upload_id] = (offset, hasher)
+    while len(_hashers) > HASHERS_LIMIT:
+        _hashers.popitem(last=False)
+
+
+def _claim_upload(upload_id, offset):
+    """Проверяет смещение и ставит отметку записи — короткая транзакция под блокировкой строки."""
+    with transaction.atomic():
+        upload = ChunkedUpload.objects.select_for_update().get(pk=upload_id)
+        if offset != upload.offset or upload.is_complete:
+            raise UploadOffsetMismatch(upload.offset)
+        stale = timezone.now() - timedelta(seconds=settings.FEED_UPLOAD_CLAIM_TIMEOUT)
+        if upload.claim is not None and upload.claimed_at > stale:
+            raise UploadInProgress(upload.offset)
+
+        upload.claim = uuid.uuid4()
+        upload.claimed_at = timezone.now()
+        upload.save(update_fields=['claim', 'claimed_at'])
+    return upload
+
+
+def write_chunk(upload_id, offset, stream):
+    """
+    Дописывает часть из потока (тело запроса) в файл загрузки, начиная с offset.
+    Возвращает обновлённую загрузку.
+    """
+    upload = _claim_upload(upload_id, offset)
+    claimed_offset = upload.offset
+    hasher = None
+    try:
+        path = get_upload_storage(upload.kind).path(upload.file)
+        hasher = _get_hasher(upload, path)
+        with open(path, 'r+b') as f:
+            f.seek(upload.offset)
+            f.truncate()  # отрезаем хвост оборванной прошлой попытки
+            while upload.offset < upload.size:
+                data = stream.read(min(CHUNK_READ_SIZE, upload.size - upload.offset))
+                if not data:
+                    break
+                f.write(data)
+                hasher.update(data)
+                upload.offset += len(data)
+    finally:
+        # Записанное до обрыва тоже фиксируем — клиент продолжит с этого места
+        if upload.is_complete:
+            upload.sha1 = hasher.hexdigest()
+        committed = ChunkedUpload.objects.filter(pk=upload.pk, offset=claimed_offset, claim=upload.claim).update(
+            offset=upload.offset, sha1=upload.sha1, claim=None, claimed_at=None, updated_at=timezone.now())
+
+    if not committed:
+        # Отметку сочли брошенной и её перехватил другой запрос — наша запись не в счёт
+        raise UploadOffsetMismatch(ChunkedUpload.objects.values_list('offset', flat=True).get(pk=upload.pk))
+    if not upload.is_complete:
+        # Загрузка может оказаться брошенной — этот хэш вытеснят более свежие
+        _remember_hasher(upload.pk, upload.offset, hasher)
+    upload.claim = upload.claimed_at = None
+    return upload
+
+
+def discard_upload(upload):
+    get_upload_storage(upload.kind).delete(upload.file)
+    _hashers.pop(upload.pk, None)
+    upload.delete()
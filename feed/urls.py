@@ -5,9 +5,18 @@ from . import views
 app_name = 'feed'
 
 urlpatterns = [
+    path('posts/', views.PostListView.as_view(), name='post_list'),
+    path('posts/search/', views.PostSearchView.as_view(), name='post_search'),
+    path('posts/new/', views.NewPostsView.as_view(), name='new_posts'),
+    path('posts/counters/', views.PostCountersView.as_view(), name='post_counters'),
     path('post/create/', views.PostCreateView.as_view(), name='post_create'),
     path('post/<int:pk>/update/', views.PostUpdateView.as_view(), name='post_update'),
     path('post/<int:pk>/delete/', views.PostDeleteView.as_view(), name='post_delete'),
+    path('post/<int:pk>/like/', views.PostLikeView.as_view(), name='post_like'),
+    path('post/<int:pk>/comments/', views.PostCommentsView.as_view(), name='post_comments'),
+    path('comment/<int:pk>/delete/', views.CommentDeleteView.as_view(), name='comment_delete'),
     path('image/<int:pk>/delete/', views.PostImageDeleteView.as_view(), name='image_delete'),
     path('document/<int:pk>/delete/', views.PostDocumentDeleteView.as_view(), name='document_delete'),
+    path('upload/', views.UploadStartView.as_view(), name='upload_start'),
+    path('upload/<uuid:upload_id>/', views.UploadChunkView.as_view(), name='upload_chunk'),
 ]
\ No newline at end of file
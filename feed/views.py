@@ -1,21 +1,62 @@
+import hashlib
+import os
+import uuid
+
 from django.shortcuts import render
 from django.views.generic import CreateView, UpdateView, DeleteView, View
 from django.contrib.auth.mixins import LoginRequiredMixin
 from django.shortcuts import get_object_or_404, render, redirect
 from django.contrib import messages
-from django.http import HttpResponse
+from django.core.paginator import Paginator
+from django.http import HttpResponse, HttpResponseBadRequest, JsonResponse
 from django.contrib.auth.models import Group
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, quote_etag
+from django.conf import settings
+from django.db import transaction
 from wagtail.images import get_image_model
 from wagtail.documents import get_document_model
-
-from .models import Post, PostImage, PostDocument
+from wagtail.images.utils import get_allowed_image_extensions
+
+from .counters import record_post_views
+from .interactions import add_comment, delete_comment, set_post_like
+from .models import ChunkedUpload, Post, PostComment, PostImage, PostDocument, PostLike, encode_feed_cursor
+from .notifications import notify_post_created
+from .page_cache import get_latest_update, render_feed_page
+from .tasks import enqueue_post_attachments
+from .uploads import UploadInProgress, UploadOffsetMismatch, start_upload, write_chunk
 from .forms import PostForm
 
 Image = get_image_model()
 Document = get_document_model()
 
 
-class PostCreateView(LoginRequiredMixin, CreateView):
+def get_completed_uploads(request):
+    """Завершённые загрузки по частям, id которых форма прислала в поле uploads."""
+    upload_ids = []
+    for value in request.POST.getlist('uploads'):
+        try:
+            upload_ids.append(uuid.UUID(value))
+        except ValueError:
+            pass  # мусор в форме — игнорируем
+    uploads = ChunkedUpload.objects.filter(user=request.user, pk__in=upload_ids)
+    return [upload for upload in uploads if upload.is_complete]
+
+
+class HtmxFormErrorsMixin:
+    """Форма с ошибками при HTMX-запросе возвращается в модальное окно, а не в ленту."""
+
+    def form_invalid(self, form):
+        response = super().form_invalid(form)
+        if self.request.headers.get('HX-Request'):
+            # 422: after-request видит неуспех и не закрывает модалку; swap разрешён в feed_page.html
+            response.status_code = 422
+            response['HX-Retarget'] = '#modal-body'
+            response['HX-Reswap'] = 'innerHTML'
+        return response
+
+
+class PostCreateView(LoginRequiredMixin, HtmxFormErrorsMixin, CreateView):
     model = Post
     form_class = PostForm
     template_name = 'feed/post_form.html'
@@ -33,41 +74,38 @@ class PostCreateView(LoginRequiredMixin, CreateView):
 
     def form_valid(self, form):
         form.instance.author = self.request.user
-        self.object = form.save()
-
-        # Автоматически устанавливаем видимость только для "Группа Сфера"
-        try:
-            sphera_group = Group.objects.get(name="COSMO")
-            self.object.visibility_groups.set([sphera_group])  # очищаем старые (если были) и ставим эту
-        except Group.DoesNotExist:
-            # Если группы вдруг нет — пост видим всем (на всякий случай)
-            self.object.visibility_groups.clear()
-
-        # Остальной код с файлами (изображения/документы) без изменений
-        for f in self.request.FILES.getlist('images'):
-            img = Image(title=f.name, file=f)
-            img.save()
-            PostImage.objects.create(post=self.object, image=img)
-
-        for f in self.request.FILES.getlist('documents'):
-            doc = Document(title=f.name, file=f)
-            doc.save()
-            PostDocument.objects.create(post=self.object, document=doc)
+        with transaction.atomic():
+            self.object = form.save()
+
+            # Автоматически устанавливаем видимость только для "Группа Сфера"
+            try:
+                sphera_group = Group.objects.get(name="COSMO")
+                self.object.visibility_groups.set([sphera_group])  # очищаем старые (если были) и ставим эту
+            except Group.DoesNotExist:
+                # Если группы вдруг нет — пост видим всем (на всякий случай)
+                self.object.visibility_groups.clear()
+
+            # Уведомления в WhatsApp рассылает воркер — здесь только запись в outbox
+            notify_post_created(self.object)
+
+        # Изображения и документы обрабатываются в фоне, пост виден сразу
+        enqueue_post_attachments(
+            self.object,
+            self.request.FILES.getlist('images'),
+            self.request.FILES.getlist('documents'),
+            uploads=get_completed_uploads(self.request),
+        )
 
         messages.success(self.request, 'Пост сохранён!')
 
         if self.request.headers.get('HX-Request'):
-            visible_posts = self.get_visible_posts()
-            return render(self.request, 'feed/posts_list.html', {'posts': visible_posts})
+            # Отдаём только изменённый пост — лента целиком не перерисовывается
+            return render(self.request, 'feed/post.html', {'post': self.object})
 
         return redirect(self.request.path)  # возвращаемся на ту же страницу ленты
 
-    def get_visible_posts(self):
-        posts = Post.objects.all().order_by('-pinned', '-created_at')
-        return [p for p in posts if p.is_visible_to(self.request.user)]
-
 
-class PostUpdateView(LoginRequiredMixin, UpdateView):
+class PostUpdateView(LoginRequiredMixin, HtmxFormErrorsMixin, UpdateView):
     model = Post
     form_class = PostForm
     template_name = 'feed/post_form.html'
@@ -101,30 +139,22 @@ class PostUpdateView(LoginRequiredMixin, UpdateView):
             # Если группы вдруг нет — пост видим всем (на всякий случай)
             self.object.visibility_groups.clear()
 
-        # Остальной код с файлами (изображения/документы) без изменений
-        for f in self.request.FILES.getlist('images'):
-            img = Image(title=f.name, file=f)
-            img.save()
-            PostImage.objects.create(post=self.object, image=img)
-
-        for f in self.request.FILES.getlist('documents'):
-            doc = Document(title=f.name, file=f)
-            doc.save()
-            PostDocument.objects.create(post=self.object, document=doc)
+        # Изображения и документы обрабатываются в фоне, пост виден сразу
+        enqueue_post_attachments(
+            self.object,
+            self.request.FILES.getlist('images'),
+            self.request.FILES.getlist('documents'),
+            uploads=get_completed_uploads(self.request),
+        )
 
         messages.success(self.request, 'Пост сохранён!')
 
         if self.request.headers.get('HX-Request'):
-            visible_posts = self.get_visible_posts()
-            return render(self.request, 'feed/posts_list.html', {'posts': visible_posts})
+            # Отдаём только изменённый пост — лента целиком не перерисовывается
+            return render(self.request, 'feed/post.html', {'post': self.object})
 
         return redirect(self.request.path)  # возвращаемся на ту же страницу ленты
 
-    def get_visible_posts(self):
-        # Тот же метод, что в create
-        posts = Post.objects.all().order_by('-pinned', '-created_at')
-        return [p for p in posts if p.is_visible_to(self.request.user)]
-
 
 class PostDeleteView(LoginRequiredMixin, DeleteView):
     model = Post
@@ -135,19 +165,153 @@ class PostDeleteView(LoginRequiredMixin, DeleteView):
             qs = qs.filter(author=self.request.user)
         return qs
 
-    def delete(self, request, *args, **kwargs):
-        self.object = self.get_object()
+    # Начиная с Django 4.0 POST в DeleteView обрабатывается в form_valid, а не в delete()
+    def form_valid(self, form):
         self.object.delete()
-        messages.success(request, 'Пост удалён!')
+        messages.success(self.request, 'Пост удалён!')
 
-        if request.headers.get('HX-Request'):
-            visible_posts = [p for p in Post.objects.all().order_by('-pinned', '-created_at') if
-                             p.is_visible_to(request.user)]
-            return render(request, 'feed/posts_list.html', {'posts': visible_posts})
+        if self.request.headers.get('HX-Request'):
+            return HttpResponse('')  # кнопка нацелена на #post-<pk> с outerHTML — пост просто исчезает
 
         return redirect('feed_page')
 
 
+class PostListView(LoginRequiredMixin, View):
+    """Следующая страница ленты для бесконечной прокрутки (HTMX)."""
+
+    def get(self, request):
+        try:
+            posts_html, post_ids, _ = render_feed_page(request.user, cursor=request.GET.get('cursor'))
+        except ValueError:
+            return HttpResponseBadRequest('Некорректный курсор')
+
+        record_post_views(post_ids)
+        return HttpResponse(posts_html)
+
+
+class PostSearchView(LoginRequiredMixin, View):
+    """Поиск по ленте (HTMX): только посты, видимые пользователю, по релевантности."""
+
+    def get(self, request):
+        query = request.GET.get('q', '').strip()
+        page = None
+        if query:
+            results = Post.objects.for_feed().search_visible_to(request.user, query)
+            page = Paginator(results, settings.FEED_PAGE_SIZE).get_page(request.GET.get('page'))
+        return render(request, 'feed/search_results.html', {'query': query, 'page': page})
+
+
+class NewPostsView(LoginRequiredMixin, View):
+    """
+    Опрос новых постов (HTMX, hx-trigger="every ...").
+    Если с прошлого опроса ничего не менялось — 304 по ETag/Last-Modified без запросов к постам.
+    """
+
+    def get(self, request):
+        since = request.GET.get('since')
+        posts = Post.objects.visible_to(request.user).for_feed().exclude(author=request.user)
+        if since:
+            try:
+                posts = posts.newer_than(since)
+            except ValueError:
+                return HttpResponseBadRequest('Некорректный курсор')
+
+        latest = get_latest_update(request.user)
+        etag = quote_etag(hashlib.md5(f'{latest.isoformat()}:{since or ""}'.encode()).hexdigest())
+
+        response = get_conditional_response(request, etag=etag, last_modified=int(latest.timestamp()))
+        if response is None:
+            # Свои новые посты пользователь уже получил в ответ на создание
+            posts = list(posts.order_by('-created_at', '-id')[:settings.FEED_PAGE_SIZE])
+            record_post_views(post.pk for post in posts)
+            response = render(request, 'feed/new_posts.html', {
+                'posts': posts,
+                'since': encode_feed_cursor(posts[0]) if posts else since,
+                'poll_interval': settings.FEED_POLL_INTERVAL,
+            })
+
+        response['ETag'] = etag
+        response['Last-Modified'] = http_date(latest.timestamp())
+        patch_cache_control(response, private=True, no_cache=True)
+        return response
+
+
+def render_post_counters(request, post, liked=None, extra=''):
+    """Фрагмент счётчиков поста со свежими значениями и состоянием лайка (HTMX меняет только его)."""
+    post.refresh_from_db(fields=['views_count', 'likes_count', 'comments_count'])
+    if liked is None:
+        liked = PostLike.objects.filter(post=post, user=request.user).exists()
+    return render(request, 'feed/post_counters.html', {'post': post, 'liked': liked, 'extra': extra})
+
+
+class PostCountersView(LoginRequiredMixin, View):
+    """
+    Свежие счётчики постов страницы и состояние лайка пользователя (HTMX, hx-trigger="load").
+    HTML ленты кешируется общим для всех и от счётчиков не сбрасывается — актуальные
+    значения приходят этим запросом, фрагменты меняются out-of-band.
+    """
+
+    def get(self, request):
+        try:
+            post_ids = [int(pk) for pk in request.GET.get('ids', '').split(',') if pk]
+        except ValueError:
+            return HttpResponseBadRequest('Некорректный список постов')
+        post_ids = post_ids[:settings.FEED_PAGE_SIZE]
+
+        posts = list(Post.objects.visible_to(request.user).filter(pk__in=post_ids).only(
+            'views_count', 'likes_count', 'comments_count'
+        ))
+        liked_ids = set(
+            PostLike.objects.filter(user=request.user, post_id__in=post_ids).values_list('post_id', flat=True)
+        )
+        for post in posts:
+            post.liked = post.pk in liked_ids
+        return render(request, 'feed/posts_counters.html', {'posts': posts})
+
+
+class PostLikeView(LoginRequiredMixin, View):
+    """Лайк поста: liked=1 — поставить, liked=0 — снять, без параметра — переключить."""
+
+    def post(self, request, pk):
+        post = get_object_or_404(Post.objects.visible_to(request.user), pk=pk)
+        liked = {'1': True, '0': False}.get(request.POST.get('liked'))
+        liked = set_post_like(post, request.user, liked)
+        return render_post_counters(request, post, liked=liked)
+
+
+class PostCommentsView(LoginRequiredMixin, View):
+    """GET — список комментариев с формой, POST — новый комментарий."""
+
+    def get(self, request, pk):
+        post = get_object_or_404(Post.objects.visible_to(request.user), pk=pk)
+        comments = post.comments.select_related('author')
+        return render(request, 'feed/post_comments.html', {'post': post, 'comments': comments})
+
+    def post(self, request, pk):
+        post = get_object_or_404(Post.objects.visible_to(request.user), pk=pk)
+        content = request.POST.get('content', '').strip()
+        if not content:
+            return HttpResponseBadRequest('Пустой комментарий')
+
+        comment = add_comment(post, request.user, content)
+        # Сам комментарий уходит в список out-of-band, основной ответ — счётчики
+        extra = render(request, 'feed/comment.html', {'comment': comment, 'oob': True}).content.decode()
+        return render_post_counters(request, post, extra=extra)
+
+
+class CommentDeleteView(LoginRequiredMixin, View):
+
+    def post(self, request, pk):
+        comments = PostComment.objects.select_related('post')
+        if not request.user.is_staff:
+            comments = comments.filter(author=request.user)
+        comment = get_object_or_404(comments, pk=pk)
+
+        delete_comment(comment)
+        extra = f'<div id="comment-{pk}" hx-swap-oob="delete"></div>'
+        return render_post_counters(request, comment.post, extra=extra)
+
+
 class FileDeleteView(LoginRequiredMixin, View):  # общий для изображений и документов
     model = None  # переопределять в подклассах
     related_model = None  # PostImage или PostDocument
@@ -171,4 +335,63 @@ class PostImageDeleteView(FileDeleteView):
 
 class PostDocumentDeleteView(FileDeleteView):
     model = Document
-    related_model = PostDocument
\ No newline at end of file
+    related_model = PostDocument
+
+
+def upload_status(upload):
+    return {'id': str(upload.pk), 'offset': upload.offset, 'size': upload.size, 'complete': upload.is_complete}
+
+
+class UploadStartView(LoginRequiredMixin, View):
+    """Начало загрузки по частям: резервирует файл и возвращает id загрузки."""
+
+    def post(self, request):
+        kind = request.POST.get('kind')
+        filename = os.path.basename(request.POST.get('filename', '')).strip()
+        try:
+            size = int(request.POST.get('size', ''))
+        except ValueError:
+            return HttpResponseBadRequest('Некорректный размер файла')
+
+        if kind == 'image':
+            allowed_extensions = get_allowed_image_extensions()
+        elif kind == 'document':
+            allowed_extensions = settings.WAGTAILDOCS_EXTENSIONS
+        else:
+            return HttpResponseBadRequest('Некорректный тип вложения')
+
+        extension = os.path.splitext(filename)[1].lstrip('.').lower()
+        if not filename or extension not in allowed_extensions:
+            return HttpResponseBadRequest('Недопустимый тип файла')
+        if not 0 < size <= settings.FEED_UPLOAD_MAX_SIZE:
+            return HttpResponseBadRequest('Недопустимый размер файла')
+
+        upload = start_upload(request.user, filename, size, kind)
+        return JsonResponse(upload_status(upload), status=201)
+
+
+class UploadChunkView(LoginRequiredMixin, View):
+    """
+    GET — сколько байт уже получено (для докачки).
+    PATCH с заголовком Upload-Offset — очередная часть файла в теле запроса.
+    """
+
+    def get(self, request, upload_id):
+        upload = get_object_or_404(ChunkedUpload, pk=upload_id, user=request.user)
+        return JsonResponse(upload_status(upload))
+
+    def patch(self, request, upload_id):
+        get_object_or_404(ChunkedUpload, pk=upload_id, user=request.user)
+        try:
+            offset = int(request.headers.get('Upload-Offset', ''))
+        except ValueError:
+            return HttpResponseBadRequest('Нужен заголовок Upload-Offset')
+
+        try:
+            upload = write_chunk(upload_id, offset, request)
+        except UploadOffsetMismatch as e:
+            response = JsonResponse({'offset': e.args[0]}, status=409)
+            if isinstance(e, UploadInProgress):
+                response['Retry-After'] = 5  # часть ещё пишет другой запрос
+            return response
+        return JsonResponse(upload_status(upload))
@@ -15,7 +15,7 @@ class PostViewSet(ModelViewSet):
     icon = "comment"
     list_display = ("author", "created_at", "pinned", "views_count", "likes_count", "comments_count")
     list_per_page = 50
-    search_fields = ("content", "author__username", "author__first_name", "author__last_name")
+    # search_fields не задаём: Post в поисковом индексе, админка ищет через него, а не LIKE-запросами
 
     inspect_view_enabled = True
     inspect_view_fields = ("author", "content", "created_at", "updated_at", "pinned", "visibility_groups")
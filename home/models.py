@@ -5,6 +5,8 @@ from wagtail.fields import StreamField, RichTextField
 from wagtail.blocks import CharBlock, RichTextBlock, StructBlock, BooleanBlock
 from wagtail.images.blocks import ImageChooserBlock
 from wagtail.admin.panels import FieldPanel, InlinePanel
+from channels.cache import render_section_groups
+from channels.saved import get_saved_channel_ids
 from channels.models import ChannelGroup
 from wagtail.blocks import StructBlock, CharBlock, PageChooserBlock
 from modelcluster.fields import ParentalKey
@@ -75,9 +77,10 @@ class ChannelSectionPage(MetadataPageMixin, Page):
 
     def get_context(self, request, *args, **kwargs):
         context = super().get_context(request, *args, **kwargs)
-        context['groups'] = ChannelGroup.objects.filter(
-            section=self.section_type
-        ).prefetch_related('channels').order_by('sort_order')
+        # Аккордеон групп рендерится один раз на версию данных каналов (сбрасывается сигналами)
+        context['groups_html'] = render_section_groups(self.section_type)
+        # Отметки избранного накладываются стилями по набору id — без запроса на каждый канал
+        context['saved_channel_ids'] = get_saved_channel_ids(request.user)
         return context
 
 #-----------------------------------------------------------
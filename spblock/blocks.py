@@ -11,6 +11,9 @@ class HeroBlock(StructBlock):
     title = CharBlock(required=True, label="Заголовок")
     image = ImageChooserBlock(required=True, label="Фоновое изображение")
 
+    # Рендишены, которые выводит шаблон блока (base/renditions.py)
+    rendition_filters = {'image': ('fill-1920x1080',)}
+
     class Meta:
         template = "home/blocks/hero.html"
         icon = "image"
@@ -31,6 +34,8 @@ class TextImageBlock(StructBlock):
     button_text = CharBlock(default="Подробнее", required=False, label="Текст кнопки")
     button_page = PageChooserBlock(required=False, label="Ссылка на страницу")
 
+    rendition_filters = {'image': ('max-600x400',)}
+
     class Meta:
         template = "home/blocks/text_image.html"
         icon = "grip"
@@ -4,37 +4,24 @@ from wagtail.fields import RichTextField
 from wagtail.admin.panels import FieldPanel
 from wagtail.images.models import Image
 from wagtailmetadata.models import MetadataPageMixin
+from blog.listing import KeysetListingMixin
 from blog.models import Category  # импортируем общую категорию
 import datetime
 
-class VideoIndexPage(MetadataPageMixin, Page):
+class VideoIndexPage(KeysetListingMixin, MetadataPageMixin, Page):
     intro = RichTextField(blank=True, verbose_name="Введение")
 
     content_panels = Page.content_panels + [
         FieldPanel('intro'),
+        FieldPanel('listing_page_size'),
     ]
 
-    def get_context(self, request):
-        context = super().get_context(request)
-
-        # Категории только для видео
-        categories = Category.objects.filter(section=2).annotate(
-            video_count=models.Count('video_pages')
-        ).order_by('title')
-        context['categories'] = categories
-
-        # Все видео
-        videos = VideoPage.objects.child_of(self).live().order_by('-date')
-
-        category_id = request.GET.get('category')
-        if category_id:
-            try:
-                videos = videos.filter(category__id=int(category_id), category__section=2)
-            except ValueError:
-                pass
-
-        context['videos'] = videos
-        return context
+    listing_model = 'videos.VideoPage'
+    listing_section = 2
+    listing_context_name = 'videos'
+    listing_items_template = 'videos/video_index_items.html'
+    # Рендишены, которые выводит video_index_items.html (подгружаются пачкой вместе с карточками)
+    listing_image_filters = ('fill-600x400',)
 
     class Meta:
         verbose_name = "Индекс видео"
@@ -79,6 +66,9 @@ class VideoPage(MetadataPageMixin, Page):
         verbose_name="Категория"
     )
 
+    # Рендишены main_image вне карточек индекса: поиск по сайту (base/renditions.py)
+    rendition_filters = {'main_image': ('fill-300x200',)}
+
     content_panels = Page.content_panels + [
         FieldPanel('date'),
         FieldPanel('category'),
@@ -61,6 +61,8 @@ INSTALLED_APPS = [
     "django.contrib.messages",
     "django.contrib.staticfiles",
     "django.contrib.sites",
+    "django_tasks",
+    "django_tasks.backends.database",
 
     'allauth',
     'allauth.account',
@@ -238,6 +240,18 @@ WAGTAILSEARCH_BACKENDS = {
     }
 }
 
+# Кеш общий для всех процессов: веб-воркеров, db_worker и management-команд (версии ленты
+# и каналов, закешированные страницы, статистика кеша ленты, прогрев разделов каналов).
+# Локальный кеш (LocMem) у каждого процесса свой — в продакшене он не годится.
+# Адрес Redis — из переменной окружения REDIS_URL (в контейнере она обязательна, см. Dockerfile)
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.redis.RedisCache",
+        "LOCATION": os.environ.get("REDIS_URL", "redis://127.0.0.1:6379/1"),
+        "KEY_PREFIX": "vin_sfera",
+    },
+}
+
 
 # Base URL to use when referring to full URLs within the Wagtail admin backend -
 # e.g. in notification emails. Don't include '/admin' or a trailing slash
@@ -250,3 +264,62 @@ WAGTAILADMIN_BASE_URL = "http://127.0.0.1:8000"
 WAGTAILDOCS_EXTENSIONS = ['csv', 'docx', 'key', 'odt', 'pdf', 'pptx', 'rtf', 'txt', 'xlsx', 'zip', 'mp3']
 WAGTAILMETADATA_IMAGE_FILTER = 'fill-1200x630'
 
+# Лента: просмотры копятся в памяти воркера и отправляются пачкой в кеш не чаще, чем раз в N секунд
+FEED_VIEW_COUNTER_PUSH_INTERVAL = 5
+
+# Лента: воркер flush_post_views --loop переносит просмотры из кеша в посты раз в N секунд
+FEED_VIEW_COUNTER_FLUSH_INTERVAL = 60
+
+# Лента: сколько постов отдаётся за одну подгрузку (keyset-пагинация)
+FEED_PAGE_SIZE = 20
+
+# Лента: время жизни закешированных страниц (инвалидация — по версии ленты)
+FEED_PAGE_CACHE_TIMEOUT = 60 * 60
+
+# Фоновые задачи (django-tasks). Вложения ленты обрабатывает воркер:
+#   python manage.py db_worker --backend feed
+TASKS = {
+    "default": {
+        "BACKEND": "django_tasks.backends.immediate.ImmediateBackend",
+    },
+    "feed": {
+        "BACKEND": "django_tasks.backends.database.DatabaseBackend",
+    },
+}
+
+# Лента: фото больше этого размера (по длинной стороне) уменьшаются при обработке
+FEED_IMAGE_MAX_SIZE = 2560
+
+# Лента: максимальный размер файла при загрузке по частям (байт)
+FEED_UPLOAD_MAX_SIZE = 500 * 1024 * 1024
+
+# Лента: через сколько секунд незавершённая запись части считается брошенной (воркер упал или убит по таймауту)
+FEED_UPLOAD_CLAIM_TIMEOUT = 5 * 60
+
+# Лента: как часто открытая страница спрашивает о новых постах (секунд)
+FEED_POLL_INTERVAL = 30
+
+# Лента: уведомления о новых постах в WhatsApp (воркер: python manage.py send_whatsapp_notifications --loop).
+# Отправитель — класс с методом send(phone, text); Console/File — заглушки для разработки и тестов
+FEED_WHATSAPP_SENDER = "feed.notifications.ConsoleWhatsAppSender"
+FEED_WHATSAPP_FILE_PATH = os.path.join(BASE_DIR, "whatsapp_outbox.jsonl")
+FEED_WHATSAPP_BATCH_SIZE = 100
+FEED_WHATSAPP_CONCURRENCY = 8
+FEED_WHATSAPP_MAX_ATTEMPTS = 5
+# Пауза перед повтором (секунд), удваивается с каждой неудачной попыткой
+FEED_WHATSAPP_RETRY_DELAY = 60
+
+# Каналы: сколько браузер хранит содержимое канала (URL меняется при правках — см. channels/cache.py)
+CHANNEL_CONTENT_MAX_AGE = 365 * 24 * 60 * 60
+
+# Каналы: время жизни закешированного аккордеона раздела (сбрасывается по версии каналов)
+CHANNEL_SECTION_CACHE_TIMEOUT = 24 * 60 * 60
+
+# Каналы: время жизни закешированного набора избранных каналов пользователя (сбрасывается при изменениях)
+CHANNEL_SAVED_CACHE_TIMEOUT = 24 * 60 * 60
+
+# Блог/видео/аудио: время жизни закешированных счётчиков категорий (сбрасываются сигналами публикации)
+LISTING_FACETS_CACHE_TIMEOUT = 24 * 60 * 60
+
+# Блог: время жизни закешированных списков похожих статей (пересчитываются сигналами публикации)
+RELATED_ARTICLES_CACHE_TIMEOUT = 24 * 60 * 60
@@ -11,6 +11,14 @@ ALLOWED_HOSTS = ["*"]
 
 EMAIL_BACKEND = "django.core.mail.backends.console.EmailBackend"
 
+# Для разработки и тестов Redis не нужен: кеш в памяти процесса
+# (db_worker и management-команды видят свой, отдельный кеш)
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    },
+}
+
 
 try:
     from .local import *
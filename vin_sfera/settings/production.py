@@ -8,6 +8,10 @@ DEBUG = False
 # See https://docs.djangoproject.com/en/6.0/ref/contrib/staticfiles/#manifeststaticfilesstorage
 STORAGES["staticfiles"]["BACKEND"] = "django.contrib.staticfiles.storage.ManifestStaticFilesStorage"
 
+# Секретный ключ — из окружения (docker run -e DJANGO_SECRET_KEY=...), иначе задаётся в local.py
+if os.environ.get("DJANGO_SECRET_KEY"):
+    SECRET_KEY = os.environ["DJANGO_SECRET_KEY"]
+
 try:
     from .local import *
 except ImportError: